@@ -16,52 +16,523 @@
 ################################################################################
 
 import time
-from threading import Lock
-start_time=time.time()
+from threading import Lock, get_ident
 
+import numpy as np
+
+start_time=time.monotonic()
+
+# Only taken the first time a thread updates a given stream, never per frame.
 fps_mutex = Lock()
 
+# Number of frame timestamps kept per stream and per thread.
+FRAME_RING_SIZE = 1024
+
+class FrameIntervalRing:
+    """ Fixed-size ring of frame timestamps.
+
+    One entry per push(), stamped by time.monotonic(), along with the
+    running frame total, so that a batch of frames pushed at once counts
+    for all its frames. The entries are kept in plain lists, a list store
+    costs a fraction of a NumPy scalar store on the streaming thread, and
+    only converted to arrays when read. Only the owning thread pushes,
+    readers take a copy.
+    """
+
+    def __init__(self, size=FRAME_RING_SIZE):
+        self._timestamps = [0.0] * size
+        self._totals = [0] * size
+        self._size = size
+        self._pos = 0
+        self._filled = False
+        # Frames pushed since clear()
+        self.total = 0
+        # Running total before the oldest entry
+        self._base = 0
+
+    def push(self, timestamp, count=1):
+        pos = self._pos
+        total = self.total + count
+        self.total = total
+        totals = self._totals
+        # Slots not written since clear() hold 0, the total before the
+        # first entry
+        self._base = totals[pos]
+        self._timestamps[pos] = timestamp
+        totals[pos] = total
+        pos += 1
+        if pos == self._size:
+            pos = 0
+            self._filled = True
+        self._pos = pos
+
+    def clear(self):
+        self._totals = [0] * self._size
+        self._pos = 0
+        self._filled = False
+        self.total = 0
+        self._base = 0
+
+    def __len__(self):
+        return self._size if self._filled else self._pos
+
+    def span(self, n):
+        """ (frames, oldest, newest) of the last n entries in O(1), frames
+        counting the ones pushed after the oldest entry
+        """
+        count = min(n, len(self))
+        if count < 2:
+            return 0, 0.0, 0.0
+        # Negative indices wrap around the end of the lists, which is
+        # only reached once the ring is filled.
+        oldest = self._pos - count
+        newest = self._pos - 1
+        return (self._totals[newest] - self._totals[oldest],
+                self._timestamps[oldest], self._timestamps[newest])
+
+    def entries(self):
+        """ (timestamps, frames of each timestamp), oldest first """
+        # Read once, the owning thread may push meanwhile
+        pos, filled, base = self._pos, self._filled, self._base
+        timestamps = np.array(self._timestamps, dtype=np.float64)
+        totals = np.array(self._totals, dtype=np.int64)
+        if filled:
+            timestamps = np.roll(timestamps, -pos)
+            totals = np.roll(totals, -pos)
+        else:
+            timestamps = timestamps[:pos]
+            totals = totals[:pos]
+            base = 0
+        return timestamps, np.diff(totals, prepend=base)
+
+    def timestamps(self):
+        return self.entries()[0]
+
+class _FpsShard:
+    __slots__ = ("objects", "ring")
+
+    def __init__(self, ring_size):
+        self.objects = 0
+        # ring.total counts the frames of the shard
+        self.ring = FrameIntervalRing(ring_size)
+
+def _frame_intervals(timestamps, counts=None):
+    """ (per frame intervals, gaps between entries) in milliseconds. An
+    entry of counts[i] frames spreads the gap before it over its frames.
+    """
+    order = np.argsort(timestamps, kind="stable")
+    gaps = np.diff(np.asarray(timestamps)[order]) * 1000.0
+    if counts is None:
+        return gaps, gaps
+    counts = np.maximum(np.asarray(counts)[order][1:], 1)
+    return np.repeat(gaps / counts, counts), gaps
+
+def frame_interval_stats(timestamps, counts=None):
+    """ Frame interval statistics in milliseconds.
+
+    counts gives the frames of each timestamp when they are stamped per
+    batch. Returns a dict with p50, p95 and p99 frame interval, the longest
+    stall and the jitter (standard deviation of the interval), or None
+    when fewer than two timestamps were seen.
+    """
+    if len(timestamps) < 2:
+        return None
+    intervals, gaps = _frame_intervals(timestamps, counts)
+    p50, p95, p99 = np.percentile(intervals, (50, 95, 99))
+    return {
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_stall_ms": round(float(gaps.max()), 2),
+        "jitter_ms": round(float(intervals.std()), 2),
+    }
+
 class GETFPS:
-    def __init__(self,stream_id):
+    """ Per-stream frame counter.
+
+    Every streaming thread increments its own counter shard, so the per-frame
+    path never takes a lock. Shards are only summed when the FPS is read.
+    Each shard also records the last frame timestamps in a
+    FrameIntervalRing for the interval percentiles. A stream is usually
+    fed by a single thread, the first one to update it owns the counter and
+    finds its shard without a dict lookup.
+    """
+
+    def __init__(self,stream_id,ring_size=FRAME_RING_SIZE):
         global start_time
         self.start_time=start_time
         self.is_first=True
-        self.frame_count=0
+        self.first_time=None
         self.stream_id=stream_id
+        self._ring_size = ring_size
+        self._shards = {}
+        # (thread id, shard) of the owning thread, replaced as a whole so
+        # that a reader never pairs a thread with another one's shard
+        self._owner = (None, None)
+        self._last_total = 0
+        self._last_objects = 0
+
+    def _thread_shard(self):
+        # A thread id is only reused after its previous owner has exited, so
+        # each shard keeps a single writer.
+        ident = get_ident()
+        with fps_mutex:
+            shard = self._shards.get(ident)
+            if shard is None:
+                shard = self._shards[ident] = _FpsShard(self._ring_size)
+            if self._owner[0] is None:
+                self._owner = (ident, shard)
+        return shard
+
+    def _total_frames(self):
+        # tuple() copies the values in one step, new shards may be added
+        # concurrently by other threads.
+        return sum(shard.ring.total for shard in tuple(self._shards.values()))
+
+    @property
+    def total_frames(self):
+        """ Frames counted since the stream was created, never reset """
+        return self._total_frames()
+
+    @property
+    def frame_count(self):
+        return self._total_frames() - self._last_total
 
     def update_fps(self):
-        end_time = time.time()
+        now = time.monotonic()
         if self.is_first:
-            self.start_time = end_time
+            self.start_time = now
+            self.first_time = now
             self.is_first = False
-        else:
-            global fps_mutex
-            with fps_mutex:
-                self.frame_count = self.frame_count + 1
+            return
+        owner, shard = self._owner
+        if owner != get_ident():
+            shard = self._shards.get(get_ident())
+            if shard is None or owner is None:
+                # Also right after reset(): the thread owns the stream again
+                shard = self._thread_shard()
+        # Only the owning thread ever writes to its shard.
+        shard.ring.push(now)
+
+    def add_frames(self, count, now, objects=0):
+        """ Counts count frames of one batch, all stamped with now """
+        if self.is_first:
+            self.start_time = now
+            self.first_time = now
+            self.is_first = False
+            count -= 1
+            if count <= 0:
+                return
+        owner, shard = self._owner
+        if owner != get_ident():
+            shard = self._shards.get(get_ident())
+            if shard is None or owner is None:
+                shard = self._thread_shard()
+        shard.objects += objects
+        shard.ring.push(now, count)
+
+    def reset(self, stream_id):
+        """ Prepares a released counter to be reused for another stream.
+
+        The shards and their rings are kept, so reuse allocates nothing.
+        """
+        self.stream_id = stream_id
+        self.start_time = time.monotonic()
+        self.is_first = True
+        self.first_time = None
+        # The next thread to update the stream owns it
+        self._owner = (None, None)
+        for shard in tuple(self._shards.values()):
+            shard.objects = 0
+            shard.ring.clear()
+        self._last_total = 0
+        self._last_objects = 0
 
     def get_fps(self):
-        end_time = time.time()
-        with fps_mutex:
-            stream_fps = float(self.frame_count/(end_time - self.start_time))
-            self.frame_count = 0
+        end_time = time.monotonic()
+        total = self._total_frames()
+        stream_fps = float((total - self._last_total)/(end_time - self.start_time))
+        self._last_total = total
         self.start_time = end_time
         return round(stream_fps, 2)
 
+    @property
+    def total_objects(self):
+        """ Objects counted by add_frames() since the stream was created """
+        return sum(shard.objects for shard in tuple(self._shards.values()))
+
+    def get_objects(self):
+        """ Objects counted since the previous call """
+        total = self.total_objects
+        objects = total - self._last_objects
+        self._last_objects = total
+        return objects
+
+    def get_rolling_fps(self, window=30):
+        """ Frame rate over the last window updates (frames or batches),
+        cheap enough per batch
+        """
+        frames = 0
+        oldest = newest = None
+        for shard in tuple(self._shards.values()):
+            shard_frames, shard_oldest, shard_newest = shard.ring.span(window)
+            if shard_frames == 0:
+                continue
+            frames += shard_frames
+            oldest = shard_oldest if oldest is None else min(oldest, shard_oldest)
+            newest = shard_newest if newest is None else max(newest, shard_newest)
+        if frames == 0 or newest <= oldest:
+            return 0.0
+        return frames / (newest - oldest)
+
+    def get_average_fps(self):
+        """ Frame rate since the first frame of the stream """
+        if self.first_time is None:
+            return 0.0
+        elapsed = time.monotonic() - self.first_time
+        if elapsed <= 0:
+            return 0.0
+        return self._total_frames() / elapsed
+
+    def get_frame_entries(self):
+        """ (timestamps, frames of each timestamp) of all the shards """
+        shards = tuple(self._shards.values())
+        if not shards:
+            return (np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.int64))
+        entries = [shard.ring.entries() for shard in shards]
+        return (np.concatenate([timestamps for timestamps, _ in entries]),
+                np.concatenate([counts for _, counts in entries]))
+
+    def get_frame_timestamps(self):
+        return self.get_frame_entries()[0]
+
+    def get_interval_stats(self):
+        return frame_interval_stats(*self.get_frame_entries())
+
+    def get_interval_histogram(self, bin_edges_ms):
+        """ Counts of frame intervals falling in each of the given bins (ms) """
+        intervals, _ = _frame_intervals(*self.get_frame_entries())
+        counts, _ = np.histogram(intervals, bins=bin_edges_ms)
+        return counts
+
     def print_data(self):
         print('frame_count=',self.frame_count)
         print('start_time=',self.start_time)
 
+class ProbeTime:
+    """ Accumulated wall time of one probe function, written by one thread """
+
+    __slots__ = ("count", "total", "max", "overruns")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.overruns = 0
+
+    def update(self, duration, overrun=False):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        if overrun:
+            self.overruns += 1
+
 class PERF_DATA:
+    """ FPS counters of all the streams of a pipeline, keyed "streamN".
+
+    Probes either call update_fps() for each frame or, preferably,
+    update_batch() once per buffer, which walks the batch once and updates
+    every stream of the batch in one call.
+
+    Streams can be added and removed at runtime. all_stream_fps is replaced
+    by a new dict on every change rather than modified in place, so readers
+    iterating over it never see it change size and update_fps() stays a
+    single dict lookup. Counters of removed streams are kept in a free list
+    and reused by the next stream added. A removed stream is only counted
+    again once add_stream() is called for it, the batches still in flight
+    after remove_stream() do not bring it back.
+    """
+
     def __init__(self, num_streams=1):
         self.perf_dict = {}
+        self.interval_dict = {}
+        self.objects_dict = {}
+        self.probe_times = {}
+        # Optional PerfRecorder fed from perf_print_callback
+        self.recorder = None
+        # Optional common.qos.QosAggregator printed and exported alongside
+        self.qos = None
         self.all_stream_fps = {}
+        self._streams_mutex = Lock()
+        self._free_streams = []
+        self._removed_streams = set()
+        self._stream_names = {}
         for i in range(num_streams):
             self.all_stream_fps["stream{0}".format(i)]=GETFPS(i)
 
+    def add_stream(self, stream_index):
+        with self._streams_mutex:
+            self._removed_streams.discard(stream_index)
+            return self._add_stream(stream_index)
+
+    def _add_stream(self, stream_index):
+        # Called with _streams_mutex held
+        stream = self.all_stream_fps.get(stream_index)
+        if stream is None:
+            if self._free_streams:
+                stream = self._free_streams.pop()
+                stream.reset(stream_index)
+            else:
+                stream = GETFPS(stream_index)
+            all_stream_fps = dict(self.all_stream_fps)
+            all_stream_fps[stream_index] = stream
+            self.all_stream_fps = all_stream_fps
+        return stream
+
+    def _auto_add_stream(self, stream_index):
+        """ Registers a stream seen in a batch, None if it was removed """
+        with self._streams_mutex:
+            if stream_index in self._removed_streams:
+                return None
+            return self._add_stream(stream_index)
+
+    def remove_stream(self, stream_index):
+        with self._streams_mutex:
+            if stream_index not in self.all_stream_fps:
+                return False
+            all_stream_fps = dict(self.all_stream_fps)
+            self._free_streams.append(all_stream_fps.pop(stream_index))
+            self.all_stream_fps = all_stream_fps
+            self._removed_streams.add(stream_index)
+        return True
+
     def perf_print_callback(self):
-        self.perf_dict = {stream_index:stream.get_fps() for (stream_index, stream) in self.all_stream_fps.items()}
+        all_stream_fps = self.all_stream_fps
+        self.perf_dict = {stream_index:stream.get_fps() for (stream_index, stream) in all_stream_fps.items()}
+        self.interval_dict = {stream_index:stream.get_interval_stats() for (stream_index, stream) in all_stream_fps.items()}
+        self.objects_dict = {stream_index:stream.get_objects() for (stream_index, stream) in all_stream_fps.items()}
         print ("\n**PERF: ", self.perf_dict, "\n")
+        print ("**PERF frame intervals: ", self.interval_dict, "\n")
+        if self.probe_times:
+            probes = {probe_name: {"mean_ms": round(probe_time.total * 1000.0 / probe_time.count, 3),
+                                   "max_ms": round(probe_time.max * 1000.0, 3),
+                                   "overruns": probe_time.overruns}
+                      for (probe_name, probe_time) in tuple(self.probe_times.items()) if probe_time.count}
+            print ("**PERF probes: ", probes, "\n")
+        if self.qos and self.qos.elements:
+            print ("**PERF qos: ", self.qos.snapshot(), "\n")
+        if self.recorder:
+            self.recorder.record_perf_data(self)
         return True
-    
+
     def update_fps(self, stream_index):
-        self.all_stream_fps[stream_index].update_fps()
+        try:
+            stream = self.all_stream_fps[stream_index]
+        except KeyError:
+            # Stream showed up after start-up, e.g. source added at runtime
+            stream = self._auto_add_stream(stream_index)
+            if stream is None:
+                return
+        stream.update_fps()
+
+    def update_counts(self, counts, now=None, objects=None):
+        """ Adds the frames of one batch, counts being {stream_index: frames}
+        and objects {stream_index: objects} when known.
+        """
+        if now is None:
+            now = time.monotonic()
+        all_stream_fps = self.all_stream_fps
+        for stream_index, count in counts.items():
+            stream = all_stream_fps.get(stream_index)
+            if stream is None:
+                stream = self._auto_add_stream(stream_index)
+                if stream is None:
+                    continue
+            stream.add_frames(count, now,
+                              objects.get(stream_index, 0) if objects else 0)
+
+    def update_batch(self, batch_meta, key="pad_index"):
+        """ Counts every frame of an NvDsBatchMeta in a single pass.
+
+        Frames are grouped by frame_meta.<key>, "pad_index" or "source_id",
+        and reported as "streamN".
+        """
+        # Imported here so that FPS stays usable without DeepStream installed
+        import pyds
+
+        counts = {}
+        objects = {}
+        l_frame = batch_meta.frame_meta_list
+        while l_frame is not None:
+            try:
+                frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
+            except StopIteration:
+                break
+            index = getattr(frame_meta, key)
+            counts[index] = counts.get(index, 0) + 1
+            objects[index] = objects.get(index, 0) + frame_meta.num_obj_meta
+            try:
+                l_frame = l_frame.next
+            except StopIteration:
+                break
+
+        stream_names = self._stream_names
+        named_counts = {}
+        named_objects = {}
+        for index, count in counts.items():
+            name = stream_names.get(index)
+            if name is None:
+                name = stream_names.setdefault(index, "stream{0}".format(index))
+            named_counts[name] = count
+            named_objects[name] = objects[index]
+        self.update_counts(named_counts, objects=named_objects)
+
+    @property
+    def total_frames(self):
+        return sum(stream.total_frames for stream in self.all_stream_fps.values())
+
+    def get_rolling_fps(self, window=30):
+        """ Sum of the recent frame rate of all the streams """
+        return sum(stream.get_rolling_fps(window)
+                   for stream in self.all_stream_fps.values())
+
+    def get_average_fps(self):
+        """ Sum of the frame rate of all the streams since their first frame """
+        return sum(stream.get_average_fps()
+                   for stream in self.all_stream_fps.values())
+
+    def update_probe_time(self, probe_name, duration, overrun=False):
+        """ Adds one invocation of probe_name lasting duration seconds,
+        overrun when it lasted longer than the frame interval. Usually fed by
+        common.probe_timer.ProbeTimer.
+        """
+        probe_time = self.probe_times.get(probe_name)
+        if probe_time is None:
+            probe_time = self.probe_times.setdefault(probe_name, ProbeTime())
+        probe_time.update(duration, overrun)
+
+    def snapshot(self):
+        """ Read-only view of the counters for exporters.
+
+        Does not reset anything, so it can be called from any thread
+        alongside perf_print_callback.
+        """
+        streams = {}
+        for stream_index, stream in self.all_stream_fps.items():
+            streams[stream_index] = {
+                "fps": self.perf_dict.get(stream_index),
+                "frames": stream.total_frames,
+                "objects": stream.total_objects,
+                "intervals": stream.get_interval_stats(),
+            }
+        probes = {}
+        for probe_name, probe_time in tuple(self.probe_times.items()):
+            probes[probe_name] = {
+                "count": probe_time.count,
+                "total": probe_time.total,
+                "max": probe_time.max,
+                "overruns": probe_time.overruns,
+            }
+        qos = self.qos.snapshot() if self.qos else {}
+        return {"streams": streams, "probes": probes, "qos": qos}
@@ -15,20 +15,198 @@
 # limitations under the License.
 ################################################################################
 
-import gi
+""" Bus message handling shared by the apps.
+
+bus_call() is the default handler of the apps:
+    bus.connect("message", bus_call, loop)
+BusDispatcher does the same with handlers registered per message type and
+per element message name, looked up in a dict, warnings rate limited per
+element and a table of the EOS and error state of every source:
+    dispatcher = BusDispatcher(loop)
+    dispatcher.add_handler(Gst.MessageType.STATE_CHANGED, on_state_changed)
+    dispatcher.attach(pipeline.get_bus())
+    ...
+    if dispatcher.is_stream_eos(source_id):
+        ...
+"""
+
 import sys
+import time
+
+import gi
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst
-def bus_call(bus, message, loop):
-    t = message.type
-    if t == Gst.MessageType.EOS:
+
+STREAM_EOS = "stream-eos"
+# nvstreammux names the field "stream-id", some versions "source-id"
+STREAM_ID_FIELDS = ("stream-id", "source-id")
+
+class SourceState:
+    """ EOS and errors of one source """
+
+    __slots__ = ("eos", "errors")
+
+    def __init__(self):
+        self.eos = False
+        self.errors = []
+
+class BusDispatcher:
+    """ See the module documentation.
+
+    Handlers are called with (dispatcher, message), element message
+    handlers with (dispatcher, message, structure), in the order they were
+    added, after the built-in handling:
+        EOS         prints and quits loop if quit_on_eos
+        ERROR       prints, records the error on the source posting it and
+                    quits loop if quit_on_error
+        WARNING     prints at most one warning per element every
+                    warning_interval seconds, with the count of the others,
+                    except the ones containing one of ignored_warnings
+        stream-eos  marks the source EOS
+    """
+
+    def __init__(self, loop=None, warning_interval=5.0, quit_on_eos=True,
+                 quit_on_error=True, ignored_warnings=()):
+        self.loop = loop
+        self.warning_interval = warning_interval
+        self.ignored_warnings = tuple(ignored_warnings)
+        self.quit_on_eos = quit_on_eos
+        self.quit_on_error = quit_on_error
+        self.sources = {}
+        self.errors = []
+        self._source_elements = {}
+        self._warnings = {}
+        self._handlers = {}
+        self._element_handlers = {}
+        self._builtin = {
+            Gst.MessageType.EOS: self._on_eos,
+            Gst.MessageType.ERROR: self._on_error,
+            Gst.MessageType.WARNING: self._on_warning,
+            Gst.MessageType.ELEMENT: self._on_element,
+        }
+
+    def add_handler(self, message_type, handler):
+        self._handlers.setdefault(message_type, []).append(handler)
+
+    def remove_handler(self, message_type, handler):
+        self._handlers.get(message_type, []).remove(handler)
+
+    def add_element_handler(self, name, handler):
+        """ handler of the element messages whose structure is named name """
+        self._element_handlers.setdefault(name, []).append(handler)
+
+    def attach(self, bus):
+        bus.add_signal_watch()
+        return bus.connect("message", self)
+
+    def register_source(self, source_id, element_name):
+        """ Errors posted by element_name or its children are recorded on
+        source_id, e.g. the source bin of the stream.
+        """
+        self._source_elements[element_name] = source_id
+        return self.source(source_id)
+
+    def source(self, source_id):
+        state = self.sources.get(source_id)
+        if state is None:
+            state = self.sources[source_id] = SourceState()
+        return state
+
+    def reset(self):
+        """ Forgets the sources, errors and warnings, for a new run """
+        self.sources.clear()
+        self.errors = []
+        self._warnings.clear()
+
+    def clear_source(self, source_id):
+        """ Forgets the state of source_id, once its source was removed """
+        self.sources.pop(source_id, None)
+
+    def is_stream_eos(self, source_id):
+        state = self.sources.get(source_id)
+        return state is not None and state.eos
+
+    def eos_count(self):
+        return sum(1 for state in self.sources.values() if state.eos)
+
+    def _quit(self):
+        if self.loop is not None:
+            self.loop.quit()
+
+    def _on_eos(self, message):
         sys.stdout.write("End-of-stream\n")
-        loop.quit()
-    elif t==Gst.MessageType.WARNING:
-        err, debug = message.parse_warning()
-        sys.stderr.write("Warning: %s: %s\n" % (err, debug))
-    elif t == Gst.MessageType.ERROR:
+        if self.quit_on_eos:
+            self._quit()
+
+    def source_of(self, element):
+        """ source_id registered for element or one of its parents """
+        while element is not None:
+            source_id = self._source_elements.get(element.get_name())
+            if source_id is not None:
+                return source_id
+            element = element.get_parent()
+        return None
+
+    def _on_error(self, message):
         err, debug = message.parse_error()
         sys.stderr.write("Error: %s: %s\n" % (err, debug))
-        loop.quit()
-    return True
+        source_name = message.src.get_name() if message.src else None
+        self.errors.append((source_name, "%s: %s" % (err, debug)))
+        source_id = self.source_of(message.src)
+        if source_id is not None:
+            self.source(source_id).errors.append(err.message)
+        if self.quit_on_error:
+            self._quit()
+
+    def _on_warning(self, message):
+        err, debug = message.parse_warning()
+        if self.ignored_warnings:
+            text = str(err)
+            if any(ignored in text for ignored in self.ignored_warnings):
+                return
+        name = message.src.get_name() if message.src else None
+        now = time.monotonic()
+        last, suppressed = self._warnings.get(name, (None, 0))
+        if last is not None and now - last < self.warning_interval:
+            self._warnings[name] = (last, suppressed + 1)
+            return
+        self._warnings[name] = (now, 0)
+        if suppressed:
+            sys.stderr.write("Warning: %s: %s (%d more from %s suppressed)\n"
+                             % (err, debug, suppressed, name))
+        else:
+            sys.stderr.write("Warning: %s: %s\n" % (err, debug))
+
+    def _on_element(self, message):
+        structure = message.get_structure()
+        if structure is None:
+            return
+        name = structure.get_name()
+        if name == STREAM_EOS:
+            for field in STREAM_ID_FIELDS:
+                if structure.has_field(field):
+                    source_id = structure.get_value(field)
+                    print("Got EOS from stream %d" % source_id)
+                    self.source(source_id).eos = True
+                    break
+        for handler in self._element_handlers.get(name, ()):
+            handler(self, message, structure)
+
+    def __call__(self, bus, message, *user_data):
+        message_type = message.type
+        builtin = self._builtin.get(message_type)
+        if builtin is not None:
+            builtin(message)
+        for handler in self._handlers.get(message_type, ()):
+            handler(self, message)
+        return True
+
+def bus_call(bus, message, loop):
+    """ Default handling of the bus messages of the apps: quits loop on EOS
+    or error, rate limits the warnings of each element.
+    """
+    # Kept on the loop, to be collected with it
+    dispatcher = getattr(loop, "_bus_dispatcher", None)
+    if dispatcher is None:
+        dispatcher = loop._bus_dispatcher = BusDispatcher(loop)
+    return dispatcher(bus, message)
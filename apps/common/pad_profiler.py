@@ -0,0 +1,242 @@
+################################################################################
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+""" Buffer traffic on every pad of a pipeline, exported as DOT and JSON.
+
+    profiler = PadProfiler(pipeline, target_fps=30)
+    profiler.attach()
+    profiler.dump_on_signal("/tmp/pipeline")   # kill -USR1 <pid>
+    ...
+    profiler.dump("/tmp/pipeline")  # /tmp/pipeline.dot, /tmp/pipeline.json
+
+Every src pad of the pipeline children gets a buffer probe counting the
+buffers, their bytes and the gaps between them, pads added later (the
+sources of uridecodebin, request pads) included. An edge is a src pad and
+its peer, the one whose rate is below target_fps is drawn in red: the
+elements downstream of it are starved by the element upstream.
+
+Render the graph with: dot -Tsvg /tmp/pipeline.dot -o pipeline.svg
+"""
+
+import json
+import signal
+import time
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import GLib, Gst
+
+class PadTraffic:
+    """ Counters of one src pad, only written by its streaming thread """
+
+    __slots__ = ("buffers", "bytes", "calls", "first", "last", "gap_total",
+                 "gap_max")
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.buffers = 0
+        self.bytes = 0
+        self.calls = 0
+        self.first = None
+        self.last = None
+        self.gap_total = 0.0
+        self.gap_max = 0.0
+
+    def update(self, count, size, now):
+        last = self.last
+        if last is None:
+            self.first = now
+        else:
+            gap = now - last
+            self.gap_total += gap
+            if gap > self.gap_max:
+                self.gap_max = gap
+        self.last = now
+        self.calls += 1
+        self.buffers += count
+        self.bytes += size
+
+class PadProfiler:
+    """ See the module documentation. recurse also profiles the elements
+    inside the bins of the pipeline.
+    """
+
+    def __init__(self, pipeline, target_fps=None, recurse=False):
+        self._pipeline = pipeline
+        self.target_fps = target_fps
+        self._recurse = recurse
+        self._traffic = {}
+        self._probes = []
+        self._handlers = []
+        self._signal_sources = []
+        self._start = time.monotonic()
+
+    def _elements(self):
+        elements = []
+        iterator = (self._pipeline.iterate_recurse() if self._recurse
+                    else self._pipeline.iterate_elements())
+        iterator.foreach(elements.append)
+        return elements
+
+    def _probe(self, pad, info, traffic):
+        now = time.monotonic()
+        if info.type & Gst.PadProbeType.BUFFER_LIST:
+            buffer_list = info.get_buffer_list()
+            count = buffer_list.length()
+            size = sum(buffer_list.get(i).get_size() for i in range(count))
+        else:
+            count = 1
+            size = info.get_buffer().get_size()
+        traffic.update(count, size, now)
+        return Gst.PadProbeReturn.OK
+
+    def _add_pad(self, pad):
+        if pad.get_direction() != Gst.PadDirection.SRC or pad in self._traffic:
+            return
+        traffic = self._traffic[pad] = PadTraffic()
+        probe_id = pad.add_probe(Gst.PadProbeType.BUFFER
+                                 | Gst.PadProbeType.BUFFER_LIST,
+                                 self._probe, traffic)
+        self._probes.append((pad, probe_id))
+
+    def _on_pad_added(self, element, pad):
+        self._add_pad(pad)
+
+    def attach(self):
+        """ Adds the probes, the counters start from now """
+        self._start = time.monotonic()
+        for element in self._elements():
+            pads = []
+            element.iterate_src_pads().foreach(pads.append)
+            for pad in pads:
+                self._add_pad(pad)
+            handler_id = element.connect("pad-added", self._on_pad_added)
+            self._handlers.append((element, handler_id))
+
+    def detach(self):
+        for pad, probe_id in self._probes:
+            pad.remove_probe(probe_id)
+        for element, handler_id in self._handlers:
+            element.disconnect(handler_id)
+        for source_id in self._signal_sources:
+            GLib.source_remove(source_id)
+        self._probes = []
+        self._handlers = []
+        self._signal_sources = []
+        self._traffic = {}
+
+    def reset(self):
+        """ Restarts the counters, e.g. once the pipeline is warmed up """
+        self._start = time.monotonic()
+        for traffic in list(self._traffic.values()):
+            traffic.clear()
+
+    @staticmethod
+    def _pad_owner(pad):
+        element = pad.get_parent_element()
+        if element is None:
+            # The internal proxy pad of a ghost pad belongs to the ghost pad
+            parent = pad.get_parent()
+            if isinstance(parent, Gst.Pad):
+                element = parent.get_parent_element()
+        return element.get_name() if element is not None else None
+
+    def edges(self):
+        """ Traffic of every profiled src pad since attach() or reset() """
+        now = time.monotonic()
+        elapsed = max(now - self._start, 1e-9)
+        edges = []
+        for pad, traffic in list(self._traffic.items()):
+            peer = pad.get_peer()
+            fps = traffic.buffers / elapsed
+            gaps = traffic.calls - 1
+            edges.append({
+                "src": self._pad_owner(pad),
+                "src_pad": pad.get_name(),
+                "dst": self._pad_owner(peer) if peer is not None else None,
+                "dst_pad": peer.get_name() if peer is not None else None,
+                "buffers": traffic.buffers,
+                "bytes": traffic.bytes,
+                "fps": round(fps, 2),
+                "mbytes_per_sec": round(traffic.bytes / elapsed / 1e6, 3),
+                "mean_gap_ms": (round(traffic.gap_total / gaps * 1000.0, 3)
+                                if gaps > 0 else None),
+                "max_gap_ms": round(traffic.gap_max * 1000.0, 3),
+                "idle_ms": (round((now - traffic.last) * 1000.0, 3)
+                            if traffic.last is not None else None),
+                "starving": (self.target_fps is not None
+                             and fps < self.target_fps),
+            })
+        return edges
+
+    def to_json(self):
+        elements = [{"name": element.get_name(),
+                     "factory": (element.get_factory().get_name()
+                                 if element.get_factory() else None)}
+                    for element in self._elements()]
+        return {
+            "elapsed": round(time.monotonic() - self._start, 3),
+            "target_fps": self.target_fps,
+            "elements": elements,
+            "edges": self.edges(),
+        }
+
+    def to_dot(self):
+        """ Graph of the elements, edges labelled with their traffic """
+        data = self.to_json()
+        lines = ["digraph pipeline {", "  rankdir=LR;",
+                 "  node [shape=box, fontsize=10];",
+                 "  edge [fontsize=9];"]
+        for element in data["elements"]:
+            lines.append('  "%s" [label="%s\\n%s"];'
+                         % (element["name"], element["name"],
+                            element["factory"]))
+        for edge in data["edges"]:
+            if edge["dst"] is None:
+                continue
+            label = "%.1f buf/s\\n%.2f MB/s\\nmax gap %.1f ms" % (
+                edge["fps"], edge["mbytes_per_sec"], edge["max_gap_ms"])
+            attributes = 'label="%s"' % label
+            if edge["starving"]:
+                attributes += ", color=red, fontcolor=red"
+            lines.append('  "%s" -> "%s" [%s];'
+                         % (edge["src"], edge["dst"], attributes))
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path_prefix):
+        """ Writes path_prefix.dot and path_prefix.json, returns the paths """
+        dot_path = path_prefix + ".dot"
+        json_path = path_prefix + ".json"
+        with open(dot_path, "w") as dot_file:
+            dot_file.write(self.to_dot())
+        with open(json_path, "w") as json_file:
+            json.dump(self.to_json(), json_file, indent=2)
+        return dot_path, json_path
+
+    def dump_on_signal(self, path_prefix, signum=signal.SIGUSR1):
+        """ dump() each time the process receives signum. The dump runs in
+        the GLib main loop, which must be running.
+        """
+        def on_signal():
+            self.dump(path_prefix)
+            return GLib.SOURCE_CONTINUE
+
+        self._signal_sources.append(
+            GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signum, on_signal))
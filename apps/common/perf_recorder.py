@@ -0,0 +1,200 @@
+################################################################################
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import csv
+import math
+import os
+import sys
+import time
+from collections import deque
+from threading import Event, Thread
+
+import numpy as np
+
+# Every row has all the columns, missing values are NaN.
+COLUMNS = ("timestamp", "name", "fps", "frames", "objects",
+           "probe_calls", "probe_time_ms", "probe_max_ms")
+FORMATS = ("csv", "npz", "parquet")
+
+class PerfRecorder:
+    """ Records perf time series for the whole run.
+
+    record() only appends to a bounded in-memory buffer, it never blocks
+    nor does any I/O, so it can be called from a probe or from the GLib
+    main loop. A background thread drains the buffer every flush_interval
+    seconds and writes it as one columnar chunk:
+      csv     appended to output_path
+      npz     one output_path-NNNNN.npz file per chunk
+      parquet one row group per chunk, needs pyarrow
+    Rows arriving while the buffer is full are dropped and counted in
+    dropped_rows.
+
+    Usage:
+        recorder = PerfRecorder("perf.csv")
+        recorder.start()
+        perf_data.recorder = recorder   # records at every perf_print_callback
+        ...
+        recorder.stop()
+    """
+
+    def __init__(self, output_path, fmt="csv", flush_interval=5.0,
+                 max_rows=65536):
+        if fmt not in FORMATS:
+            raise ValueError("Unknown format {0}, expected one of {1}"
+                             .format(fmt, FORMATS))
+        if fmt == "parquet":
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError("pyarrow is required to record parquet, "
+                                  "use fmt=\"csv\" or fmt=\"npz\" instead")
+        self._output_path = output_path
+        self._fmt = fmt
+        self._flush_interval = flush_interval
+        self._max_rows = max_rows
+        self._rows = deque()
+        self._stop = Event()
+        self._thread = None
+        self._chunk_index = 0
+        self._parquet_writer = None
+        self._last_probe_times = {}
+        self.dropped_rows = 0
+        self.written_rows = 0
+
+    def record(self, name, fps=math.nan, frames=math.nan, objects=math.nan,
+               probe_calls=math.nan, probe_time_ms=math.nan,
+               probe_max_ms=math.nan, timestamp=None):
+        if len(self._rows) >= self._max_rows:
+            self.dropped_rows += 1
+            return False
+        if timestamp is None:
+            timestamp = time.time()
+        # deque.append is atomic, no lock needed
+        self._rows.append((timestamp, name, fps, frames, objects,
+                           probe_calls, probe_time_ms, probe_max_ms))
+        return True
+
+    def record_perf_data(self, perf_data):
+        """ Records the last perf interval of a PERF_DATA.
+
+        One row per stream with its FPS, total frames and the objects seen
+        during the interval, and one row per probe with its calls and mean
+        time during the interval.
+        """
+        timestamp = time.time()
+        for stream_index, stream in perf_data.all_stream_fps.items():
+            self.record(stream_index,
+                        fps=perf_data.perf_dict.get(stream_index, math.nan),
+                        frames=stream.total_frames,
+                        objects=perf_data.objects_dict.get(stream_index,
+                                                           math.nan),
+                        timestamp=timestamp)
+        for probe_name, probe_time in tuple(perf_data.probe_times.items()):
+            count, total = probe_time.count, probe_time.total
+            last_count, last_total = self._last_probe_times.get(probe_name,
+                                                                (0, 0.0))
+            self._last_probe_times[probe_name] = (count, total)
+            calls = count - last_count
+            mean_ms = (total - last_total) * 1000.0 / calls if calls else math.nan
+            self.record(probe_name, probe_calls=calls, probe_time_ms=mean_ms,
+                        probe_max_ms=probe_time.max * 1000.0,
+                        timestamp=timestamp)
+
+    def _drain(self):
+        rows = []
+        for _ in range(len(self._rows)):
+            rows.append(self._rows.popleft())
+        return rows
+
+    def _to_columns(self, rows):
+        columns = list(zip(*rows))
+        chunk = {}
+        for name, values in zip(COLUMNS, columns):
+            if name == "name":
+                chunk[name] = np.array(values, dtype=str)
+            else:
+                chunk[name] = np.array(values, dtype=np.float64)
+        return chunk
+
+    def _write_csv(self, chunk):
+        write_header = (not os.path.exists(self._output_path)
+                        or os.path.getsize(self._output_path) == 0)
+        with open(self._output_path, "a", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            if write_header:
+                writer.writerow(COLUMNS)
+            writer.writerows(zip(*(chunk[name].tolist() for name in COLUMNS)))
+
+    def _write_npz(self, chunk):
+        root, _ = os.path.splitext(self._output_path)
+        np.savez("{0}-{1:05d}.npz".format(root, self._chunk_index), **chunk)
+
+    def _write_parquet(self, chunk):
+        import pyarrow
+        import pyarrow.parquet
+
+        table = pyarrow.table({name: chunk[name] for name in COLUMNS})
+        if self._parquet_writer is None:
+            self._parquet_writer = pyarrow.parquet.ParquetWriter(
+                self._output_path, table.schema)
+        self._parquet_writer.write_table(table)
+
+    def flush(self):
+        """ Writes the buffered rows, called from the writer thread """
+        rows = self._drain()
+        if not rows:
+            return 0
+        chunk = self._to_columns(rows)
+        try:
+            if self._fmt == "csv":
+                self._write_csv(chunk)
+            elif self._fmt == "npz":
+                self._write_npz(chunk)
+            else:
+                self._write_parquet(chunk)
+        except OSError as e:
+            sys.stderr.write("PerfRecorder: unable to write %s: %s\n"
+                             % (self._output_path, e))
+            return 0
+        self._chunk_index += 1
+        self.written_rows += len(rows)
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.wait(self._flush_interval):
+            self.flush()
+        self.flush()
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="perf-recorder",
+                              daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Writes what is left in the buffer and stops the writer thread """
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
@@ -0,0 +1,145 @@
+################################################################################
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import functools
+import sys
+import time
+from bisect import bisect_right
+
+# Upper bounds of the histogram buckets in seconds, from 16 us to 1 s by
+# powers of two. Longer calls land in the last, open ended, bucket.
+PROBE_BUCKETS = tuple(16e-6 * 2 ** i for i in range(17))
+
+class ProbeHistogram:
+    """ Histogram of probe durations over fixed buckets.
+
+    record() is a bisect over the bucket bounds and a list increment, it is
+    meant to be called from the streaming thread of the probe only.
+    """
+
+    __slots__ = ("bounds", "counts")
+
+    def __init__(self, bounds=PROBE_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    def record(self, duration):
+        self.counts[bisect_right(self.bounds, duration)] += 1
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, q):
+        """ Upper bound of the bucket holding the q-th percentile (0-100),
+        inf when it falls in the open ended bucket, None when empty.
+        """
+        total = self.count
+        if not total:
+            return None
+        rank = total * q / 100.0
+        seen = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+class ProbeTimer:
+    """ Times a pad probe callback and detects overruns.
+
+    Wraps any probe, a function or a callable such as FrameIterator:
+        tiler_sink_pad.add_probe(Gst.PadProbeType.BUFFER,
+            ProbeTimer("tiler_sink_pad_buffer_probe", perf_data)(
+                tiler_sink_pad_buffer_probe), 0)
+    or as a decorator:
+        @ProbeTimer("osd_sink_pad_buffer_probe", perf_data)
+        def osd_sink_pad_buffer_probe(pad, info, u_data):
+            ...
+
+    Every invocation is recorded in histogram and, when perf_data is given,
+    in PERF_DATA.update_probe_time(). A call lasting longer than the frame
+    interval is an overrun: the probe holds the streaming thread past the
+    arrival of the next buffer. The frame interval is frame_interval
+    seconds if given, otherwise the one of the fastest stream of perf_data,
+    refreshed every second from perf_dict. Overruns are counted and
+    reported on stderr at most once every warn_interval seconds.
+    """
+
+    def __init__(self, name, perf_data=None, frame_interval=None,
+                 warn_interval=10.0, bounds=PROBE_BUCKETS):
+        self.name = name
+        self.histogram = ProbeHistogram(bounds)
+        self.overruns = 0
+        self._perf_data = perf_data
+        self._fixed_interval = frame_interval
+        self._frame_interval = frame_interval
+        self._interval_checked = 0.0
+        self._warn_interval = warn_interval
+        self._last_warning = None
+        self._warned_overruns = 0
+
+    @property
+    def frame_interval(self):
+        return self._frame_interval
+
+    def _refresh_frame_interval(self, now):
+        self._interval_checked = now
+        fps = [fps for fps in tuple(self._perf_data.perf_dict.values())
+               if fps and fps > 0]
+        self._frame_interval = 1.0 / max(fps) if fps else None
+
+    def _warn(self, duration, now):
+        if (self._last_warning is not None
+                and now - self._last_warning < self._warn_interval):
+            return
+        sys.stderr.write("Warning: probe %s took %.2f ms, frame interval "
+                         "%.2f ms, %d overruns since last warning\n"
+                         % (self.name, duration * 1000.0,
+                            self._frame_interval * 1000.0,
+                            self.overruns - self._warned_overruns))
+        self._last_warning = now
+        self._warned_overruns = self.overruns
+
+    def record(self, duration, now):
+        """ Accounts one probe call of duration seconds ending at now """
+        self.histogram.record(duration)
+        perf_data = self._perf_data
+        if (perf_data is not None and self._fixed_interval is None
+                and now - self._interval_checked >= 1.0):
+            self._refresh_frame_interval(now)
+        overrun = self._frame_interval is not None and duration > self._frame_interval
+        if perf_data is not None:
+            perf_data.update_probe_time(self.name, duration, overrun)
+        if overrun:
+            self.overruns += 1
+            self._warn(duration, now)
+
+    def __call__(self, probe):
+        perf_counter = time.perf_counter
+
+        @functools.wraps(probe, updated=())
+        def timed_probe(pad, info, u_data):
+            start = perf_counter()
+            try:
+                return probe(pad, info, u_data)
+            finally:
+                end = perf_counter()
+                self.record(end - start, end)
+
+        timed_probe.probe_timer = self
+        return timed_probe
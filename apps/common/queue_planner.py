@@ -0,0 +1,170 @@
+################################################################################
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+""" Inserts queues in a linked pipeline to split it into streaming threads.
+
+Elements linked without queues run on the streaming thread of the
+upstream source: a Python probe on the OSD holds back the decoder, the
+inference and the encoder alike. Every queue starts a new thread at its
+src pad, so that the elements on both sides process different buffers
+at the same time.
+
+Once the pipeline is linked, before it is set to PLAYING:
+    plan = plan_queues(pipeline, probed=["onscreendisplay"])
+    insert_queues(pipeline, plan, properties={"max-size-buffers": 8})
+
+plan_queues() only looks at the links made so far, the dynamic pads of
+uridecodebin or nvurisrcbin are linked later and not planned.
+"""
+
+from collections import namedtuple
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+QUEUE_FACTORIES = ("queue", "queue2", "multiqueue")
+
+# Bounded by buffers only: the default byte and time limits of queue are
+# either too low for raw video or pointless for batched buffers.
+DEFAULT_QUEUE_PROPERTIES = {
+    "max-size-buffers": 4,
+    "max-size-bytes": 0,
+    "max-size-time": 0,
+}
+
+AFTER_DECODER = "after-decoder"
+BEFORE_ENCODER = "before-encoder"
+BEFORE_PROBED = "before-probed"
+AFTER_PROBED = "after-probed"
+TEE_BRANCH = "tee-branch"
+REQUESTED = "requested"
+
+QueueBoundary = namedtuple("QueueBoundary",
+                           ["src", "src_pad", "dst", "dst_pad", "reasons"])
+QueueBoundary.__doc__ = """ Link src:src_pad -> dst:dst_pad to split with a
+queue named "<src>-<dst>-queue", reasons lists the rules asking for it """
+
+def queue_name(boundary):
+    return "{0}-{1}-queue".format(boundary.src, boundary.dst)
+
+def _klass(element):
+    factory = element.get_factory()
+    if factory is None:
+        return ""
+    return factory.get_metadata("klass") or ""
+
+def _factory_name(element):
+    factory = element.get_factory()
+    return factory.get_name() if factory else ""
+
+def _iterate(iterator):
+    items = []
+    iterator.foreach(items.append)
+    return items
+
+def _links(pipeline):
+    """ (src element, src pad, sink element, sink pad) of every link between
+    two children of pipeline
+    """
+    children = _iterate(pipeline.iterate_elements())
+    names = {element.get_name() for element in children}
+    for element in children:
+        for src_pad in _iterate(element.iterate_src_pads()):
+            sink_pad = src_pad.get_peer()
+            if sink_pad is None:
+                continue
+            dst = sink_pad.get_parent_element()
+            if dst is None or dst.get_name() not in names:
+                continue
+            yield element, src_pad, dst, sink_pad
+
+def plan_queues(pipeline, after_decoders=True, before_encoders=True,
+                probed=(), tee_branches=True, boundaries=()):
+    """ Returns the QueueBoundary list of the links of pipeline to split.
+
+    after_decoders   after every element of class Decoder
+    before_encoders  before every element of class Encoder
+    probed           names of the elements running Python probes, split
+                     before and after each of them
+    tee_branches     at the start of every tee branch
+    boundaries       (src name, dst name) of more links to split
+    Links from or to a queue are never split again.
+    """
+    probed = set(probed)
+    requested = set(tuple(boundary) for boundary in boundaries)
+    plan = []
+    for src, src_pad, dst, sink_pad in _links(pipeline):
+        if (_factory_name(src) in QUEUE_FACTORIES
+                or _factory_name(dst) in QUEUE_FACTORIES):
+            continue
+        src_name = src.get_name()
+        dst_name = dst.get_name()
+        reasons = []
+        if after_decoders and "Decoder" in _klass(src):
+            reasons.append(AFTER_DECODER)
+        if before_encoders and "Encoder" in _klass(dst):
+            reasons.append(BEFORE_ENCODER)
+        if dst_name in probed:
+            reasons.append(BEFORE_PROBED)
+        if src_name in probed:
+            reasons.append(AFTER_PROBED)
+        if tee_branches and _factory_name(src) == "tee":
+            reasons.append(TEE_BRANCH)
+        if (src_name, dst_name) in requested:
+            reasons.append(REQUESTED)
+        if reasons:
+            plan.append(QueueBoundary(src_name, src_pad.get_name(), dst_name,
+                                      sink_pad.get_name(), tuple(reasons)))
+    return plan
+
+def insert_queue(pipeline, boundary, queue):
+    """ Relinks the link of boundary through queue, adding queue to pipeline """
+    src_pad = pipeline.get_by_name(boundary.src).get_static_pad(boundary.src_pad)
+    sink_pad = pipeline.get_by_name(boundary.dst).get_static_pad(boundary.dst_pad)
+    if src_pad is None or sink_pad is None or src_pad.get_peer() != sink_pad:
+        raise Exception("No link %s:%s -> %s:%s in the pipeline"
+                        % (boundary.src, boundary.src_pad, boundary.dst,
+                           boundary.dst_pad))
+    pipeline.add(queue)
+    src_pad.unlink(sink_pad)
+    if (src_pad.link(queue.get_static_pad("sink")) != Gst.PadLinkReturn.OK
+            or queue.get_static_pad("src").link(sink_pad) != Gst.PadLinkReturn.OK):
+        raise Exception("Unable to link %s through %s"
+                        % (queue_name(boundary), boundary.dst))
+    return queue
+
+def insert_queues(pipeline, plan, properties=None, queue_properties=None):
+    """ Inserts a queue for every boundary of plan, returns the queues.
+
+    Every queue gets DEFAULT_QUEUE_PROPERTIES updated with properties, then
+    with queue_properties[<queue name>] when given, e.g.
+    {"pgie-tracker-queue": {"leaky": 2}} to drop the oldest buffers there.
+    """
+    queues = []
+    for boundary in plan:
+        name = queue_name(boundary)
+        queue = Gst.ElementFactory.make("queue", name)
+        if not queue:
+            raise Exception("Unable to create %s" % name)
+        element_properties = dict(DEFAULT_QUEUE_PROPERTIES)
+        element_properties.update(properties or {})
+        element_properties.update((queue_properties or {}).get(name, {}))
+        for key, value in element_properties.items():
+            queue.set_property(key, value)
+        queues.append(insert_queue(pipeline, boundary, queue))
+    return queues
@@ -18,6 +18,7 @@
 ################################################################################
 
 import sys
+sys.path.append('../')
 import os
 import gi
 
@@ -25,20 +26,8 @@ gi.require_version('Gst', '1.0')
 from gi.repository import Gst, GLib
 
 import pyds
-
-def bus_call(bus, message, loop):
-    t = message.type
-    if t == Gst.MessageType.EOS:
-        print("End-of-stream")
-        loop.quit()
-    elif t == Gst.MessageType.WARNING:
-        err, debug = message.parse_warning()
-        print("Warning: %s: %s" % (err, debug))
-    elif t == Gst.MessageType.ERROR:
-        err, debug = message.parse_error()
-        sys.std.err.write("Error: %s: %s" % (err, debug))
-        loop.quit()
-    return True
+from common.meta_iter import iter_frames, iter_frame_user_meta
+from common.bus_call import bus_call
 
 def streammux_src_pad_buffer_probe(pad, info, u_data):
     gst_buffer = info.get_buffer()
@@ -52,14 +41,8 @@ def streammux_src_pad_buffer_probe(pad, info, u_data):
 
     pyds.nvds_acquire_meta_lock(batch_meta)
 
-    l_frame = batch_meta.frame_meta_list
-    while l_frame is not None:
-        try:
-            frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
-            frame_number = frame_meta.frame_num
-        except StopIteration:
-            continue
-
+    for frame_meta in iter_frames(batch_meta):
+        frame_number = frame_meta.frame_num
         user_meta = pyds.nvds_acquire_user_meta_from_pool(batch_meta)
 
         if user_meta:
@@ -78,11 +61,6 @@ def streammux_src_pad_buffer_probe(pad, info, u_data):
         else:
             print('failed to acquire user meta')
 
-        try:
-            l_frame = l_frame.next
-        except StopIteration:
-            break
-
     pyds.nvds_release_meta_lock(batch_meta)
     return Gst.PadProbeReturn.OK
 
@@ -99,35 +77,13 @@ def fakesink_sink_pad_buffer_probe(pad, info, u_data):
 
     pyds.nvds_acquire_meta_lock(batch_meta)
 
-    l_frame = batch_meta.frame_meta_list
-    while l_frame is not None:
-        try:
-            frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
-        except StopIteration:
-            continue
-
-        l_usr = frame_meta.frame_user_meta_list
-        while l_usr is not None:
-            try:
-                user_meta = pyds.NvDsUserMeta.cast(l_usr.data)
-            except StopIteration:
-                continue
-
-            if user_meta.base_meta.meta_type == pyds.NvDsMetaType.NVDS_USER_META:
-                custom_msg_meta = pyds.CustomDataStruct.cast(user_meta.user_meta_data)
-                print(f'event msg meta, otherAttrs = {pyds.get_string(custom_msg_meta.message)}')
-                print('custom meta structId:: ', custom_msg_meta.structId)
-                print('custom meta msg:: ', pyds.get_string(custom_msg_meta.message))
-                print('custom meta sampleInt:: ', custom_msg_meta.sampleInt)
-            try:
-                l_usr = l_usr.next
-            except StopIteration:
-                break
-
-        try:
-            l_frame = l_frame.next
-        except StopIteration:
-            break
+    for frame_meta in iter_frames(batch_meta):
+        for user_meta in iter_frame_user_meta(frame_meta, pyds.NvDsMetaType.NVDS_USER_META):
+            custom_msg_meta = pyds.CustomDataStruct.cast(user_meta.user_meta_data)
+            print(f'event msg meta, otherAttrs = {pyds.get_string(custom_msg_meta.message)}')
+            print('custom meta structId:: ', custom_msg_meta.structId)
+            print('custom meta msg:: ', pyds.get_string(custom_msg_meta.message))
+            print('custom meta sampleInt:: ', custom_msg_meta.sampleInt)
 
     pyds.nvds_release_meta_lock(batch_meta)
     return Gst.PadProbeReturn.OK
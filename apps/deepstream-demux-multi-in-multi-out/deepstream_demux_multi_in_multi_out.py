@@ -35,6 +35,7 @@ import platform
 from common.platform_info import PlatformInfo
 from common.bus_call import bus_call
 from common.FPS import PERF_DATA
+from common.probe_timer import ProbeTimer
 
 import pyds
 
@@ -84,6 +85,8 @@ def pgie_src_pad_buffer_probe(pad, info, u_data):
     # Note that pyds.gst_buffer_get_nvds_batch_meta() expects the
     # C address of gst_buffer as input, which is obtained with hash(gst_buffer)
     batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+    # Update frame rate of every stream in the batch through this probe
+    perf_data.update_batch(batch_meta)
     l_frame = batch_meta.frame_meta_list
     while l_frame is not None:
         try:
@@ -127,10 +130,6 @@ def pgie_src_pad_buffer_probe(pad, info, u_data):
             obj_counter[PGIE_CLASS_ID_PERSON],
         )
 
-        # Update frame rate through this probe
-        stream_index = "stream{0}".format(frame_meta.pad_index)
-        global perf_data
-        perf_data.update_fps(stream_index)
         try:
             l_frame = l_frame.next
         except StopIteration:
@@ -407,7 +406,8 @@ def main(args, requested_pgie=None, config=None, disable_probe=False):
     if not pgie_src_pad:
         sys.stderr.write(" Unable to get src pad \n")
     else:
-        pgie_src_pad.add_probe(Gst.PadProbeType.BUFFER, pgie_src_pad_buffer_probe, 0)
+        pgie_src_pad.add_probe(Gst.PadProbeType.BUFFER,
+            ProbeTimer("pgie_src_pad_buffer_probe", perf_data)(pgie_src_pad_buffer_probe), 0)
         # perf callback function to print fps every 5 sec
         GLib.timeout_add(5000, perf_data.perf_print_callback)
 
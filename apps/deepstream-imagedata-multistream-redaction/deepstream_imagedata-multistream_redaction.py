@@ -35,6 +35,7 @@ from common.platform_info import PlatformInfo
 from common.bus_call import bus_call
 
 from common.FPS import PERF_DATA
+from common.probe_timer import ProbeTimer
 import numpy as np
 import pyds
 import cv2
@@ -79,6 +80,8 @@ def tiler_sink_pad_buffer_probe(pad, info, u_data):
     # Note that pyds.gst_buffer_get_nvds_batch_meta() expects the
     # C address of gst_buffer as input, which is obtained with hash(gst_buffer)
     batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+    # Update frame rate of every stream in the batch through this probe
+    perf_data.update_batch(batch_meta)
 
     l_frame = batch_meta.frame_meta_list
     while l_frame is not None:
@@ -153,10 +156,6 @@ def tiler_sink_pad_buffer_probe(pad, info, u_data):
 
         print("Frame Number=", frame_number, "Number of Objects=", num_rects, "Face_count=",
               obj_counter[PGIE_CLASS_ID_FACE], "Person_count=", obj_counter[PGIE_CLASS_ID_PERSON])
-        # Update frame rate through this probe
-        stream_index = "stream{0}".format(frame_meta.pad_index)
-        global perf_data
-        perf_data.update_fps(stream_index)
         if save_image:
             img_path = "{}/stream_{}/frame_{}.jpg".format(folder_name, frame_meta.pad_index, frame_number)
             cv2.imwrite(img_path, frame_copy)
@@ -407,7 +406,8 @@ def main(uri_inputs):
     if not tiler_sink_pad:
         sys.stderr.write(" Unable to get sink pad \n")
     else:
-        tiler_sink_pad.add_probe(Gst.PadProbeType.BUFFER, tiler_sink_pad_buffer_probe, 0)
+        tiler_sink_pad.add_probe(Gst.PadProbeType.BUFFER,
+            ProbeTimer("tiler_sink_pad_buffer_probe", perf_data)(tiler_sink_pad_buffer_probe), 0)
         # perf callback function to print fps every 5 sec
         GLib.timeout_add(5000, perf_data.perf_print_callback)
 
@@ -33,6 +33,8 @@ import platform
 from common.platform_info import PlatformInfo
 from common.bus_call import bus_call
 from common.FPS import PERF_DATA
+from common.probe_timer import ProbeTimer
+from common.async_probe import AsyncProbe
 import numpy as np
 import pyds
 import cv2
@@ -41,6 +43,7 @@ import os.path
 from os import path
 
 perf_data = None
+frame_writer = None
 frame_count = {}
 saved_count = {}
 global PGIE_CLASS_ID_VEHICLE
@@ -78,6 +81,8 @@ def tiler_sink_pad_buffer_probe(pad, info, u_data):
     # Note that pyds.gst_buffer_get_nvds_batch_meta() expects the
     # C address of gst_buffer as input, which is obtained with hash(gst_buffer)
     batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+    # Update frame rate of every stream in the batch through this probe
+    perf_data.update_batch(batch_meta)
 
     l_frame = batch_meta.frame_meta_list
     while l_frame is not None:
@@ -136,15 +141,14 @@ def tiler_sink_pad_buffer_probe(pad, info, u_data):
             except StopIteration:
                 break
 
-        print("Frame Number=", frame_number, "Number of Objects=", num_rects, "Vehicle_count=",
-              obj_counter[PGIE_CLASS_ID_VEHICLE], "Person_count=", obj_counter[PGIE_CLASS_ID_PERSON])
-        # update frame rate through this probe
-        stream_index = "stream{0}".format(frame_meta.pad_index)
-        global perf_data
-        perf_data.update_fps(stream_index)
+        # Printing and writing the image are done by the frame_writer threads,
+        # frame_copy is a copy so it stays valid once the probe returned.
+        img_path = None
         if save_image:
             img_path = "{}/stream_{}/frame_{}.jpg".format(folder_name, frame_meta.pad_index, frame_number)
-            cv2.imwrite(img_path, frame_copy)
+        frame_writer.submit((frame_number, num_rects, obj_counter[PGIE_CLASS_ID_VEHICLE],
+                             obj_counter[PGIE_CLASS_ID_PERSON], img_path,
+                             frame_copy if save_image else None))
         saved_count["stream_{}".format(frame_meta.pad_index)] += 1
         try:
             l_frame = l_frame.next
@@ -154,6 +158,14 @@ def tiler_sink_pad_buffer_probe(pad, info, u_data):
     return Gst.PadProbeReturn.OK
 
 
+def write_frame(record):
+    frame_number, num_rects, vehicle_count, person_count, img_path, frame_copy = record
+    print("Frame Number=", frame_number, "Number of Objects=", num_rects, "Vehicle_count=",
+          vehicle_count, "Person_count=", person_count)
+    if img_path:
+        cv2.imwrite(img_path, frame_copy)
+
+
 def draw_bounding_boxes(image, obj_meta, confidence):
     confidence = '{0:.2f}'.format(confidence)
     rect_params = obj_meta.rect_params
@@ -269,6 +281,10 @@ def main(args):
 
     global perf_data
     perf_data = PERF_DATA(len(args) - 2)
+    global frame_writer
+    # drop-newest: frames queued for saving are never replaced
+    frame_writer = AsyncProbe(write_frame, max_queue=128, drop_policy="drop-newest")
+    frame_writer.start()
     number_sources = len(args) - 2
 
     global folder_name
@@ -433,7 +449,8 @@ def main(args):
     if not tiler_sink_pad:
         sys.stderr.write(" Unable to get src pad \n")
     else:
-        tiler_sink_pad.add_probe(Gst.PadProbeType.BUFFER, tiler_sink_pad_buffer_probe, 0)
+        tiler_sink_pad.add_probe(Gst.PadProbeType.BUFFER,
+            ProbeTimer("tiler_sink_pad_buffer_probe", perf_data)(tiler_sink_pad_buffer_probe), 0)
         # perf callback function to print fps every 5 sec
         GLib.timeout_add(5000, perf_data.perf_print_callback)
 
@@ -453,6 +470,9 @@ def main(args):
     # cleanup
     print("Exiting app\n")
     pipeline.set_state(Gst.State.NULL)
+    frame_writer.stop()
+    if frame_writer.stats["dropped"]:
+        print("Frame reports dropped: ", frame_writer.stats["dropped"])
 
 
 if __name__ == '__main__':
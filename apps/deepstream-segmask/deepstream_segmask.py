@@ -66,7 +66,8 @@ def tiler_sink_pad_buffer_probe(pad, info, u_data):
     # Note that pyds.gst_buffer_get_nvds_batch_meta() expects the
     # C address of gst_buffer as input, which is obtained with hash(gst_buffer)
     batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
-
+    # Update frame rate of every stream in the batch through this probe
+    perf_data.update_batch(batch_meta)
     l_frame = batch_meta.frame_meta_list
     while l_frame is not None:
         try:
@@ -105,10 +106,6 @@ def tiler_sink_pad_buffer_probe(pad, info, u_data):
                 break
 
         print("Frame Number=", frame_number, "Number of Objects=", num_rects)
-        # update frame rate through this probe
-        stream_index = "stream{0}".format(frame_meta.pad_index)
-        global perf_data
-        perf_data.update_fps(stream_index)
         try:
             l_frame = l_frame.next
         except StopIteration:
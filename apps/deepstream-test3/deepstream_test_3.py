@@ -82,6 +82,8 @@ def pgie_src_pad_buffer_probe(pad,info,u_data):
             print("Unable to get number of sources in GstBuffer for latency measurement")
 
     batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+    # Update frame rate of every stream in the batch through this probe
+    perf_data.update_batch(batch_meta)
     l_frame = batch_meta.frame_meta_list
     while l_frame is not None:
         try:
@@ -117,11 +119,6 @@ def pgie_src_pad_buffer_probe(pad,info,u_data):
         if not silent:
             print("Frame Number=", frame_number, "Number of Objects=",num_rects,"Vehicle_count=",obj_counter[PGIE_CLASS_ID_VEHICLE],"Person_count=",obj_counter[PGIE_CLASS_ID_PERSON])
 
-        # Update frame rate through this probe
-        stream_index = "stream{0}".format(frame_meta.pad_index)
-        global perf_data
-        perf_data.update_fps(stream_index)
-
         try:
             l_frame=l_frame.next
         except StopIteration:
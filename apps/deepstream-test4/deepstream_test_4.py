@@ -29,6 +29,7 @@ from optparse import OptionParser
 from common.platform_info import PlatformInfo
 from common.bus_call import bus_call
 from common.utils import long_to_uint64
+from common.meta_iter import iter_frames, iter_objects
 import pyds
 
 MAX_DISPLAY_LEN = 64
@@ -133,17 +134,7 @@ def osd_sink_pad_buffer_probe(pad, info, u_data):
     batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
     if not batch_meta:
         return Gst.PadProbeReturn.OK
-    l_frame = batch_meta.frame_meta_list
-    while l_frame is not None:
-        try:
-            # Note that l_frame.data needs a cast to pyds.NvDsFrameMeta
-            # The casting is done by pyds.NvDsFrameMeta.cast()
-            # The casting also keeps ownership of the underlying memory
-            # in the C code, so the Python garbage collector will leave
-            # it alone.
-            frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
-        except StopIteration:
-            continue
+    for frame_meta in iter_frames(batch_meta):
         is_first_object = True
 
         # Short example of attribute access for frame_meta:
@@ -155,13 +146,7 @@ def osd_sink_pad_buffer_probe(pad, info, u_data):
         # print("Num object meta ", frame_meta.num_obj_meta)
 
         frame_number = frame_meta.frame_num
-        l_obj = frame_meta.obj_meta_list
-        while l_obj is not None:
-            try:
-                obj_meta = pyds.NvDsObjectMeta.cast(l_obj.data)
-            except StopIteration:
-                continue
-
+        for obj_meta in iter_objects(frame_meta):
             # Update the object text display
             txt_params = obj_meta.text_params
 
@@ -214,14 +199,6 @@ def osd_sink_pad_buffer_probe(pad, info, u_data):
                     print("Error in attaching event meta to buffer\n")
 
                 is_first_object = False
-            try:
-                l_obj = l_obj.next
-            except StopIteration:
-                break
-        try:
-            l_frame = l_frame.next
-        except StopIteration:
-            break
 
     print("Frame Number =", frame_number, "Vehicle Count =",
           obj_counter[PGIE_CLASS_ID_VEHICLE], "Person Count =",
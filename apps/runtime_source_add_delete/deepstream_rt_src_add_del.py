@@ -31,6 +31,10 @@ import math
 import random
 import platform
 from common.platform_info import PlatformInfo
+from common.bus_call import BusDispatcher
+from common.qos import QosAggregator
+from common.FPS import PERF_DATA
+from common.probe_timer import ProbeTimer
 
 import pyds
 
@@ -62,7 +66,10 @@ CONFIG_GROUP_TRACKER_LL_LIB_FILE = "ll-lib-file"
 
 g_num_sources = 0
 g_source_id_list = [0] * MAX_NUM_SOURCES
-g_eos_list = [False] * MAX_NUM_SOURCES
+# EOS and error state of every source, the loop is set by main()
+bus_dispatcher = BusDispatcher()
+# Dropped frames of the sinks and decoders, printed with the FPS
+qos = QosAggregator()
 g_source_enabled = [False] * MAX_NUM_SOURCES
 g_source_bin_list = [None] * MAX_NUM_SOURCES
 
@@ -70,6 +77,7 @@ pgie_classes_str= ["Vehicle", "TwoWheeler", "Person","RoadSign"]
 
 uri = ""
 
+perf_data = None
 loop = None
 pipeline = None
 streammux = None
@@ -82,6 +90,19 @@ nvosd = None
 tiler = None
 tracker = None
 
+# tiler_sink_pad_buffer_probe counts the frames of every source, sources
+# added at runtime are registered in perf_data on their first frame.
+def tiler_sink_pad_buffer_probe(pad,info,u_data):
+    gst_buffer = info.get_buffer()
+    if not gst_buffer:
+        print("Unable to get GstBuffer ")
+        return
+
+    batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+    perf_data.update_batch(batch_meta)
+
+    return Gst.PadProbeReturn.OK
+
 def decodebin_child_added(child_proxy,Object,name,user_data):
     print("Decodebin child added:", name, "\n")
     if(name.find("decodebin") != -1):
@@ -144,6 +165,8 @@ def create_uridecode_bin(index,filename):
 
     #Set status of the source to enabled
     g_source_enabled[index] = True
+    # Errors of the uridecodebin and its children are recorded on the source
+    bus_dispatcher.register_source(index, bin_name)
 
     return bin
 
@@ -169,6 +192,9 @@ def stop_release_source(source_id):
         print("STATE CHANGE SUCCESS\n")
         #Remove the source bin from the pipeline
         pipeline.remove(g_source_bin_list[source_id])
+        perf_data.remove_stream("stream{0}".format(source_id))
+        qos.forget_source(source_id)
+        bus_dispatcher.clear_source(source_id)
         source_id -= 1
         g_num_sources -= 1
 
@@ -184,6 +210,9 @@ def stop_release_source(source_id):
         streammux.release_request_pad(sinkpad)
         print("STATE CHANGE ASYNC\n")
         pipeline.remove(g_source_bin_list[source_id])
+        perf_data.remove_stream("stream{0}".format(source_id))
+        qos.forget_source(source_id)
+        bus_dispatcher.clear_source(source_id)
         source_id -= 1
         g_num_sources -= 1
 
@@ -191,12 +220,11 @@ def stop_release_source(source_id):
 def delete_sources(data):
     global loop
     global g_num_sources
-    global g_eos_list
     global g_source_enabled
 
     #First delete sources that have reached end of stream
     for source_id in range(MAX_NUM_SOURCES):
-        if (g_eos_list[source_id] and g_source_enabled[source_id]):
+        if (bus_dispatcher.is_stream_eos(source_id) and g_source_enabled[source_id]):
             g_source_enabled[source_id] = False
             stop_release_source(source_id)
 
@@ -252,6 +280,7 @@ def add_sources(data):
     
     #Add source bin to our list and to pipeline
     g_source_bin_list[source_id] = source_bin
+    perf_data.add_stream("stream{0}".format(source_id))
     pipeline.add(source_bin)
 
     #Set state of source bin to playing
@@ -280,30 +309,6 @@ def add_sources(data):
     
     return True
 
-def bus_call(bus, message, loop):
-    global g_eos_list
-    t = message.type
-    if t == Gst.MessageType.EOS:
-        sys.stdout.write("End-of-stream\n")
-        loop.quit()
-    elif t==Gst.MessageType.WARNING:
-        err, debug = message.parse_warning()
-        sys.stderr.write("Warning: %s: %s\n" % (err, debug))
-    elif t == Gst.MessageType.ERROR:
-        err, debug = message.parse_error()
-        sys.stderr.write("Error: %s: %s\n" % (err, debug))
-        loop.quit()
-    elif t == Gst.MessageType.ELEMENT:
-        struct = message.get_structure()
-        #Check for stream-eos message
-        if struct is not None and struct.has_name("stream-eos"):
-            parsed, stream_id = struct.get_uint("stream-id")
-            if parsed:
-                #Set eos status of stream to True, to be deleted in delete-sources
-                print("Got EOS from stream %d" % stream_id)
-                g_eos_list[stream_id] = True
-    return True
-
 def main(args):
     global g_num_sources
     global g_source_bin_list
@@ -327,6 +332,9 @@ def main(args):
 
     num_sources=len(args)-1
 
+    global perf_data
+    perf_data = PERF_DATA(num_sources)
+
     global platform_info
     platform_info = PlatformInfo()
     # Standard GStreamer initialization
@@ -508,11 +516,22 @@ def main(args):
     sink.set_property("sync", 0)
     sink.set_property("qos",0)
 
+    tiler_sink_pad=tiler.get_static_pad("sink")
+    if not tiler_sink_pad:
+        sys.stderr.write(" Unable to get sink pad of tiler \n")
+    else:
+        tiler_sink_pad.add_probe(Gst.PadProbeType.BUFFER,
+            ProbeTimer("tiler_sink_pad_buffer_probe", perf_data)(tiler_sink_pad_buffer_probe), 0)
+        # perf callback function to print fps every 5 sec
+        GLib.timeout_add(5000, perf_data.perf_print_callback)
+
     # create an event loop and feed gstreamer bus mesages to it
     loop = GLib.MainLoop()
     bus = pipeline.get_bus()
-    bus.add_signal_watch()
-    bus.connect ("message", bus_call, loop)
+    bus_dispatcher.loop = loop
+    qos.attach(bus_dispatcher)
+    perf_data.qos = qos
+    bus_dispatcher.attach(bus)
 
     pipeline.set_state(Gst.State.PAUSED)
 
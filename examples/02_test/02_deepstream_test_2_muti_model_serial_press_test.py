@@ -13,6 +13,7 @@ import gi
 gi.require_version('Gst', '1.0')
 from gi.repository import GLib, Gst
 from common.bus_call import bus_call
+from common.FPS import PERF_DATA
 import pyds
 
 MODEL1_CLASSES = {0: 'excavator', 1: 'pile_driver', 2: 'vehicle', 3: 'material'}
@@ -25,41 +26,16 @@ MODEL3_CLASSES = {
 MUXER_BATCH_TIMEOUT_USEC = 33000
 OUTPUT_VIDEO_PATH = "/workspace/3models_serial_output.mp4"
 
-class FPSCalculator:
-    def __init__(self):
-        self.frame_timestamps = []
-        self.fps = 0.0
-        self.frame_count = 0
-        self.start_time = None
-        
-    def update(self):
-        if self.start_time is None:
-            self.start_time = time.time()
-        self.frame_count += 1
-        current_time = time.time()
-        self.frame_timestamps.append(current_time)
-        if len(self.frame_timestamps) > 30:
-            self.frame_timestamps.pop(0)
-        if len(self.frame_timestamps) >= 2:
-            time_diff = self.frame_timestamps[-1] - self.frame_timestamps[0]
-            if time_diff > 0:
-                self.fps = (len(self.frame_timestamps) - 1) / time_diff
-        return self.fps
-    
-    def get_average_fps(self):
-        if self.start_time and self.frame_count > 0:
-            return self.frame_count / (time.time() - self.start_time)
-        return 0.0
-
-fps_calculator = FPSCalculator()
+perf_data = PERF_DATA(1)
 
 def osd_sink_pad_buffer_probe(pad, info, u_data):
     gst_buffer = info.get_buffer()
     if not gst_buffer:
         return Gst.PadProbeReturn.OK
 
-    current_fps = fps_calculator.update()
     batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+    perf_data.update_batch(batch_meta)
+    current_fps = perf_data.get_rolling_fps()
     l_frame = batch_meta.frame_meta_list
     
     while l_frame is not None:
@@ -407,12 +383,12 @@ def main(args):
     
     pipeline.set_state(Gst.State.NULL)
     total_time = time.time() - start_time
-    avg_fps = fps_calculator.get_average_fps()
+    avg_fps = perf_data.get_average_fps()
     
     print("\n" + "="*80)
     print("SERIAL Results:")
     print(f"   Total time: {total_time:.2f}s")
-    print(f"   Total frames: {fps_calculator.frame_count}")
+    print(f"   Total frames: {perf_data.total_frames}")
     print(f"   Average FPS: {avg_fps:.2f}")
     if os.path.exists(OUTPUT_VIDEO_PATH):
         file_size = os.path.getsize(OUTPUT_VIDEO_PATH) / (1024*1024)
@@ -15,7 +15,8 @@ import gi
 gi.require_version('Gst', '1.0')
 gi.require_version('GstRtspServer', '1.0')
 from gi.repository import GLib, Gst, GstRtspServer
-from common.bus_call import bus_call
+from common.bus_call import STREAM_EOS, BusDispatcher
+from common.FPS import PERF_DATA
 import pyds
 
 UNTRACKED_OBJECT_ID = 0xFFFFFFFFFFFFFFFF
@@ -48,33 +49,9 @@ def load_config(config_file="models_config_rtsp_in_rtsp_out.yaml"):
     sys.exit(1)
 
 # ==================== FPS 计算器 ====================
-class FPSCalculator:
-    def __init__(self):
-        self.frame_timestamps = []
-        self.fps = 0.0
-        self.frame_count = 0
-        self.start_time = None
-        
-    def update(self):
-        if self.start_time is None:
-            self.start_time = time.time()
-        self.frame_count += 1
-        current_time = time.time()
-        self.frame_timestamps.append(current_time)
-        if len(self.frame_timestamps) > 30:
-            self.frame_timestamps.pop(0)
-        if len(self.frame_timestamps) >= 2:
-            time_diff = self.frame_timestamps[-1] - self.frame_timestamps[0]
-            if time_diff > 0:
-                self.fps = (len(self.frame_timestamps) - 1) / time_diff
-        return self.fps
-    
-    def get_average_fps(self):
-        if self.start_time and self.frame_count > 0:
-            return self.frame_count / (time.time() - self.start_time)
-        return 0.0
-
-fps_calculator = FPSCalculator()
+# 流在第一批数据到达时自动注册
+perf_data = PERF_DATA(0)
+batch_count = 0
 
 # ==================== Probe 0: Streammux 调试 ====================
 def streammux_src_probe(pad, info, u_data):
@@ -115,14 +92,16 @@ def streammux_src_probe(pad, info, u_data):
 # ==================== Probe 1: 收集统计 ====================
 def pre_tiler_probe(pad, info, u_data):
     """收集统计信息，设置边框和标签"""
-    global stream_stats, active_streams
+    global stream_stats, active_streams, batch_count
     
     gst_buffer = info.get_buffer()
     if not gst_buffer:
         return Gst.PadProbeReturn.OK
 
-    current_fps = fps_calculator.update()
     batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+    perf_data.update_batch(batch_meta)
+    current_fps = perf_data.get_rolling_fps()
+    batch_count += 1
     
     stream_stats = {}
     current_active = set()
@@ -206,11 +185,11 @@ def pre_tiler_probe(pad, info, u_data):
     
     active_streams = current_active
     
-    if fps_calculator.frame_count % 30 == 0 and stream_stats:
+    if batch_count % 30 == 0 and stream_stats:
         num_active = len(active_streams)
         num_ended = len(stream_ended)
         
-        print(f"\n[Overall] FPS: {current_fps:5.1f} | Active: {num_active} | Ended: {num_ended} | Frames: {fps_calculator.frame_count}")
+        print(f"\n[Overall] FPS: {current_fps:5.1f} | Active: {num_active} | Ended: {num_ended} | Frames: {perf_data.total_frames}")
         
         for sid in sorted(stream_stats.keys()):
             stats = stream_stats[sid]
@@ -461,46 +440,26 @@ def create_source_bin(index, uri):
     return nbin
 
 # ==================== Bus Call ====================
-def custom_bus_call(bus, message, loop, total_sources):
-    """处理总线消息（带详细调试）"""
-    global stream_ended
-    
-    t = message.type
-    
-    if t == Gst.MessageType.EOS:
-        print("\n[INFO] ✅ Pipeline received EOS")
-        loop.quit()
-        
-    elif t == Gst.MessageType.WARNING:
-        err, debug = message.parse_warning()
-        err_str = str(err)
-        if "QoS" not in err_str and "upstream" not in err_str:
-            sys.stderr.write(f"⚠️  Warning from {message.src.get_name()}: {err}\n")
-        
-    elif t == Gst.MessageType.ERROR:
-        err, debug = message.parse_error()
-        sys.stderr.write(f"❌ Error from {message.src.get_name()}: {err}\n")
-        sys.stderr.write(f"   Debug: {debug}\n")
-        loop.quit()
-    
-    elif t == Gst.MessageType.ELEMENT:
-        struct = message.get_structure()
-        if struct and struct.get_name() == "stream-eos":
-            try:
-                if struct.has_field("source-id"):
-                    source_id = struct.get_value("source-id")
-                    stream_ended.add(source_id)
-                    print(f"✅ Stream-{source_id} ended ({len(stream_ended)}/{total_sources})")
-            except Exception as e:
-                pass
-    
-    elif t == Gst.MessageType.STATE_CHANGED:
+def make_bus_dispatcher(loop, total_sources):
+    """总线消息处理：EOS / 错误 / 限频警告由 BusDispatcher 处理"""
+    # QoS / upstream 警告过于频繁，不打印
+    dispatcher = BusDispatcher(loop, ignored_warnings=("QoS", "upstream"))
+
+    def on_stream_eos(dispatcher, message, structure):
+        # BusDispatcher 已解析 stream-id / source-id
+        stream_ended.update(source_id for source_id, state in dispatcher.sources.items()
+                            if state.eos)
+        print(f"✅ Streams ended ({len(stream_ended)}/{total_sources})")
+
+    def on_state_changed(dispatcher, message):
         if message.src.get_name().startswith("rtsp-source"):
             old, new, pending = message.parse_state_changed()
             if new == Gst.State.PLAYING:
                 print(f"🔄 {message.src.get_name()}: {old.value_nick} → {new.value_nick}")
-    
-    return True
+
+    dispatcher.add_element_handler(STREAM_EOS, on_stream_eos)
+    dispatcher.add_handler(Gst.MessageType.STATE_CHANGED, on_state_changed)
+    return dispatcher
 
 # ==================== 主函数 ====================
 def main(args):
@@ -831,8 +790,7 @@ def main(args):
     # ==================== 运行 ====================
     loop = GLib.MainLoop()
     bus = pipeline.get_bus()
-    bus.add_signal_watch()
-    bus.connect("message", custom_bus_call, loop, num_sources)
+    make_bus_dispatcher(loop, num_sources).attach(bus)
     
     print("🚀 Starting pipeline...")
     print("="*80 + "\n")
@@ -851,10 +809,10 @@ def main(args):
     
     pipeline.set_state(Gst.State.NULL)
     total_time = time.time() - start_time
-    avg_fps = fps_calculator.get_average_fps()
+    avg_fps = perf_data.get_average_fps()
     
     print("\n" + "="*80)
-    print(f"✅ Completed: {total_time:.2f}s | {fps_calculator.frame_count} frames | {avg_fps:.2f} FPS")
+    print(f"✅ Completed: {total_time:.2f}s | {perf_data.total_frames} frames | {avg_fps:.2f} FPS")
     print(f"📊 Streams ended: {len(stream_ended)}/{num_sources}")
     print(f"📊 Debug frame count: {debug_frame_count}")
     print("="*80 + "\n")
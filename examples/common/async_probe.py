@@ -0,0 +1,231 @@
+################################################################################
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import queue
+import sys
+import traceback
+from threading import Lock, Thread
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+import numpy as np
+
+DROP_OLDEST = "drop-oldest"
+DROP_NEWEST = "drop-newest"
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+# Records built by snapshot_batch()
+FRAME_RECORD_DTYPE = np.dtype([
+    ("source_id", np.uint32),
+    ("pad_index", np.uint32),
+    ("batch_id", np.uint32),
+    ("frame_num", np.int32),
+    ("buf_pts", np.uint64),
+    ("ntp_timestamp", np.uint64),
+    ("num_obj_meta", np.uint32),
+])
+OBJECT_RECORD_DTYPE = np.dtype([
+    ("source_id", np.uint32),
+    ("frame_num", np.int32),
+    ("class_id", np.int32),
+    ("unique_component_id", np.int32),
+    ("object_id", np.uint64),
+    ("confidence", np.float32),
+    ("bbox", np.float32, (4,)),  # left, top, width, height
+])
+
+_STOP = object()
+
+def snapshot_batch(batch_meta, gst_buffer=None):
+    """ Copies the frame and object metadata of a batch into NumPy records.
+
+    Returns {"frames": FRAME_RECORD_DTYPE array,
+             "objects": OBJECT_RECORD_DTYPE array}
+    which no longer reference the GstBuffer and can be used from any
+    thread once the probe returned.
+    """
+    import pyds
+
+    frame_rows = []
+    object_rows = []
+    l_frame = batch_meta.frame_meta_list
+    while l_frame is not None:
+        try:
+            frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
+        except StopIteration:
+            break
+        source_id = frame_meta.source_id
+        frame_num = frame_meta.frame_num
+        frame_rows.append((source_id, frame_meta.pad_index,
+                           frame_meta.batch_id, frame_num, frame_meta.buf_pts,
+                           frame_meta.ntp_timestamp, frame_meta.num_obj_meta))
+        l_obj = frame_meta.obj_meta_list
+        while l_obj is not None:
+            try:
+                obj_meta = pyds.NvDsObjectMeta.cast(l_obj.data)
+            except StopIteration:
+                break
+            rect = obj_meta.rect_params
+            object_rows.append((source_id, frame_num, obj_meta.class_id,
+                                obj_meta.unique_component_id,
+                                obj_meta.object_id, obj_meta.confidence,
+                                (rect.left, rect.top, rect.width,
+                                 rect.height)))
+            try:
+                l_obj = l_obj.next
+            except StopIteration:
+                break
+        try:
+            l_frame = l_frame.next
+        except StopIteration:
+            break
+    return {
+        "frames": np.array(frame_rows, dtype=FRAME_RECORD_DTYPE),
+        "objects": np.array(object_rows, dtype=OBJECT_RECORD_DTYPE),
+    }
+
+class AsyncProbe:
+    """ Moves the work of a pad probe off the streaming thread.
+
+    The probe only copies what it needs out of the batch, through
+    snapshot(batch_meta, gst_buffer), and queues the record. Worker threads
+    call consumer(record) and the probe returns Gst.PadProbeReturn.OK right
+    away, so analytics, printing and file I/O no longer hold the buffer.
+    The queue holds at most max_queue records, when it is full drop_policy
+    decides which one is lost:
+      drop-oldest  the oldest queued record, the consumer sees recent data
+      drop-newest  the record being submitted
+    stats counts the submitted, processed, dropped and failed records.
+    Records submitted from stop() until the next start() are dropped.
+
+    Usage as the probe itself:
+        async_probe = AsyncProbe(consumer)
+        async_probe.start()
+        pad.add_probe(Gst.PadProbeType.BUFFER, async_probe, 0)
+    or from an existing probe, e.g. the fun_post_process of a
+    FrameIterator or a hand-written probe:
+        async_probe.submit(record)
+    """
+
+    def __init__(self, consumer, snapshot=snapshot_batch, max_queue=64,
+                 num_workers=1, drop_policy=DROP_OLDEST, name="async-probe"):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError("Unknown drop policy {0}, expected one of {1}"
+                             .format(drop_policy, DROP_POLICIES))
+        self._consumer = consumer
+        self._snapshot = snapshot
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._num_workers = num_workers
+        self._drop_policy = drop_policy
+        self._name = name
+        self._workers = []
+        self._stopping = False
+        self._stats_mutex = Lock()
+        self.stats = {
+            "submitted": 0,
+            "processed": 0,
+            "dropped": 0,
+            "errors": 0,
+        }
+
+    def _count(self, key):
+        with self._stats_mutex:
+            self.stats[key] += 1
+
+    def submit(self, record):
+        """ Queues record without blocking, returns False if it was dropped """
+        self._count("submitted")
+        while True:
+            if self._stopping:
+                self._count("dropped")
+                return False
+            try:
+                self._queue.put_nowait(record)
+                return True
+            except queue.Full:
+                if self._drop_policy == DROP_NEWEST:
+                    self._count("dropped")
+                    return False
+            try:
+                dropped = self._queue.get_nowait()
+            except queue.Empty:
+                # A worker emptied the queue meanwhile, try again
+                continue
+            self._queue.task_done()
+            if dropped is _STOP:
+                # stop() started after the check above, its markers must
+                # all reach the workers: the record is lost instead
+                self._queue.put(_STOP)
+                self._count("dropped")
+                return False
+            self._count("dropped")
+
+    def __call__(self, pad, info, u_data):
+        gst_buffer = info.get_buffer()
+        if not gst_buffer:
+            print("Unable to get GstBuffer ")
+            return Gst.PadProbeReturn.OK
+
+        import pyds
+
+        batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+        self.submit(self._snapshot(batch_meta, gst_buffer))
+        return Gst.PadProbeReturn.OK
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            try:
+                if record is _STOP:
+                    return
+                self._consumer(record)
+                self._count("processed")
+            except Exception:
+                self._count("errors")
+                sys.stderr.write("%s: consumer failed\n%s"
+                                 % (self._name, traceback.format_exc()))
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        if self._workers:
+            return
+        self._stopping = False
+        for i in range(self._num_workers):
+            worker = Thread(target=self._run, name="{0}-{1}".format(self._name, i),
+                            daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def join(self):
+        """ Waits until every queued record has been consumed """
+        self._queue.join()
+
+    def stop(self):
+        """ Consumes what is left in the queue and stops the workers """
+        if not self._workers:
+            return
+        # submit() drops the records from now on, and puts back a marker it
+        # would evict while they are queued
+        self._stopping = True
+        for _ in self._workers:
+            # Blocking put, the stop markers must not be dropped
+            self._queue.put(_STOP)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
@@ -0,0 +1,152 @@
+################################################################################
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+""" Generators walking the NvDs metadata lists.
+
+They replace the hand-written loop
+    l_frame = batch_meta.frame_meta_list
+    while l_frame is not None:
+        try:
+            frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
+        except StopIteration:
+            break
+        ...
+        try:
+            l_frame = l_frame.next
+        except StopIteration:
+            break
+with
+    for frame_meta in iter_frames(batch_meta):
+        ...
+A StopIteration raised by the bindings ends the walk, the list is never
+walked again from the same node.
+
+The per frame cost over the hand-written loop is the call to iter_objects(),
+empty lists return () without creating a generator.
+"""
+
+import pyds
+
+def _walk(l_item, cast):
+    # One try around the loop keeps the per item work to the cast and the
+    # next, as few bytecodes as the hand-written loop.
+    try:
+        while l_item is not None:
+            # The casting also keeps ownership of the underlying memory
+            # in the C code, so the Python garbage collector will leave
+            # it alone.
+            yield cast(l_item.data)
+            l_item = l_item.next
+    except StopIteration:
+        return
+
+def _iter_list(l_item, cast):
+    # Empty lists are the common case (frames without objects, objects
+    # without user meta), they skip the creation of a generator.
+    if l_item is None:
+        return ()
+    return _walk(l_item, cast)
+
+# The filters are generator functions of their own: a generator expression
+# would turn the arguments of the iter_ functions into closure cells, made
+# on every call even when the list is empty.
+
+def _filter_objects(objects, class_ids, unique_component_id):
+    for obj_meta in objects:
+        if ((class_ids is None or obj_meta.class_id in class_ids)
+                and (unique_component_id is None
+                     or obj_meta.unique_component_id == unique_component_id)):
+            yield obj_meta
+
+def _filter_user_meta(user_metas, meta_type):
+    for user_meta in user_metas:
+        if user_meta.base_meta.meta_type == meta_type:
+            yield user_meta
+
+def _filter_classifiers(classifiers, unique_component_id):
+    for classifier_meta in classifiers:
+        if classifier_meta.unique_component_id == unique_component_id:
+            yield classifier_meta
+
+def _iter_user_meta(l_user, meta_type):
+    user_metas = _iter_list(l_user, pyds.NvDsUserMeta.cast)
+    if meta_type is None:
+        return user_metas
+    return _filter_user_meta(user_metas, meta_type)
+
+def iter_frames(batch_meta):
+    """ NvDsFrameMeta of every frame in the batch, as a list: a batch holds
+    at most batch-size frames and iterating a list costs less per frame than
+    resuming a generator.
+    """
+    frames = []
+    l_frame = batch_meta.frame_meta_list
+    cast = pyds.NvDsFrameMeta.cast
+    try:
+        while l_frame is not None:
+            frames.append(cast(l_frame.data))
+            l_frame = l_frame.next
+    except StopIteration:
+        pass
+    return frames
+
+def iter_objects(frame_meta, class_ids=None, unique_component_id=None):
+    """ NvDsObjectMeta of the frame, optionally only those whose class_id is
+    in class_ids and / or coming from the inference component
+    unique_component_id.
+    """
+    l_obj = frame_meta.obj_meta_list
+    if l_obj is None:
+        return ()
+    objects = _walk(l_obj, pyds.NvDsObjectMeta.cast)
+    if class_ids is None and unique_component_id is None:
+        return objects
+    if class_ids is not None:
+        class_ids = frozenset(class_ids)
+    return _filter_objects(objects, class_ids, unique_component_id)
+
+def iter_batch_objects(batch_meta, class_ids=None, unique_component_id=None):
+    """ (frame_meta, obj_meta) of every object in the batch """
+    for frame_meta in iter_frames(batch_meta):
+        for obj_meta in iter_objects(frame_meta, class_ids, unique_component_id):
+            yield frame_meta, obj_meta
+
+def iter_batch_user_meta(batch_meta, meta_type=None):
+    """ NvDsUserMeta attached to the batch, only those of meta_type if given """
+    return _iter_user_meta(batch_meta.batch_user_meta_list, meta_type)
+
+def iter_frame_user_meta(frame_meta, meta_type=None):
+    """ NvDsUserMeta attached to the frame, only those of meta_type if given """
+    return _iter_user_meta(frame_meta.frame_user_meta_list, meta_type)
+
+def iter_obj_user_meta(obj_meta, meta_type=None):
+    """ NvDsUserMeta attached to the object, only those of meta_type if given """
+    return _iter_user_meta(obj_meta.obj_user_meta_list, meta_type)
+
+def iter_classifier_meta(obj_meta, unique_component_id=None):
+    """ NvDsClassifierMeta of the object, optionally only those of the
+    classifier unique_component_id.
+    """
+    classifiers = _iter_list(obj_meta.classifier_meta_list,
+                             pyds.NvDsClassifierMeta.cast)
+    if unique_component_id is None:
+        return classifiers
+    return _filter_classifiers(classifiers, unique_component_id)
+
+def iter_label_info(classifier_meta):
+    """ NvDsLabelInfo of a classifier meta """
+    return _iter_list(classifier_meta.label_info_list, pyds.NvDsLabelInfo.cast)
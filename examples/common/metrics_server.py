@@ -0,0 +1,201 @@
+################################################################################
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+METRICS_PREFIX = "deepstream"
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+def _sample(name, labels, value):
+    label_str = ",".join('{0}="{1}"'.format(key, _escape_label(val))
+                         for key, val in labels)
+    return "{0}{{{1}}} {2}".format(name, label_str, repr(float(value)))
+
+def _qos_labels(element, data):
+    labels = [("element", element)]
+    if data["source_id"] is not None:
+        labels.append(("source", data["source_id"]))
+    return labels
+
+def format_openmetrics(snapshot, prefix=METRICS_PREFIX):
+    """ Renders a PERF_DATA.snapshot() in the OpenMetrics text format """
+    streams = snapshot["streams"]
+    probes = snapshot["probes"]
+    qos = snapshot.get("qos", {})
+    lines = []
+
+    def family(name, metric_type, help_text):
+        lines.append("# TYPE {0}_{1} {2}".format(prefix, name, metric_type))
+        lines.append("# HELP {0}_{1} {2}".format(prefix, name, help_text))
+        return "{0}_{1}".format(prefix, name)
+
+    name = family("stream_fps", "gauge",
+                  "Frames per second over the last perf interval.")
+    for stream, data in streams.items():
+        if data["fps"] is not None:
+            lines.append(_sample(name, [("stream", stream)], data["fps"]))
+
+    name = family("stream_frames", "counter", "Frames processed.")
+    for stream, data in streams.items():
+        lines.append(_sample(name + "_total", [("stream", stream)],
+                             data["frames"]))
+
+    name = family("stream_objects", "counter",
+                  "Objects detected, counted by PERF_DATA.update_batch.")
+    for stream, data in streams.items():
+        lines.append(_sample(name + "_total", [("stream", stream)],
+                             data["objects"]))
+
+    name = family("stream_frame_interval_seconds", "summary",
+                  "Interval between consecutive frames.")
+    for stream, data in streams.items():
+        intervals = data["intervals"]
+        if intervals is None:
+            continue
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"),
+                              ("0.99", "p99_ms")):
+            lines.append(_sample(name, [("stream", stream),
+                                        ("quantile", quantile)],
+                                 intervals[key] / 1000.0))
+
+    for metric, key, help_text in (
+            ("stream_max_stall_seconds", "max_stall_ms",
+             "Longest interval between consecutive frames."),
+            ("stream_jitter_seconds", "jitter_ms",
+             "Standard deviation of the frame interval.")):
+        name = family(metric, "gauge", help_text)
+        for stream, data in streams.items():
+            if data["intervals"] is not None:
+                lines.append(_sample(name, [("stream", stream)],
+                                     data["intervals"][key] / 1000.0))
+
+    name = family("probe_duration_seconds", "summary",
+                  "Wall time spent in pad probe callbacks.")
+    for probe, data in probes.items():
+        lines.append(_sample(name + "_count", [("probe", probe)],
+                             data["count"]))
+        lines.append(_sample(name + "_sum", [("probe", probe)],
+                             data["total"]))
+
+    name = family("probe_max_duration_seconds", "gauge",
+                  "Longest pad probe invocation.")
+    for probe, data in probes.items():
+        lines.append(_sample(name, [("probe", probe)], data["max"]))
+
+    name = family("probe_overruns", "counter",
+                  "Pad probe invocations longer than the frame interval.")
+    for probe, data in probes.items():
+        lines.append(_sample(name + "_total", [("probe", probe)],
+                             data.get("overruns", 0)))
+
+    for metric, key, help_text in (
+            ("qos_processed", "processed",
+             "Buffers processed, reported by the QoS messages of the element."),
+            ("qos_dropped", "dropped",
+             "Buffers dropped, reported by the QoS messages of the element.")):
+        name = family(metric, "counter", help_text)
+        for element, data in qos.items():
+            lines.append(_sample(name + "_total",
+                                 _qos_labels(element, data), data[key]))
+
+    name = family("qos_jitter_seconds", "gauge",
+                  "Largest jitter reported by the QoS messages of the element.")
+    for element, data in qos.items():
+        lines.append(_sample(name, _qos_labels(element, data),
+                             data["jitter_ms_max"] / 1000.0))
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """ Serves PERF_DATA counters over HTTP in the OpenMetrics text format.
+
+    The server runs on its own daemon thread and only reads the counters
+    through PERF_DATA.snapshot(), so a scrape never runs on the GLib main
+    loop or on a streaming thread.
+
+    Usage:
+        metrics_server = MetricsServer(perf_data, port=9400)
+        metrics_server.start()
+        ...
+        metrics_server.stop()
+    """
+
+    def __init__(self, perf_data, host="127.0.0.1", port=9400, path="/metrics"):
+        self._perf_data = perf_data
+        self._host = host
+        self._port = port
+        self._path = path
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def port(self):
+        """ Bound port, useful when created with port=0 """
+        if self._httpd:
+            return self._httpd.server_address[1]
+        return self._port
+
+    def _make_handler(self):
+        perf_data = self._perf_data
+        path = self._path
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != path:
+                    self.send_error(404)
+                    return
+                body = format_openmetrics(perf_data.snapshot()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Keep scrapes out of the app output
+                pass
+
+        return Handler
+
+    def start(self):
+        if self._thread:
+            return
+        try:
+            self._httpd = HTTPServer((self._host, self._port),
+                                     self._make_handler())
+        except OSError as e:
+            sys.stderr.write("Unable to start metrics server on %s:%d: %s\n"
+                             % (self._host, self._port, e))
+            raise
+        self._thread = Thread(target=self._httpd.serve_forever,
+                              name="metrics-server", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+        self._httpd = None
+        self._thread = None
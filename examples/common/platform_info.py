@@ -15,80 +15,341 @@
 # limitations under the License.
 ################################################################################
 
+import json
+import os
 import sys
 import platform
 from threading import Lock
-from cuda.bindings import runtime
-from cuda.bindings import driver
 
 guard_platform_info = Lock()
 
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+CGROUP_ROOT = "/sys/fs/cgroup"
+PROC_CGROUP_PATH = "/proc/self/cgroup"
+NUMA_NODES_PATH = "/sys/devices/system/node"
+MEMINFO_PATH = "/proc/meminfo"
+# Opt-in on-disk cache of the GPU probing, valid until the next reboot
+CACHE_PATH_ENV = "DS_PLATFORM_INFO_CACHE"
+
+# Results of the probing, shared by all the PlatformInfo of the process
+_probed = {}
+
+def _read_first_line(path):
+    try:
+        with open(path, "r") as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+def _is_tegra():
+    # Jetson boards, usable without CUDA to tell integrated GPUs apart
+    if os.path.exists("/etc/nv_tegra_release"):
+        return True
+    compatible = _read_first_line("/proc/device-tree/compatible")
+    return compatible is not None and "nvidia,tegra" in compatible
+
+def _load_cached_gpu(cache_path, boot_id):
+    try:
+        with open(cache_path, "r") as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    if not boot_id or cache.get("boot_id") != boot_id:
+        return None
+    return cache.get("gpu")
+
+def _store_cached_gpu(cache_path, boot_id, gpu):
+    if not boot_id:
+        return
+    try:
+        with open(cache_path, "w") as cache_file:
+            json.dump({"boot_id": boot_id, "gpu": gpu}, cache_file)
+    except OSError as e:
+        print(f"WARNING: Writing {cache_path} failed: {e}")
+
+def _cgroup_dirs(controller):
+    """ Directories under CGROUP_ROOT of the cgroup of the process for a
+    cgroup v1 controller, "" for cgroup v2, from its own to the root: the
+    limits of the parents apply too.
+    """
+    # Lines of /proc/self/cgroup: "<id>:<controllers>:<path>", the
+    # controllers are empty for cgroup v2
+    entries = {}
+    try:
+        with open(PROC_CGROUP_PATH, "r") as cgroup_file:
+            for line in cgroup_file:
+                fields = line.rstrip("\n").split(":", 2)
+                if len(fields) == 3:
+                    for name in fields[1].split(","):
+                        entries[name] = (fields[1], fields[2])
+    except OSError:
+        pass
+    controllers, path = entries.get(controller, (controller, "/"))
+    mount = CGROUP_ROOT
+    if controller:
+        # Mounted as "cpu,cpuacct", usually with a "cpu" link
+        mount = os.path.join(CGROUP_ROOT, controllers)
+        if not os.path.isdir(mount):
+            mount = os.path.join(CGROUP_ROOT, controller)
+    dirs = []
+    # Without a cgroup namespace the path is the one of the host, missing
+    # under the mount of the container: its root holds the limits then.
+    path = path.strip("/")
+    while path:
+        directory = os.path.join(mount, path)
+        if os.path.isdir(directory):
+            dirs.append(directory)
+        path = os.path.dirname(path)
+    dirs.append(mount)
+    return dirs
+
+def _read_cgroup_cpu_quota():
+    """ CPUs allowed by the cgroup of the process, None when unlimited """
+    quotas = []
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    for directory in _cgroup_dirs(""):
+        cpu_max = _read_first_line(os.path.join(directory, "cpu.max"))
+        if cpu_max:
+            quota, _, period = cpu_max.partition(" ")
+            if quota != "max" and period:
+                quotas.append(int(quota) / int(period))
+    if not quotas:
+        # cgroup v1, -1 when unlimited
+        for directory in _cgroup_dirs("cpu"):
+            quota = _read_first_line(os.path.join(directory, "cpu.cfs_quota_us"))
+            period = _read_first_line(os.path.join(directory, "cpu.cfs_period_us"))
+            if quota and period and int(quota) > 0 and int(period) > 0:
+                quotas.append(int(quota) / int(period))
+    return min(quotas) if quotas else None
+
+def _read_cgroup_memory_limit():
+    """ Memory limit of the cgroup in bytes, None when unlimited """
+    limits = []
+    for directory in _cgroup_dirs(""):
+        limit = _read_first_line(os.path.join(directory, "memory.max"))
+        if limit and limit != "max":
+            limits.append(int(limit))
+    if not limits:
+        for directory in _cgroup_dirs("memory"):
+            limit = _read_first_line(os.path.join(directory,
+                                                  "memory.limit_in_bytes"))
+            # cgroup v1 reports "unlimited" as a huge page aligned number
+            if limit and int(limit) < 1 << 60:
+                limits.append(int(limit))
+    return min(limits) if limits else None
+
+def _read_meminfo():
+    meminfo = {}
+    try:
+        with open(MEMINFO_PATH, "r") as meminfo_file:
+            for line in meminfo_file:
+                key, _, value = line.partition(":")
+                fields = value.split()
+                if fields:
+                    meminfo[key] = int(fields[0]) * 1024
+    except OSError:
+        pass
+    return meminfo
+
+def _count_numa_nodes():
+    try:
+        return max(1, sum(1 for name in os.listdir(NUMA_NODES_PATH)
+                          if name.startswith("node") and name[4:].isdigit()))
+    except OSError:
+        return 1
+
+def _probe_host():
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    meminfo = _read_meminfo()
+    return {
+        "cpus": cpus,
+        "cpu_quota": _read_cgroup_cpu_quota(),
+        "memory_limit": _read_cgroup_memory_limit(),
+        "memory_total": meminfo.get("MemTotal"),
+        "memory_available": meminfo.get("MemAvailable"),
+        "numa_nodes": _count_numa_nodes(),
+    }
+
+def _probe_cuda():
+    """ Returns ({"cuda": bool, "device_count": int, "integrated": bool},
+    whether the result is final). A missing cuda-python or no device is
+    final, a failing CUDA call is not: the driver may not be ready yet.
+    """
+    gpu = {"cuda": False, "device_count": 0, "integrated": _is_tegra()}
+    try:
+        # Imported here so that the tools needing only is_wsl() or the
+        # platform do not pay for it, and run where cuda-python is missing.
+        from cuda.bindings import runtime
+        from cuda.bindings import driver
+    except ImportError:
+        print("cuda-python not found, assuming a CPU only system")
+        return gpu, True
+
+    #Cuda initialize
+    cuda_init_result, = driver.cuInit(0)
+    if cuda_init_result != driver.CUresult.CUDA_SUCCESS:
+        print("ERROR: Cuda init failed: {}".format(cuda_init_result))
+        return gpu, False
+    #Get cuda devices count
+    device_count_result, num_devices = driver.cuDeviceGetCount()
+    if device_count_result != driver.CUresult.CUDA_SUCCESS:
+        print("ERROR: Getting cuda device count failed: {}".format(device_count_result))
+        return gpu, False
+    gpu["cuda"] = True
+    gpu["device_count"] = num_devices
+    #If atleast one device is found, we can use the property from
+    #the first device
+    if num_devices < 1:
+        print("ERROR: No cuda devices found to check whether iGPU/dGPU")
+        return gpu, True
+    #Get properties from first device
+    property_result, properties = runtime.cudaGetDeviceProperties(0)
+    if property_result != runtime.cudaError_t.cudaSuccess:
+        print("ERROR: Getting cuda device property failed: {}".format(property_result))
+        return gpu, False
+    print("Is it Integrated GPU? :", properties.integrated)
+    gpu["integrated"] = bool(properties.integrated)
+    return gpu, True
+
 class PlatformInfo:
-    def __init__(self):
-        self.is_wsl_system = False
-        self.wsl_verified = False
-        self.is_integrated_gpu_system = False
-        self.is_integrated_gpu_verified = False
-        self.is_aarch64_platform = False
-        self.is_aarch64_verified = False
+    """ Facts about the platform, each probed once per process.
+
+    CUDA is only imported and initialized by the GPU queries. Without
+    cuda-python or a CUDA device they report a CPU only system, integrated
+    if the board is a Jetson, and are probed again by the next query. When
+    cache_path, or else the DS_PLATFORM_INFO_CACHE environment variable,
+    names a file a successful GPU probing is stored there and reused by
+    the next processes until reboot.
+    """
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or os.environ.get(CACHE_PATH_ENV)
 
     def is_wsl(self):
         with guard_platform_info:
             # Check if its already verified as WSL system or not.
-            if not self.wsl_verified:
-                try:
-                    # Open /proc/version file
-                    with open("/proc/version", "r") as version_file:
-                        # Read the content
-                        version_info = version_file.readline()
-                        version_info = version_info.lower()
-                        self.wsl_verified = True
-
-                        # Check if "microsoft" is present in the version information
-                        if "microsoft" in version_info:
-                            self.is_wsl_system = True
-                except Exception as e:
-                    print(f"ERROR: Opening /proc/version failed: {e}")
-
-        return self.is_wsl_system
-    
+            if "wsl" not in _probed:
+                version_info = _read_first_line("/proc/version")
+                if version_info is None:
+                    print("ERROR: Opening /proc/version failed")
+                # Check if "microsoft" is present in the version information
+                _probed["wsl"] = (version_info is not None
+                                  and "microsoft" in version_info.lower())
+        return _probed["wsl"]
+
+    def _gpu(self):
+        with guard_platform_info:
+            if "gpu" in _probed:
+                return _probed["gpu"]
+            boot_id = _read_first_line(BOOT_ID_PATH)
+            if self.cache_path:
+                gpu = _load_cached_gpu(self.cache_path, boot_id)
+                if gpu is not None:
+                    _probed["gpu"] = gpu
+                    return gpu
+            gpu, final = _probe_cuda()
+            # A failed CUDA call is retried by the next query. cuda-python
+            # may be installed before the next reboot: only what CUDA
+            # reported goes to the disk cache.
+            if final:
+                _probed["gpu"] = gpu
+                if self.cache_path and gpu["cuda"]:
+                    _store_cached_gpu(self.cache_path, boot_id, gpu)
+            return gpu
+
     def is_integrated_gpu(self):
         #Using cuda apis to identify whether integrated/discreet
         #This is required to distinguish Tegra and ARM_SBSA devices
+        return self._gpu()["integrated"]
+
+    def has_cuda(self):
+        """ True when CUDA initialized and found at least one device """
+        gpu = self._gpu()
+        return gpu["cuda"] and gpu["device_count"] > 0
+
+    def host(self):
+        """ {"cpus": CPUs in the affinity mask, "cpu_quota": CPUs of the
+        cgroup quota or None, "memory_limit": cgroup limit in bytes or
+        None, "memory_total", "memory_available": bytes from /proc/meminfo,
+        "numa_nodes"}
+        """
         with guard_platform_info:
-            #Cuda initialize
-            if not self.is_integrated_gpu_verified:
-                cuda_init_result, = driver.cuInit(0)
-                if  cuda_init_result == driver.CUresult.CUDA_SUCCESS:
-                    #Get cuda devices count
-                    device_count_result, num_devices = driver.cuDeviceGetCount()
-                    if device_count_result == driver.CUresult.CUDA_SUCCESS:
-                        #If atleast one device is found, we can use the property from
-                        #the first device
-                        if num_devices >= 1:
-                            #Get properties from first device
-                            property_result, properties = runtime.cudaGetDeviceProperties(0)
-                            if property_result == runtime.cudaError_t.cudaSuccess:
-                                print("Is it Integrated GPU? :", properties.integrated)
-                                self.is_integrated_gpu_system = properties.integrated
-                                self.is_integrated_gpu_verified = True
-                            else:
-                                print("ERROR: Getting cuda device property failed: {}".format(property_result))
-                        else:
-                            print("ERROR: No cuda devices found to check whether iGPU/dGPU")
-                    else:
-                        print("ERROR: Getting cuda device count failed: {}".format(device_count_result))
-                else:
-                    print("ERROR: Cuda init failed: {}".format(cuda_init_result))
-
-        return self.is_integrated_gpu_system
+            if "host" not in _probed:
+                _probed["host"] = _probe_host()
+        return _probed["host"]
+
+    def usable_cpus(self):
+        """ CPUs the process may keep busy, the cgroup quota included """
+        host = self.host()
+        cpus = host["cpus"]
+        if host["cpu_quota"] is not None:
+            cpus = min(cpus, max(1, int(host["cpu_quota"])))
+        return cpus
+
+    def usable_memory(self):
+        """ Bytes the process may allocate, the cgroup limit included """
+        host = self.host()
+        sizes = [size for size in (host["memory_limit"], host["memory_available"])
+                 if size is not None]
+        return min(sizes) if sizes else None
+
+    def recommended_shards(self, num_streams, memory_per_shard=1 << 30):
+        """ Worker processes for num_streams streams: one per usable CPU,
+        each needing memory_per_shard bytes, never more than the streams.
+        """
+        shards = self.usable_cpus()
+        memory = self.usable_memory()
+        if memory is not None:
+            shards = min(shards, memory // memory_per_shard)
+        return max(1, min(shards, num_streams))
+
+    def recommended_worker_threads(self):
+        """ Threads of a worker pool, such as AsyncProbe num_workers, next
+        to the streaming threads: one CPU is left to the pipeline.
+        """
+        return max(1, self.usable_cpus() - 1)
+
+    def recommended_queue_depth(self, num_streams, frame_bytes=1920 * 1080 * 3 // 2,
+                                num_queues=4, memory_share=0.1,
+                                min_depth=2, max_depth=8):
+        """ max-size-buffers of the queues of a pipeline, so that num_queues
+        queues of batches of num_streams frames of frame_bytes take at most
+        memory_share of the usable memory, within [min_depth, max_depth].
+        """
+        memory = self.usable_memory()
+        if memory is None:
+            return max_depth
+        batch_bytes = max(1, num_streams * frame_bytes * num_queues)
+        depth = int(memory * memory_share) // batch_bytes
+        return max(min_depth, min(max_depth, depth))
+
+    def recommended_batch_timeout_usec(self, num_streams, fps=30,
+                                       max_intervals=4):
+        """ batched-push-timeout of nvstreammux: one frame interval, longer
+        when there are fewer usable CPUs than streams, as each CPU then
+        feeds several streams in turn and the last frames of a batch come
+        late. At most max_intervals frame intervals.
+        """
+        load = num_streams / self.usable_cpus()
+        return int(1000000 / fps * min(max_intervals, max(1.0, load)))
+
+    def recommendations(self, num_streams, fps=30):
+        return {
+            "shards": self.recommended_shards(num_streams),
+            "worker_threads": self.recommended_worker_threads(),
+            "queue_depth": self.recommended_queue_depth(num_streams),
+            "batch_size": num_streams,
+            "batch_timeout_usec": self.recommended_batch_timeout_usec(
+                num_streams, fps),
+        }
 
     def is_platform_aarch64(self):
         #Check if platform is aarch64 using uname
-        if not self.is_aarch64_verified:
-            if platform.uname()[4] == 'aarch64':
-                self.is_aarch64_platform =  True
-            self.is_aarch64_verified = True
-        return self.is_aarch64_platform
+        if "aarch64" not in _probed:
+            _probed["aarch64"] = platform.uname()[4] == 'aarch64'
+        return _probed["aarch64"]
 
 sys.path.append('/opt/nvidia/deepstream/deepstream/lib')
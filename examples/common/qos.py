@@ -0,0 +1,161 @@
+################################################################################
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+""" Totals of the QoS messages posted by the sinks and decoders.
+
+A sink dropping late buffers, or a decoder skipping frames, posts a QoS
+message with the buffers it processed and dropped so far and the jitter
+of the last buffer. QosAggregator keeps them per element:
+    qos = QosAggregator()
+    qos.attach(bus_dispatcher)     # common.bus_call.BusDispatcher
+    perf_data.qos = qos            # printed and exported with the FPS
+The source of an element is the one registered on the dispatcher with
+BusDispatcher.register_source(), None otherwise. Once a source is removed,
+forget_source() drops its elements, whose names may be reused. Only the
+counters in buffers are kept, those of other formats (e.g. samples of an
+audio sink) are ignored.
+"""
+
+import time
+from collections import deque
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+# -1 of the guint64 counters of parse_qos_stats(): not counted
+QOS_UNKNOWN = 2**64 - 1
+
+class QosStats:
+    """ QoS state of one element, updated from the GLib main loop """
+
+    __slots__ = ("source_id", "messages", "processed", "dropped",
+                 "jitter_total", "jitter_max", "proportion", "history")
+
+    def __init__(self, source_id=None):
+        self.source_id = source_id
+        self.messages = 0
+        self.processed = 0
+        self.dropped = 0
+        self.jitter_total = 0
+        self.jitter_max = 0
+        self.proportion = None
+        # (time, processed, dropped) of the messages of the window
+        self.history = deque()
+
+    def update(self, processed, dropped, jitter, proportion, now, window):
+        self.messages += 1
+        # The counters of the message are totals since the element started,
+        # -1 when the element does not count them.
+        if processed != QOS_UNKNOWN:
+            self.processed = processed
+        if dropped != QOS_UNKNOWN:
+            self.dropped = dropped
+        # The jitter is negative for early buffers: the mean is the one of
+        # its absolute value, the max the one of the lateness.
+        self.jitter_total += abs(jitter)
+        if jitter > self.jitter_max:
+            self.jitter_max = jitter
+        self.proportion = proportion
+        history = self.history
+        history.append((now, self.processed, self.dropped))
+        while len(history) > 1 and now - history[0][0] > window:
+            history.popleft()
+
+    def recent_drop_ratio(self):
+        """ Dropped / handled buffers over the window, None without history """
+        if len(self.history) < 2:
+            return None
+        _, processed_start, dropped_start = self.history[0]
+        _, processed_end, dropped_end = self.history[-1]
+        dropped = dropped_end - dropped_start
+        handled = processed_end - processed_start + dropped
+        return dropped / handled if handled > 0 else 0.0
+
+    def snapshot(self):
+        handled = self.processed + self.dropped
+        recent = self.recent_drop_ratio()
+        return {
+            "source_id": self.source_id,
+            "messages": self.messages,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "drop_ratio": round(self.dropped / handled, 4) if handled else 0.0,
+            "recent_drop_ratio": round(recent, 4) if recent is not None else None,
+            "jitter_ms_mean": round(self.jitter_total / self.messages / 1e6, 3),
+            "jitter_ms_max": round(self.jitter_max / 1e6, 3),
+            "proportion": self.proportion,
+        }
+
+class QosAggregator:
+    """ See the module documentation. window is the span in seconds of
+    recent_drop_ratio.
+    """
+
+    def __init__(self, window=10.0):
+        self.window = window
+        self.elements = {}
+        self._dispatcher = None
+
+    def attach(self, dispatcher):
+        """ Handles the QoS messages of a BusDispatcher """
+        self._dispatcher = dispatcher
+        dispatcher.add_handler(Gst.MessageType.QOS, self._on_qos)
+
+    def _on_qos(self, dispatcher, message):
+        self.handle_message(message)
+
+    def handle_message(self, message, now=None):
+        if now is None:
+            now = time.monotonic()
+        element = message.src
+        name = element.get_name() if element is not None else None
+        stats = self.elements.get(name)
+        if stats is None:
+            source_id = (self._dispatcher.source_of(element)
+                         if self._dispatcher is not None else None)
+            stats = self.elements[name] = QosStats(source_id)
+        stats_format, processed, dropped = message.parse_qos_stats()
+        if stats_format != Gst.Format.BUFFERS:
+            processed = dropped = QOS_UNKNOWN
+        jitter, proportion, _ = message.parse_qos_values()
+        stats.update(processed, dropped, jitter, proportion, now, self.window)
+
+    def reset(self):
+        self.elements = {}
+
+    def forget(self, name):
+        """ Drops the stats of the element name """
+        self.elements.pop(name, None)
+
+    def forget_source(self, source_id):
+        """ Drops the stats of the elements of source_id, once removed """
+        self.elements = {name: stats for name, stats in self.elements.items()
+                         if stats.source_id != source_id}
+
+    def snapshot(self):
+        """ {element name: QosStats.snapshot()} """
+        return {name: stats.snapshot()
+                for name, stats in tuple(self.elements.items())}
+
+    def totals(self):
+        """ Processed and dropped buffers summed over all the elements """
+        elements = tuple(self.elements.values())
+        return {
+            "processed": sum(stats.processed for stats in elements),
+            "dropped": sum(stats.dropped for stats in elements),
+        }
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Baseline JSON storage and regression check of benchmark results.
+
+Results are {case name: {metric: value}}. Metrics ending in "_per_sec" are
+better when higher, every other metric (costs, latencies) is better when
+lower.
+"""
+
+import json
+import os
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path, results):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as baseline_file:
+        json.dump(results, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write("\n")
+
+
+def higher_is_better(metric):
+    return metric.endswith("_per_sec")
+
+
+def find_regressions(results, baseline, tolerance):
+    """ Returns [(case, metric, baseline value, new value, change)] for
+    every metric worse than its baseline by more than tolerance (0.1 is
+    10%). Cases or metrics missing from either side are ignored.
+    """
+    regressions = []
+    for case, metrics in sorted(results.items()):
+        baseline_metrics = baseline.get(case)
+        if not baseline_metrics:
+            continue
+        for metric, value in sorted(metrics.items()):
+            reference = baseline_metrics.get(metric)
+            if not reference:
+                continue
+            change = (value - reference) / reference
+            if higher_is_better(metric):
+                regressed = change < -tolerance
+            else:
+                regressed = change > tolerance
+            if regressed:
+                regressions.append((case, metric, reference, value, change))
+    return regressions
+
+
+def print_regressions(regressions, tolerance):
+    if not regressions:
+        print("No regression beyond %.0f%%" % (tolerance * 100))
+        return
+    for case, metric, reference, value, change in regressions:
+        print("REGRESSION %s %s: %.3f -> %.3f (%+.1f%%)"
+              % (case, metric, reference, value, change * 100))
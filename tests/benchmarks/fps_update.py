@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Micro-benchmark of PERF_DATA.update_fps against the number of streams.
+
+Each stream is updated from its own thread, the way one source bin per
+stream feeds the probe in the multi-stream apps. The cost per update is
+reported for the sharded counters and for the former single-lock design.
+
+Usage:
+    python3 -m tests.benchmarks.fps_update [updates_per_stream]
+"""
+
+import os
+import sys
+import time
+from threading import Lock, Thread
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../apps'))
+from common.FPS import PERF_DATA
+
+STREAM_COUNTS = [1, 4, 16, 32, 64]
+UPDATES_PER_STREAM = 20000
+# Best of REPEATS runs, alternating both designs, filters out the noise of
+# the other processes of the machine
+REPEATS = 5
+
+
+class LockedPerfData:
+    """ Former implementation: a clock read and one module-wide lock taken
+    on every frame
+    """
+
+    def __init__(self, num_streams):
+        self._mutex = Lock()
+        self.frame_count = {"stream{0}".format(i): 0
+                            for i in range(num_streams)}
+
+    def update_fps(self, stream_index):
+        time.time()
+        with self._mutex:
+            self.frame_count[stream_index] += 1
+
+
+def _run(perf_data, num_streams, updates_per_stream):
+    def worker(stream_index):
+        update_fps = perf_data.update_fps
+        for _ in range(updates_per_stream):
+            update_fps(stream_index)
+
+    threads = [Thread(target=worker, args=("stream{0}".format(i),))
+               for i in range(num_streams)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return elapsed * 1e9 / (num_streams * updates_per_stream)
+
+
+def run_benchmark(stream_counts=STREAM_COUNTS,
+                  updates_per_stream=UPDATES_PER_STREAM, repeats=REPEATS):
+    """ Returns {num_streams: (sharded ns/update, locked ns/update)} """
+    results = {}
+    for num_streams in stream_counts:
+        sharded = []
+        locked = []
+        for _ in range(repeats):
+            sharded.append(_run(PERF_DATA(num_streams), num_streams,
+                                updates_per_stream))
+            locked.append(_run(LockedPerfData(num_streams), num_streams,
+                               updates_per_stream))
+        results[num_streams] = (min(sharded), min(locked))
+    return results
+
+
+def main(args):
+    updates_per_stream = int(args[1]) if len(args) > 1 else UPDATES_PER_STREAM
+    print("%8s %18s %18s" % ("streams", "sharded ns/update", "locked ns/update"))
+    for num_streams, (sharded, locked) in run_benchmark(
+            updates_per_stream=updates_per_stream).items():
+        print("%8d %18.1f %18.1f" % (num_streams, sharded, locked))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Cost of the common.meta_iter generators against the hand-written loops.
+
+Both walk every frame and object of synthetic batches and read the
+class_id of each object, as the object counting probes of the apps do.
+
+Reported for every batch size:
+    per object  (time with 100 objects - time with 0) / objects in batch
+and for every object count:
+    per frame   (time with 64 frames - time with 1) / 63, the cost of one
+                more frame in the batch, the per batch calls left out
+
+Usage:
+    python3 -m tests.benchmarks.meta_walk [--tolerance 0.1]
+Exits with status 1 when the generators cost more than the loops by more
+than the tolerance per object, per frame for any object count, empty
+frames included, or per batch on the smallest batches without objects,
+where the calls to iter_frames() and iter_objects() are the whole work.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../apps'))
+from tests.testcommon import pyds_sim
+
+pyds = pyds_sim.install()
+
+from common.meta_iter import iter_frames, iter_objects
+
+BATCH_SIZES = [1, 4, 16, 64]
+OBJECT_COUNTS = [0, 10, 100]
+PER_OBJECT_COUNT = 100
+# Per batch gate: batches this small are dominated by the per call costs
+SMALL_BATCH_SIZE = 4
+MIN_TIME = 0.2
+REPEATS = 7
+TOLERANCE = 0.1
+
+
+def count_loop(batch_meta):
+    """ The while / StopIteration loop of the apps """
+    count = 0
+    l_frame = batch_meta.frame_meta_list
+    while l_frame is not None:
+        try:
+            frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
+        except StopIteration:
+            break
+        l_obj = frame_meta.obj_meta_list
+        while l_obj is not None:
+            try:
+                obj_meta = pyds.NvDsObjectMeta.cast(l_obj.data)
+            except StopIteration:
+                break
+            count += obj_meta.class_id
+            try:
+                l_obj = l_obj.next
+            except StopIteration:
+                break
+        try:
+            l_frame = l_frame.next
+        except StopIteration:
+            break
+    return count
+
+
+def count_generators(batch_meta):
+    count = 0
+    for frame_meta in iter_frames(batch_meta):
+        for obj_meta in iter_objects(frame_meta):
+            count += obj_meta.class_id
+    return count
+
+
+def _calls_for(function, batch_meta):
+    """ Number of calls running for about MIN_TIME seconds """
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function(batch_meta)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_TIME / 10:
+            return max(1, int(calls * MIN_TIME / elapsed))
+        calls *= 2
+
+
+def _compare(functions, batch_meta):
+    """ Best time of each function in us per call. The functions are run
+    in turn at every repeat so that a slower phase of the machine hits
+    them all alike.
+    """
+    calls = _calls_for(functions[0], batch_meta)
+    best = [None] * len(functions)
+    for _ in range(REPEATS):
+        for i, function in enumerate(functions):
+            start = time.perf_counter()
+            for _ in range(calls):
+                function(batch_meta)
+            elapsed = (time.perf_counter() - start) / calls
+            best[i] = elapsed if best[i] is None else min(best[i], elapsed)
+    return [elapsed * 1e6 for elapsed in best]
+
+
+def run_benchmark(batch_sizes=BATCH_SIZES, object_counts=OBJECT_COUNTS):
+    """ Returns {(batch size, objects per frame): (loop us, generators us)} """
+    results = {}
+    for batch_size in batch_sizes:
+        for num_objects in object_counts:
+            batch_meta = pyds.make_batch(batch_size, num_objects)
+            assert count_loop(batch_meta) == count_generators(batch_meta)
+            results[(batch_size, num_objects)] = tuple(
+                _compare((count_loop, count_generators), batch_meta))
+    return results
+
+
+def per_object_costs(results):
+    """ Returns {batch size: (loop ns/object, generators ns/object)} """
+    costs = {}
+    for batch_size in sorted({batch_size for batch_size, _ in results}):
+        empty = results.get((batch_size, 0))
+        full = results.get((batch_size, PER_OBJECT_COUNT))
+        if not empty or not full:
+            continue
+        num_objects = batch_size * PER_OBJECT_COUNT
+        costs[batch_size] = (
+            (full[0] - empty[0]) * 1000.0 / num_objects,
+            (full[1] - empty[1]) * 1000.0 / num_objects)
+    return costs
+
+
+def per_frame_costs(results):
+    """ Returns {objects per frame: (loop ns/frame, generators ns/frame)},
+    from the smallest and the largest batch
+    """
+    batch_sizes = sorted({batch_size for batch_size, _ in results})
+    smallest, largest = batch_sizes[0], batch_sizes[-1]
+    costs = {}
+    if largest == smallest:
+        return costs
+    for num_objects in sorted({num_objects for _, num_objects in results}):
+        small = results.get((smallest, num_objects))
+        large = results.get((largest, num_objects))
+        if not small or not large:
+            continue
+        costs[num_objects] = tuple(
+            (large[i] - small[i]) * 1000.0 / (largest - smallest)
+            for i in range(2))
+    return costs
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Allowed relative slowdown, 0.1 is 10%%")
+    options = parser.parse_args(args[1:])
+
+    results = run_benchmark()
+    print("%6s %8s %12s %16s %8s" % ("batch", "objects", "loop us",
+                                     "generators us", "ratio"))
+    slower = []
+    for (batch_size, num_objects), (loop, generators) in results.items():
+        print("%6d %8d %12.2f %16.2f %8.2f" % (batch_size, num_objects, loop,
+                                               generators, generators / loop))
+        if (batch_size <= SMALL_BATCH_SIZE and num_objects == 0
+                and generators > loop * (1.0 + options.tolerance)):
+            slower.append("per batch, batch %d without objects" % batch_size)
+
+    print()
+    print("%6s %18s %24s" % ("batch", "loop ns/object", "generators ns/object"))
+    for batch_size, (loop, generators) in per_object_costs(results).items():
+        print("%6d %18.1f %24.1f" % (batch_size, loop, generators))
+        if generators > loop * (1.0 + options.tolerance):
+            slower.append("per object, batch %d" % batch_size)
+
+    print()
+    print("%8s %18s %24s" % ("objects", "loop ns/frame", "generators ns/frame"))
+    for num_objects, (loop, generators) in per_frame_costs(results).items():
+        print("%8d %18.1f %24.1f" % (num_objects, loop, generators))
+        if generators > loop * (1.0 + options.tolerance):
+            slower.append("per frame, %d objects" % num_objects)
+    if slower:
+        print("Generators cost more than the loops beyond %.0f%%: %s"
+              % (options.tolerance * 100, ", ".join(slower)))
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Probe overhead regression benchmark on a CPU only pipeline.
+
+Runs videotestsrc -> identity -> fakesink (PipelineVideotestsrc) with a probe
+on the identity sink pad. Before each call the probe is handed a synthetic
+NvDsBatchMeta from tests.testcommon.pyds_sim, so probe code written for
+pyds runs unchanged without DeepStream or a GPU. The app probes are loaded
+from the app scripts themselves, a change to them shows up here; what they
+print goes to /dev/null.
+
+For every probe, batch size and object count it measures the pipeline
+throughput in buffers/sec and the mean and p95 time spent in the probe per
+buffer, then compares them with a baseline JSON file.
+
+Usage:
+    python3 -m tests.benchmarks.probe_overhead --update-baseline
+    python3 -m tests.benchmarks.probe_overhead [--tolerance 0.15]
+The second form exits with status 1 when a case regressed beyond the
+tolerance.
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../apps'))
+from tests.testcommon import pyds_sim
+
+pyds = pyds_sim.install()
+
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+from common.FPS import PERF_DATA
+from tests.benchmarks.baseline import (find_regressions, load_baseline,
+                                       print_regressions, save_baseline)
+from tests.benchmarks.probe_profile import load_app_probe
+from tests.testcommon.frame_iterator import BatchFrameIterator, FrameIterator
+from tests.testcommon.pipeline_videotestsrc import PipelineVideotestsrc
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines",
+                             "probe_overhead.json")
+BATCH_SIZES = [1, 4, 16, 64]
+OBJECT_COUNTS = [0, 10, 100]
+NUM_BUFFERS = 300
+TOLERANCE = 0.15
+
+
+def make_deepstream_test_1_probe():
+    """ osd_sink_pad_buffer_probe of deepstream-test1, loaded from the app """
+    return load_app_probe("deepstream-test1/deepstream_test_1.py",
+                          "osd_sink_pad_buffer_probe")
+
+
+def make_deepstream_test_3_probe():
+    """ pgie_src_pad_buffer_probe of deepstream-test3, loaded from the app """
+    return load_app_probe("deepstream-test3/deepstream_test_3.py",
+                          "pgie_src_pad_buffer_probe",
+                          perf_data=PERF_DATA(0), silent=True)
+
+
+def make_frame_iterator_probe():
+    """ Object counting FrameIterator, as in tests/integration/test.py """
+
+    def frame_function(batch_meta, frame_meta, dict_data, gst_buffer):
+        pass
+
+    def box_function(batch_meta, frame_meta, obj_meta, dict_data, gst_buffer):
+        dict_data["obj_counter"][obj_meta.class_id] += 1
+
+    data_probe = {"obj_counter": [0] * 4}
+    return FrameIterator(frame_function, box_function, data_probe)
+
+
+def make_batch_frame_iterator_probe():
+    """ Same object count with the vectorized BatchFrameIterator """
+
+    def batch_function(batch_meta, frames, objects, dict_data, gst_buffer):
+        dict_data["obj_counter"] += np.bincount(objects["class_id"],
+                                                minlength=4)[:4]
+
+    data_probe = {"obj_counter": np.zeros(4, dtype=np.int64)}
+    return BatchFrameIterator(batch_function, data_probe)
+
+
+def make_perf_data_probe():
+    """ Frame rate accounting of the multi-stream apps """
+    perf_data = PERF_DATA(0)
+
+    def perf_data_probe(pad, info, u_data):
+        gst_buffer = info.get_buffer()
+        batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+        perf_data.update_batch(batch_meta)
+        return Gst.PadProbeReturn.OK
+
+    return perf_data_probe
+
+
+PROBES = {
+    "deepstream_test_1": make_deepstream_test_1_probe,
+    "deepstream_test_3": make_deepstream_test_3_probe,
+    "frame_iterator": make_frame_iterator_probe,
+    "batch_frame_iterator": make_batch_frame_iterator_probe,
+    "perf_update_batch": make_perf_data_probe,
+}
+
+
+def run_case(probe, batch_size, num_objects, num_buffers=NUM_BUFFERS):
+    """ Runs one pipeline, returns its metrics """
+    batch_meta = pyds.make_batch(batch_size, num_objects)
+    properties = {
+        "video-source": {"num-buffers": num_buffers},
+        "fakesink": {"sync": False},
+    }
+    sp = PipelineVideotestsrc(properties)
+    probe_times = []
+
+    def timed_probe(pad, info, u_data):
+        address = hash(info.get_buffer())
+        pyds.attach_batch_meta(address, batch_meta)
+        start = time.perf_counter()
+        probe(pad, info, u_data)
+        probe_times.append(time.perf_counter() - start)
+        pyds.release_batch_meta(address)
+        return Gst.PadProbeReturn.OK
+
+    sp.set_probe(timed_probe)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        sp.run()
+        elapsed = time.perf_counter() - start
+
+    probe_us = np.array(probe_times) * 1e6
+    return {
+        "buffers_per_sec": round(len(probe_times) / elapsed, 1),
+        "probe_us_mean": round(float(probe_us.mean()), 2),
+        "probe_us_p95": round(float(np.percentile(probe_us, 95)), 2),
+    }
+
+
+def run_suite(probe_names=None, batch_sizes=BATCH_SIZES,
+              object_counts=OBJECT_COUNTS, num_buffers=NUM_BUFFERS):
+    results = {}
+    for probe_name in probe_names or PROBES:
+        for batch_size in batch_sizes:
+            for num_objects in object_counts:
+                case = "{0}/batch{1}/objects{2}".format(probe_name,
+                                                        batch_size,
+                                                        num_objects)
+                results[case] = run_case(PROBES[probe_name](), batch_size,
+                                         num_objects, num_buffers)
+                print("%-40s %10.1f buffers/s %10.2f us/buffer (p95 %.2f)"
+                      % (case, results[case]["buffers_per_sec"],
+                         results[case]["probe_us_mean"],
+                         results[case]["probe_us_p95"]))
+    return results
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Allowed relative slowdown, 0.15 is 15%%")
+    parser.add_argument("--num-buffers", type=int, default=NUM_BUFFERS)
+    parser.add_argument("--probe", action="append", choices=list(PROBES),
+                        help="Probe to benchmark, all by default")
+    return parser.parse_args(args)
+
+
+def main(args):
+    options = parse_args(args[1:])
+    results = run_suite(options.probe, num_buffers=options.num_buffers)
+    if options.update_baseline:
+        save_baseline(options.baseline, results)
+        print("Baseline written to", options.baseline)
+        return 0
+    baseline = load_baseline(options.baseline)
+    if baseline is None:
+        print("No baseline at %s, run with --update-baseline" % options.baseline)
+        return 0
+    regressions = find_regressions(results, baseline, options.tolerance)
+    print_regressions(regressions, options.tolerance)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
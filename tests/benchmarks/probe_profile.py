@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Per-batch cost of probe code against pyds_sim batches, without a pipeline.
+
+Calls the probes directly, the app probes unchanged, with synthetic batches
+of 1 to 64 streams and 0 to 500 objects per frame, and reports the time
+per batch and per frame. Probes needing gst-python are skipped when it is
+not installed, so the pyds only ones run on any CPU box.
+
+Usage:
+    python3 -m tests.benchmarks.probe_profile
+    python3 -m tests.benchmarks.probe_profile --probe frame_iterator \\
+        --streams 16 --objects 100 --cprofile
+The second form prints the cProfile of that single case.
+"""
+
+import argparse
+import cProfile
+import importlib.util
+import os
+import pstats
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../apps'))
+from tests.testcommon import pyds_sim
+
+pyds = pyds_sim.install()
+
+from common.FPS import PERF_DATA
+from common.meta_iter import iter_frames, iter_objects
+from tests.benchmarks.baseline import (find_regressions, load_baseline,
+                                       print_regressions, save_baseline)
+
+APPS_PATH = os.path.join(os.path.dirname(__file__), '../../apps')
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines",
+                             "probe_profile.json")
+STREAM_COUNTS = [1, 4, 16, 32, 64]
+OBJECT_COUNTS = [0, 10, 50, 100, 500]
+MIN_TIME = 0.2
+TOLERANCE = 0.15
+
+
+class SimBuffer:
+    """ Stands for the GstBuffer, its hash is the buffer address """
+
+
+class SimProbeInfo:
+    def __init__(self, gst_buffer):
+        self._buffer = gst_buffer
+
+    def get_buffer(self):
+        return self._buffer
+
+
+def load_app_probe(relative_path, probe_name, **module_globals):
+    """ Imports an app script by path and returns one of its probes """
+    path = os.path.join(APPS_PATH, relative_path)
+    module_name = os.path.splitext(os.path.basename(path))[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for name, value in module_globals.items():
+        setattr(module, name, value)
+    return getattr(module, probe_name)
+
+
+def make_deepstream_test_1():
+    return load_app_probe("deepstream-test1/deepstream_test_1.py",
+                          "osd_sink_pad_buffer_probe")
+
+
+def make_deepstream_test_3():
+    return load_app_probe("deepstream-test3/deepstream_test_3.py",
+                          "pgie_src_pad_buffer_probe",
+                          perf_data=PERF_DATA(0), silent=True)
+
+
+def make_frame_iterator():
+    from tests.testcommon.frame_iterator import FrameIterator
+
+    def box_function(batch_meta, frame_meta, obj_meta, dict_data, gst_buffer):
+        dict_data[obj_meta.class_id] += 1
+
+    return FrameIterator(None, box_function, [0] * 4)
+
+
+def make_async_snapshot():
+    from common.async_probe import snapshot_batch
+
+    def async_snapshot(pad, info, u_data):
+        batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(info.get_buffer()))
+        return snapshot_batch(batch_meta)
+
+    return async_snapshot
+
+
+def make_meta_iter():
+    obj_counter = [0] * 4
+
+    def meta_iter_probe(pad, info, u_data):
+        batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(info.get_buffer()))
+        for frame_meta in iter_frames(batch_meta):
+            for obj_meta in iter_objects(frame_meta):
+                obj_counter[obj_meta.class_id] += 1
+
+    return meta_iter_probe
+
+
+def make_perf_update_batch():
+    perf_data = PERF_DATA(0)
+
+    def perf_update_batch(pad, info, u_data):
+        batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(info.get_buffer()))
+        perf_data.update_batch(batch_meta)
+
+    return perf_update_batch
+
+
+PROBES = {
+    "deepstream_test_1": make_deepstream_test_1,
+    "deepstream_test_3": make_deepstream_test_3,
+    "frame_iterator": make_frame_iterator,
+    "async_snapshot": make_async_snapshot,
+    "meta_iter": make_meta_iter,
+    "perf_update_batch": make_perf_update_batch,
+}
+
+
+def _make_info(num_streams, num_objects):
+    # frame_num 1 keeps the apps printing every N frames quiet
+    batch_meta = pyds.make_batch(num_streams, num_objects, frame_num=1)
+    gst_buffer = SimBuffer()
+    pyds.attach_batch_meta(hash(gst_buffer), batch_meta)
+    return gst_buffer, batch_meta, SimProbeInfo(gst_buffer)
+
+
+def run_case(probe, num_streams, num_objects):
+    """ Returns the time per batch and per frame in us """
+    gst_buffer, batch_meta, info = _make_info(num_streams, num_objects)
+    address = hash(gst_buffer)
+    calls = 0
+    elapsed = 0.0
+    try:
+        while elapsed < MIN_TIME:
+            # Display and user metas added by the probe are dropped at
+            # every batch, as a new buffer would arrive without them.
+            pyds.attach_batch_meta(address, batch_meta)
+            start = time.perf_counter()
+            probe(None, info, None)
+            elapsed += time.perf_counter() - start
+            calls += 1
+    finally:
+        pyds.release_batch_meta(address)
+    batch_us = elapsed * 1e6 / calls
+    return {
+        "batch_us": round(batch_us, 2),
+        "frame_us": round(batch_us / num_streams, 2),
+    }
+
+
+def profile_case(probe, num_streams, num_objects, batches=200):
+    gst_buffer, batch_meta, info = _make_info(num_streams, num_objects)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(batches):
+        pyds.attach_batch_meta(hash(gst_buffer), batch_meta)
+        probe(None, info, None)
+    profiler.disable()
+    pyds.release_batch_meta(hash(gst_buffer))
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+
+def make_probe(probe_name):
+    """ Returns the probe, None with a message when it cannot be loaded here """
+    try:
+        return PROBES[probe_name]()
+    except ImportError as e:
+        print("Skipping %s: %s" % (probe_name, e))
+        return None
+
+
+def run_suite(probe_names=None, stream_counts=STREAM_COUNTS,
+              object_counts=OBJECT_COUNTS):
+    results = {}
+    print("%-40s %12s %12s" % ("case", "us/batch", "us/frame"))
+    for probe_name in probe_names or PROBES:
+        probe = make_probe(probe_name)
+        if probe is None:
+            continue
+        for num_streams in stream_counts:
+            for num_objects in object_counts:
+                case = "{0}/streams{1}/objects{2}".format(probe_name,
+                                                          num_streams,
+                                                          num_objects)
+                results[case] = run_case(probe, num_streams, num_objects)
+                print("%-40s %12.2f %12.2f" % (case, results[case]["batch_us"],
+                                               results[case]["frame_us"]))
+    return results
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--probe", action="append", choices=list(PROBES),
+                        help="Probe to profile, all by default")
+    parser.add_argument("--streams", type=int, action="append",
+                        help="Streams per batch, %s by default" % STREAM_COUNTS)
+    parser.add_argument("--objects", type=int, action="append",
+                        help="Objects per frame, %s by default" % OBJECT_COUNTS)
+    parser.add_argument("--cprofile", action="store_true",
+                        help="Print the cProfile of the first selected case")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Allowed relative slowdown, 0.15 is 15%%")
+    return parser.parse_args(args)
+
+
+def main(args):
+    options = parse_args(args[1:])
+    stream_counts = options.streams or STREAM_COUNTS
+    object_counts = options.objects or OBJECT_COUNTS
+    if options.cprofile:
+        probe_name = (options.probe or list(PROBES))[0]
+        probe = make_probe(probe_name)
+        if probe is None:
+            return 1
+        profile_case(probe, stream_counts[0], object_counts[0])
+        return 0
+
+    results = run_suite(options.probe, stream_counts, object_counts)
+    if options.update_baseline:
+        save_baseline(options.baseline, results)
+        print("Baseline written to", options.baseline)
+        return 0
+    baseline = load_baseline(options.baseline)
+    if baseline is None:
+        return 0
+    regressions = find_regressions(results, baseline, options.tolerance)
+    print_regressions(regressions, options.tolerance)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
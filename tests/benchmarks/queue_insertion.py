@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Throughput of a CPU only pipeline before and after common.queue_planner.
+
+The graph converts every frame before and after a probed identity:
+    videotestsrc ! I420 ! videoconvert ! RGBA ! identity ! videoconvert
+        ! NV12 ! fakesink
+The probe on the identity sink pad busy-waits for --probe-us to stand for
+the work of a Python probe. Without queues the conversions and the probe
+share one streaming thread, with the queues planned around the probed
+element each conversion overlaps the probe of another buffer.
+
+Usage:
+    python3 -m tests.benchmarks.queue_insertion [--probe-us 0 --probe-us 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../apps'))
+
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+from common.queue_planner import insert_queues, plan_queues
+
+GRAPH = ("videotestsrc name=video-source num-buffers={num_buffers} "
+         "! video/x-raw,width={width},height={height},format=I420 "
+         "! videoconvert name=convert-in ! video/x-raw,format=RGBA "
+         "! identity name=probed ! videoconvert name=convert-out "
+         "! video/x-raw,format=NV12 ! fakesink name=sink sync=false")
+PROBE_US = [0, 500, 2000]
+NUM_BUFFERS = 300
+WIDTH = 1280
+HEIGHT = 720
+
+
+def make_probe(probe_us):
+    perf_counter = time.perf_counter
+    duration = probe_us / 1e6
+
+    def busy_probe(pad, info, u_data):
+        end = perf_counter() + duration
+        while perf_counter() < end:
+            pass
+        return Gst.PadProbeReturn.OK
+
+    return busy_probe
+
+
+def run_case(probe_us, with_queues, num_buffers=NUM_BUFFERS, width=WIDTH,
+             height=HEIGHT):
+    """ Returns the buffers/sec of one run and the queues inserted """
+    pipeline = Gst.parse_launch(GRAPH.format(num_buffers=num_buffers,
+                                             width=width, height=height))
+    plan = []
+    if with_queues:
+        plan = plan_queues(pipeline, probed=["probed"])
+        insert_queues(pipeline, plan)
+    sinkpad = pipeline.get_by_name("probed").get_static_pad("sink")
+    sinkpad.add_probe(Gst.PadProbeType.BUFFER, make_probe(probe_us), 0)
+
+    bus = pipeline.get_bus()
+    start = time.perf_counter()
+    pipeline.set_state(Gst.State.PLAYING)
+    message = bus.timed_pop_filtered(Gst.CLOCK_TIME_NONE,
+                                     Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    elapsed = time.perf_counter() - start
+    pipeline.set_state(Gst.State.NULL)
+    if message.type == Gst.MessageType.ERROR:
+        err, debug = message.parse_error()
+        raise Exception("Pipeline error: %s: %s" % (err, debug))
+    return round(num_buffers / elapsed, 1), plan
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--probe-us", type=int, action="append",
+                        help="Probe duration in us, %s by default" % PROBE_US)
+    parser.add_argument("--num-buffers", type=int, default=NUM_BUFFERS)
+    options = parser.parse_args(args[1:])
+
+    Gst.init(None)
+    print("%10s %16s %16s %8s" % ("probe us", "no queues buf/s",
+                                  "queues buf/s", "speedup"))
+    plan = []
+    for probe_us in options.probe_us or PROBE_US:
+        before, _ = run_case(probe_us, False, options.num_buffers)
+        after, plan = run_case(probe_us, True, options.num_buffers)
+        print("%10d %16.1f %16.1f %8.2f" % (probe_us, before, after,
+                                            after / before))
+    print()
+    print("Queues inserted:")
+    for boundary in plan:
+        print("  %s:%s -> %s:%s (%s)" % (boundary.src, boundary.src_pad,
+                                         boundary.dst, boundary.dst_pad,
+                                         ", ".join(boundary.reasons)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
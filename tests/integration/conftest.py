@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import gi
+import pytest
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+
+@pytest.fixture(scope="session")
+def gst_init():
+    """ Initializes GStreamer once for the whole session """
+    Gst.init(None)
+
+
+@pytest.fixture(scope="session")
+def pipeline_cache(gst_init):
+    """ Builds each pipeline once per session and resets it between tests.
+
+    pipeline_cache(PipelineFakesink, properties, is_integrated_gpu()) gives
+    the pipeline built with these arguments, reset() if an earlier test
+    used it: same elements and properties, no probe. Creating the elements
+    and loading the inference plugins is paid once per set of arguments.
+    """
+    pipelines = {}
+
+    def get(pipeline_class, *args):
+        key = (pipeline_class, json.dumps(args, sort_keys=True, default=str))
+        pipeline = pipelines.get(key)
+        if pipeline is None:
+            pipeline = pipelines[key] = pipeline_class(*args)
+        else:
+            pipeline.reset()
+        return pipeline
+
+    yield get
+    for pipeline in pipelines.values():
+        pipeline.reset()
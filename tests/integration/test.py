@@ -28,6 +28,7 @@ from tests.testcommon.utils import is_integrated_gpu
 import sys
 sys.path.append('../../apps/')
 from common.platform_info import PlatformInfo
+from common.meta_iter import iter_obj_user_meta
 
 VIDEO_PATH1 = "/opt/nvidia/deepstream/deepstream/samples/streams/sample_720p.h264"
 STANDARD_PROPERTIES1 = {
@@ -76,7 +77,7 @@ STANDARD_CLASS_ID1 = {
 }
 
 
-def test_pipeline1():
+def test_pipeline1(pipeline_cache):
     ### INIT DATA
 
     # defining the function to be called at each frame
@@ -103,7 +104,8 @@ def test_pipeline1():
     probe_function = FrameIterator(frame_function, box_function, data_probe)
 
     # Creating the pipeline
-    sp = PipelineFakesink(STANDARD_PROPERTIES1, is_integrated_gpu())
+    sp = pipeline_cache(PipelineFakesink, STANDARD_PROPERTIES1,
+                        is_integrated_gpu())
     # registering the probe function
     sp.set_probe(probe_function)
 
@@ -117,7 +119,7 @@ def test_pipeline1():
     assert data_probe["obj_counter"]["bicycle"] > 0
 
 
-def test_pipeline2():
+def test_pipeline2(pipeline_cache):
     ### INIT DATA
 
     # defining the function to be called at each frame
@@ -169,22 +171,11 @@ def test_pipeline2():
         pgie_class_id = dict_data["pgie_class_id"]
         obj_counter[pgie_class_id[obj_meta.class_id]] += 1
 
-        l_obj_user_meta = obj_meta.obj_user_meta_list
-        while l_obj_user_meta is not None:
-            try:
-                user_meta=pyds.NvDsUserMeta.cast(l_obj_user_meta.data)
-                if not user_meta.base_meta.meta_type == pyds.NvDsMetaType.NVDS_TRACKER_OBJ_REID_META:
-                    continue
-                reid=pyds.NvDsObjReid.cast(user_meta.user_meta_data)
-                vec = reid.get_host_reid_vector()
-                assert reid.featureSize == vec.size
-                # print(f"reid featureSize {reid.featureSize} == {vec.__class__} == {vec.size}")
-            except StopIteration:
-                break
-            try:
-                l_obj_user_meta=l_obj_user_meta.next
-            except StopIteration:
-                break
+        for user_meta in iter_obj_user_meta(obj_meta, pyds.NvDsMetaType.NVDS_TRACKER_OBJ_REID_META):
+            reid=pyds.NvDsObjReid.cast(user_meta.user_meta_data)
+            vec = reid.get_host_reid_vector()
+            assert reid.featureSize == vec.size
+            # print(f"reid featureSize {reid.featureSize} == {vec.__class__} == {vec.size}")
 
     tracker_cfg = get_tracker_properties_from_config("ds_tracker_config.txt")
     properties = {
@@ -228,7 +219,8 @@ def test_pipeline2():
                                    user_function)
 
     # Creating the pipeline
-    sp = PipelineFakesinkTracker(properties, is_integrated_gpu())
+    sp = pipeline_cache(PipelineFakesinkTracker, properties,
+                        is_integrated_gpu())
     # registering the probe function
     sp.set_probe(probe_function)
 
@@ -242,7 +234,7 @@ def test_pipeline2():
         assert qty > 0
 
 
-def test_pipeline3():
+def test_pipeline3(pipeline_cache):
     # Skip test on WSL due to libjpeg.so segmentation fault
     if platform_info.is_wsl():
         pytest.skip("Skipping test_pipeline3 on WSL due to known issue in object encoding")
@@ -250,7 +242,8 @@ def test_pipeline3():
     ### INIT DATA
 
     # Creating the pipeline
-    sp = PipelineFakesink(STANDARD_PROPERTIES1, is_integrated_gpu())
+    sp = pipeline_cache(PipelineFakesink, STANDARD_PROPERTIES1,
+                        is_integrated_gpu())
 
     # Create Context for Object Encoding.
     # Takes GPU ID as a parameter.
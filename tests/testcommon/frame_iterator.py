@@ -15,31 +15,157 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+
+import numpy as np
 import pyds
 import gi
 
 gi.require_version('Gst', '1.0')
 from gi.repository import GObject, Gst
 
+# Rows of the arrays handed to the BatchFrameIterator callback
+FRAME_DTYPE = np.dtype([
+    ("source_id", np.uint32),
+    ("pad_index", np.uint32),
+    ("frame_num", np.int32),
+    ("buf_pts", np.uint64),
+    ("num_obj_meta", np.uint32),
+])
+OBJECT_DTYPE = np.dtype([
+    ("source_id", np.uint32),
+    ("frame_num", np.int32),
+    ("class_id", np.int32),
+    ("object_id", np.uint64),
+    ("confidence", np.float32),
+    ("bbox", np.float32, (4,)),  # left, top, width, height
+])
+
 
 class FrameIterator:
+    """ Pad probe walking the frames, objects and batch user metas of a batch.
+
+    fun_obj and fun_user are called for every object and every user meta.
+    Handlers can also be registered for a single class_id,
+    unique_component_id or NvDsMetaType:
+        probe.add_class_handler(PGIE_CLASS_ID_PERSON, person_function)
+        probe.add_component_handler(SGIE_UNIQUE_ID, sgie_function)
+        probe.add_meta_type_handler(
+            pyds.NvDsMetaType.NVDS_TRACKER_PAST_FRAME_META, past_function)
+    The handlers of each (unique_component_id, class_id) pair and of each
+    meta type are looked up once and cached, so objects and metas nobody
+    subscribed to cost a dict lookup and no Python call. When no object
+    handler is registered at all the object lists are not walked.
+
+    To keep a slow probe from stalling the streaming thread:
+      time_budget   seconds allowed per batch. It is checked between
+                    frames, once spent the remaining frames and the user
+                    metas of the batch are skipped.
+      decimation    only process every Nth frame of each stream.
+      min_interval  only process a frame of a stream if at least
+                    min_interval seconds went by since its last processed
+                    frame.
+    stats counts the processed and skipped batches and frames, a batch is
+    skipped when none of its frames was processed, and over_budget_batches
+    counts the batches cut short by time_budget.
+    """
 
-    def __init__(self, fun_frame, fun_obj, data_dict, fun_user=None, fun_post_process=None):
+    def __init__(self, fun_frame, fun_obj, data_dict, fun_user=None, fun_post_process=None,
+                 time_budget=None, decimation=1, min_interval=None):
         self._fun_frame = fun_frame
         self._fun_obj = fun_obj
         self._fun_user = fun_user
         self._data_dict = data_dict
         self._fun_post_process = fun_post_process
+        self._class_handlers = {}
+        self._component_handlers = {}
+        self._meta_type_handlers = {}
+        self._obj_table = {}
+        self._user_table = {}
+        self._time_budget = time_budget
+        self._decimation = max(1, decimation)
+        self._min_interval = min_interval
+        self._stream_frames = {}
+        self._stream_last_processed = {}
+        self.stats = {
+            "processed_batches": 0,
+            "skipped_batches": 0,
+            "over_budget_batches": 0,
+            "processed_frames": 0,
+            "skipped_frames": 0,
+        }
 
-    def _process_frame_function(self, batch_meta, frame_meta, gst_buffer):
-        self._fun_frame(batch_meta, frame_meta, self._data_dict, gst_buffer)
+    def add_class_handler(self, class_id, fun_obj):
+        """ fun_obj(batch_meta, frame_meta, obj_meta, data_dict, gst_buffer)
+        is called for the objects of class_id only.
+        """
+        self._class_handlers.setdefault(class_id, []).append(fun_obj)
+        self._obj_table = {}
+
+    def add_component_handler(self, unique_component_id, fun_obj):
+        """ fun_obj(batch_meta, frame_meta, obj_meta, data_dict, gst_buffer)
+        is called for the objects of the inference component
+        unique_component_id only.
+        """
+        self._component_handlers.setdefault(unique_component_id,
+                                            []).append(fun_obj)
+        self._obj_table = {}
+
+    def add_meta_type_handler(self, meta_type, fun_user):
+        """ fun_user(batch_meta, user_meta, data_dict, gst_buffer) is called
+        for the batch user metas of meta_type only.
+        """
+        self._meta_type_handlers.setdefault(meta_type, []).append(fun_user)
+        self._user_table = {}
+
+    def _obj_handlers(self, unique_component_id, class_id):
+        key = (unique_component_id, class_id)
+        handlers = self._obj_table.get(key)
+        if handlers is None:
+            handlers = []
+            if self._fun_obj:
+                handlers.append(self._fun_obj)
+            handlers.extend(self._component_handlers.get(unique_component_id, ()))
+            handlers.extend(self._class_handlers.get(class_id, ()))
+            handlers = tuple(handlers)
+            self._obj_table[key] = handlers
+        return handlers
 
-    def _process_obj_function(self, batch_meta, frame_meta, obj_meta, gst_buffer):
-        self._fun_obj(batch_meta, frame_meta, obj_meta, self._data_dict, gst_buffer)
+    def _user_handlers(self, meta_type):
+        handlers = self._user_table.get(meta_type)
+        if handlers is None:
+            handlers = []
+            if self._fun_user:
+                handlers.append(self._fun_user)
+            handlers.extend(self._meta_type_handlers.get(meta_type, ()))
+            handlers = tuple(handlers)
+            self._user_table[meta_type] = handlers
+        return handlers
 
-    def _process_user_function(self, batch_meta, user_meta, gst_buffer):
-        if self._fun_user:
-            self._fun_user(batch_meta, user_meta, self._data_dict, gst_buffer)
+    def _has_obj_handlers(self):
+        return bool(self._fun_obj or self._class_handlers
+                    or self._component_handlers)
+
+    def _has_user_handlers(self):
+        return bool(self._fun_user or self._meta_type_handlers)
+
+    def _decimated(self, source_id, now):
+        """ True when the frame of source_id must be skipped """
+        if self._decimation > 1:
+            count = self._stream_frames.get(source_id, 0)
+            self._stream_frames[source_id] = count + 1
+            if count % self._decimation:
+                return True
+        if self._min_interval is not None:
+            last = self._stream_last_processed.get(source_id)
+            if last is not None and now - last < self._min_interval:
+                return True
+            self._stream_last_processed[source_id] = now
+        return False
+
+    def _process_frame_function(self, batch_meta, frame_meta, gst_buffer):
+        if self._fun_frame:
+            self._fun_frame(batch_meta, frame_meta, self._data_dict, gst_buffer)
 
     def _post_process_function(self, gst_buffer):
         if self._fun_post_process:
@@ -53,6 +179,17 @@ class FrameIterator:
             return
 
         batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+        walk_objects = self._has_obj_handlers()
+        # The handler tables are looked up inline: the objects and metas
+        # nobody subscribed to must not cost a Python call.
+        obj_table = self._obj_table
+        data_dict = self._data_dict
+        stats = self.stats
+        start = time.perf_counter()
+        deadline = start + self._time_budget if self._time_budget is not None else None
+        throttled = self._decimation > 1 or self._min_interval is not None
+        processed = 0
+        over_budget = False
         l_frame = batch_meta.frame_meta_list
         while l_frame is not None:
             try:
@@ -60,13 +197,30 @@ class FrameIterator:
             except StopIteration:
                 break
 
-            l_obj = frame_meta.obj_meta_list
+            if deadline is not None and time.perf_counter() > deadline:
+                over_budget = True
+            if over_budget or (throttled and self._decimated(frame_meta.source_id, start)):
+                stats["skipped_frames"] += 1
+                try:
+                    l_frame = l_frame.next
+                except StopIteration:
+                    break
+                continue
+            processed += 1
+
+            l_obj = frame_meta.obj_meta_list if walk_objects else None
             while l_obj is not None:
                 try:
                     obj_meta = pyds.NvDsObjectMeta.cast(l_obj.data)
                 except StopIteration:
                     break
-                self._process_obj_function(batch_meta, frame_meta, obj_meta, gst_buffer)
+                handlers = obj_table.get((obj_meta.unique_component_id,
+                                          obj_meta.class_id))
+                if handlers is None:
+                    handlers = self._obj_handlers(obj_meta.unique_component_id,
+                                                  obj_meta.class_id)
+                for fun_obj in handlers:
+                    fun_obj(batch_meta, frame_meta, obj_meta, data_dict, gst_buffer)
 
                 try:
                     l_obj = l_obj.next
@@ -80,13 +234,29 @@ class FrameIterator:
             except StopIteration:
                 break
 
-        l_user = batch_meta.batch_user_meta_list
+        stats["processed_frames"] += processed
+        if over_budget:
+            stats["over_budget_batches"] += 1
+        if processed:
+            stats["processed_batches"] += 1
+        else:
+            stats["skipped_batches"] += 1
+
+        user_table = self._user_table
+        l_user = None
+        if processed and not over_budget and self._has_user_handlers():
+            l_user = batch_meta.batch_user_meta_list
         while l_user is not None:
             try:
                 user_meta = pyds.NvDsUserMeta.cast(l_user.data)
             except StopIteration:
                 break
-            self._process_user_function(batch_meta, user_meta, gst_buffer)
+            meta_type = user_meta.base_meta.meta_type
+            handlers = user_table.get(meta_type)
+            if handlers is None:
+                handlers = self._user_handlers(meta_type)
+            for fun_user in handlers:
+                fun_user(batch_meta, user_meta, data_dict, gst_buffer)
             try:
                 l_user = l_user.next
             except StopIteration:
@@ -95,3 +265,73 @@ class FrameIterator:
         self._post_process_function(gst_buffer)
 
         return Gst.PadProbeReturn.OK
+
+
+class BatchFrameIterator(FrameIterator):
+    """ Batch mode of FrameIterator.
+
+    Walks the batch once and gathers frames and objects into NumPy
+    structured arrays (FRAME_DTYPE and OBJECT_DTYPE), then makes a single
+    call per batch:
+        fun_batch(batch_meta, frames, objects, data_dict, gst_buffer)
+    so that counting and filtering can be done with vectorized NumPy, e.g.
+        np.bincount(objects["class_id"])
+        objects[objects["confidence"] > 0.5]
+    """
+
+    def __init__(self, fun_batch, data_dict, fun_post_process=None):
+        super().__init__(None, None, data_dict,
+                         fun_post_process=fun_post_process)
+        self._fun_batch = fun_batch
+
+    def __call__(self, pad, info, u_data):
+
+        gst_buffer = info.get_buffer()
+        if not gst_buffer:
+            print("Unable to get GstBuffer ")
+            return
+
+        batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+        frame_rows = []
+        object_rows = []
+        l_frame = batch_meta.frame_meta_list
+        while l_frame is not None:
+            try:
+                frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
+            except StopIteration:
+                break
+
+            source_id = frame_meta.source_id
+            frame_num = frame_meta.frame_num
+            frame_rows.append((source_id, frame_meta.pad_index, frame_num,
+                               frame_meta.buf_pts, frame_meta.num_obj_meta))
+
+            l_obj = frame_meta.obj_meta_list
+            while l_obj is not None:
+                try:
+                    obj_meta = pyds.NvDsObjectMeta.cast(l_obj.data)
+                except StopIteration:
+                    break
+                rect = obj_meta.rect_params
+                object_rows.append((source_id, frame_num, obj_meta.class_id,
+                                    obj_meta.object_id, obj_meta.confidence,
+                                    (rect.left, rect.top, rect.width,
+                                     rect.height)))
+                try:
+                    l_obj = l_obj.next
+                except StopIteration:
+                    break
+
+            try:
+                l_frame = l_frame.next
+            except StopIteration:
+                break
+
+        frames = np.array(frame_rows, dtype=FRAME_DTYPE)
+        objects = np.array(object_rows, dtype=OBJECT_DTYPE)
+        self._fun_batch(batch_meta, frames, objects, self._data_dict,
+                        gst_buffer)
+
+        self._post_process_function(gst_buffer)
+
+        return Gst.PadProbeReturn.OK
@@ -15,24 +15,32 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import os
 import sys
+import time
 
 sys.path.append('../')
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../apps'))
 import gi
 
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst, GLib
-from tests.testcommon.utils import bus_call
+from tests.testcommon.latency_tracer import LatencyTracer
+from common.bus_call import BusDispatcher
+from common.pad_profiler import PadProfiler
+from common.qos import QosAggregator
+from common.queue_planner import insert_queues, plan_queues
 
 
 class PipelineElement:
     """ Element containing information about gst element
     """
 
-    def __init__(self, elm_type, name):
+    def __init__(self, elm_type, name, content=None):
         self.type = elm_type
         self.name = name
-        self.content = Gst.ElementFactory.make(elm_type, name)
+        self.content = content or Gst.ElementFactory.make(elm_type, name)
         if not self.content:
             raise Exception(f"Unable to create {name} \n")
 
@@ -46,11 +54,17 @@ class GenericPipeline:
                  data_pipeline_arm64):
         self._pipeline = None
         self._loop = None
+        self._latency_tracer = None
+        self._pad_profiler = None
+        self._probes = []
         self._pipeline_content = {}
         self._properties = properties
         self._is_integrated_gpu = is_integrated_gpu
         self._data_pipeline = data_pipeline
         self._data_pipeline_arm64 = data_pipeline_arm64
+        # (source element, message) of every error posted on the bus
+        self.bus_errors = []
+        self.run_count = 0
         # Standard GStreamer initialization
         Gst.init(None)
 
@@ -59,9 +73,18 @@ class GenericPipeline:
 
         # create an event loop and feed gstreamer bus mesages to it
         self._loop = GLib.MainLoop()
-        bus = self._pipeline.get_bus()
-        bus.add_signal_watch()
-        bus.connect("message", bus_call, self._loop)
+        self.bus_dispatcher = BusDispatcher(self._loop)
+        self.bus_dispatcher.add_handler(Gst.MessageType.ERROR,
+                                        self._on_bus_error)
+        # QoS messages of the sinks and decoders, per element
+        self.qos = QosAggregator()
+        self.qos.attach(self.bus_dispatcher)
+        self.bus_dispatcher.attach(self._pipeline.get_bus())
+
+    def _on_bus_error(self, dispatcher, message):
+        err, debug = message.parse_error()
+        source = message.src.get_name() if message.src else None
+        self.bus_errors.append((source, "%s: %s" % (err, debug)))
 
     def _set_property(self, name, dict_properties):
         pe = self._get_elm_by_name(name)
@@ -83,6 +106,62 @@ class GenericPipeline:
     def set_probe(self, probe_function):
         raise Exception("Generic class call not allowed")
 
+    def _add_probe(self, pad, probe_function,
+                   probe_type=Gst.PadProbeType.BUFFER):
+        """ Adds a probe removed by reset() """
+        probe_id = pad.add_probe(probe_type, probe_function, 0)
+        self._probes.append((pad, probe_id))
+        return probe_id
+
+    def remove_probes(self):
+        for pad, probe_id in self._probes:
+            pad.remove_probe(probe_id)
+        self._probes = []
+
+    def set_latency_tracer(self, max_pending=1024, max_samples=4096):
+        """ Opt-in per-element and end-to-end latency measurement.
+
+        Must be called once the pipeline is linked, before run(). Returns
+        the LatencyTracer holding the results.
+        """
+        if self._latency_tracer:
+            return self._latency_tracer
+        elements = [(name, elm.content, elm.type)
+                    for name, elm in self._pipeline_content.items()]
+        self._latency_tracer = LatencyTracer(elements, max_pending,
+                                             max_samples)
+        self._latency_tracer.attach()
+        return self._latency_tracer
+
+    def insert_queues(self, probed=(), properties=None, queue_properties=None,
+                      **rules):
+        """ Splits the pipeline into streaming threads with queues.
+
+        Must be called once the pipeline is linked, before run(). probed
+        names the elements with a Python probe, see
+        common.queue_planner.plan_queues() for the other rules and
+        insert_queues() for the properties. Returns the plan applied.
+        """
+        plan = plan_queues(self._pipeline, probed=probed, **rules)
+        queues = insert_queues(self._pipeline, plan, properties,
+                               queue_properties)
+        for queue in queues:
+            self._pipeline_content[queue.get_name()] = PipelineElement(
+                "queue", queue.get_name(), queue)
+        return plan
+
+    def set_pad_profiler(self, target_fps=None):
+        """ Opt-in buffer, byte and gap counters on every src pad.
+
+        Must be called once the pipeline is linked, before run(). Returns
+        the PadProfiler, whose dump() writes the annotated DOT and JSON.
+        """
+        if self._pad_profiler:
+            return self._pad_profiler
+        self._pad_profiler = PadProfiler(self._pipeline, target_fps)
+        self._pad_profiler.attach()
+        return self._pad_profiler
+
     def _create_element(self, elm):
         if elm[1] in self._pipeline_content:
             raise Exception(f"An element named {elm[1]} already exist"
@@ -115,8 +194,122 @@ class GenericPipeline:
 
         return True
 
+    def reset(self, properties=None):
+        """ Makes the pipeline ready to run() again with new probes.
+
+        The elements are kept, only the pipeline state goes back to NULL.
+        The probes, the latency tracer, the pad profiler, the bus errors
+        and the QoS totals are dropped, the properties given at construction
+        are applied again and then properties, which only last until the next reset().
+        """
+        self._pipeline.set_state(Gst.State.NULL)
+        self._pipeline.get_state(Gst.CLOCK_TIME_NONE)
+        bus = self._pipeline.get_bus()
+        # Messages left from the previous run must not stop the next one
+        bus.set_flushing(True)
+        bus.set_flushing(False)
+        self.remove_probes()
+        if self._latency_tracer:
+            self._latency_tracer.detach()
+            self._latency_tracer = None
+        if self._pad_profiler:
+            self._pad_profiler.detach()
+            self._pad_profiler = None
+        self.bus_errors = []
+        self.bus_dispatcher.reset()
+        self.qos.reset()
+        self._set_properties(self._properties)
+        if properties:
+            self._set_properties(properties)
+
     def run(self):
         print("Starting pipeline \n")
+        self.run_count += 1
         self._pipeline.set_state(Gst.State.PLAYING)
         self._loop.run()
         self._pipeline.set_state(Gst.State.NULL)
+
+    def _count_pad(self, element_name):
+        if element_name is not None:
+            element = self._get_elm_by_name(element_name)
+        else:
+            sinks = []
+            self._pipeline.iterate_sinks().foreach(sinks.append)
+            if not sinks:
+                raise Exception("No sink element to count buffers on")
+            element = sinks[0]
+        return element.get_static_pad("sink")
+
+    def _send_eos(self, result, reason):
+        if result["stopped"] is None:
+            result["stopped"] = reason
+            self._pipeline.send_event(Gst.Event.new_eos())
+
+    async def run_async(self, timeout=None, max_buffers=None,
+                        drain_timeout=5.0, count_element=None):
+        """ Awaitable run(), the GLib loop runs in a thread of the default
+        executor while the asyncio loop stays free for other work.
+
+        The run ends at EOS, or once timeout seconds have passed, or once
+        max_buffers buffers reached count_element (by default the first
+        sink), the buffers after it are dropped. In the last two cases, and
+        when the task is cancelled, an EOS is sent to the sources so that
+        the elements drain the buffers in flight; if no EOS reaches the bus
+        within drain_timeout seconds the loop is stopped anyway.
+
+        Returns {"stopped": None, "timeout", "max-buffers" or "cancelled",
+        "drained": whether the run ended on EOS without error, "buffers": counted buffers
+        or None, "elapsed": seconds}.
+        """
+        loop = asyncio.get_running_loop()
+        result = {"stopped": None, "drained": False, "buffers": None,
+                  "elapsed": 0.0}
+        count_pad = count_probe_id = None
+        if max_buffers is not None:
+            count_pad = self._count_pad(count_element)
+            result["buffers"] = 0
+
+            def count_probe(pad, info, u_data):
+                if result["buffers"] >= max_buffers:
+                    return Gst.PadProbeReturn.DROP
+                result["buffers"] += 1
+                if result["buffers"] == max_buffers:
+                    self._send_eos(result, "max-buffers")
+                return Gst.PadProbeReturn.OK
+
+            count_probe_id = count_pad.add_probe(Gst.PadProbeType.BUFFER,
+                                                 count_probe, 0)
+
+        print("Starting pipeline \n")
+        self.run_count += 1
+        start = time.monotonic()
+        self._pipeline.set_state(Gst.State.PLAYING)
+        # wait_for() cancels what it waits for on timeout, so it gets a new
+        # shield each time and done() is asked to the executor future itself.
+        loop_done = loop.run_in_executor(None, self._loop.run)
+        try:
+            try:
+                await asyncio.wait_for(asyncio.shield(loop_done), timeout)
+                result["drained"] = not self.bus_errors
+            except asyncio.TimeoutError:
+                self._send_eos(result, "timeout")
+            except asyncio.CancelledError:
+                self._send_eos(result, "cancelled")
+                raise
+            finally:
+                if not loop_done.done():
+                    try:
+                        await asyncio.wait_for(asyncio.shield(loop_done),
+                                               drain_timeout)
+                        result["drained"] = not self.bus_errors
+                    except asyncio.TimeoutError:
+                        # idle_add() runs quit() from the loop itself, safe
+                        # from this thread and even if run() has not started.
+                        GLib.idle_add(self._loop.quit)
+                        await loop_done
+        finally:
+            if count_probe_id is not None:
+                count_pad.remove_probe(count_probe_id)
+            self._pipeline.set_state(Gst.State.NULL)
+            result["elapsed"] = time.monotonic() - start
+        return result
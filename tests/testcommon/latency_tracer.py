@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+QUEUE_ELEMENTS = ("queue", "queue2", "multiqueue")
+END_TO_END = "end-to-end"
+
+
+class LatencySamples:
+    """ Fixed-size ring of latency samples in seconds, pushed from the
+    streaming threads of several pads
+    """
+
+    def __init__(self, size):
+        self._samples = np.zeros(size, dtype=np.float64)
+        self._size = size
+        self._pos = 0
+        self._lock = Lock()
+        self.count = 0
+
+    def push(self, value):
+        with self._lock:
+            self._samples[self._pos] = value
+            self._pos = (self._pos + 1) % self._size
+            self.count += 1
+
+    def values(self):
+        with self._lock:
+            return self._samples[:min(self.count, self._size)].copy()
+
+
+class LatencyTracer:
+    """ Measures the time buffers spend in each element of a pipeline.
+
+    A buffer probe on every sink and src pad stamps buffers by PTS. The time
+    between the sink and src pad of an element is its in-element latency,
+    reported as queue wait for queue elements. The time between the src pad
+    of the sources and the sink pad of the sinks is the end-to-end latency.
+
+    Buffers are matched by PTS, so elements that retimestamp buffers, or
+    several sources producing the same PTS before a muxer, are not told
+    apart. Buffers never seen on the other pad are forgotten once more
+    than max_pending buffers are in flight in an element.
+
+    Each src pad of an element, and each sink element for the end-to-end
+    latency, waits for the buffers on its own: a tee records one sample per
+    branch. An element pushing each buffer to one of its src pads only, a
+    demuxer, leaves the buffer pending on the others until max_pending
+    drops it.
+
+    The sink and src pads of an element, a queue in particular, run on
+    different streaming threads: the pending buffers are guarded by a lock,
+    the samples by one of their own.
+    """
+
+    def __init__(self, elements, max_pending=1024, max_samples=4096):
+        """ elements: list of (name, Gst.Element, factory name) in pipeline
+        order
+        """
+        self._elements = elements
+        self._max_pending = max_pending
+        self._max_samples = max_samples
+        # {element: [pending buffers of each src pad]}
+        self._pending = {}
+        self._pending_lock = Lock()
+        self._samples = {}
+        self._kinds = {}
+        self._probes = []
+        # {sink element: buffers from the sources not seen by it yet}
+        self._source_times = {}
+
+    def _add_sample(self, stage, value):
+        self._samples[stage].push(value)
+
+    def _remember(self, pending, pts, now):
+        with self._pending_lock:
+            pending[pts] = now
+            if len(pending) > self._max_pending:
+                pending.popitem(last=False)
+
+    def _forget(self, pending, pts):
+        """ Time pts was remembered at, None if it never was """
+        with self._pending_lock:
+            return pending.pop(pts, None)
+
+    def _sink_probe(self, pad, info, name):
+        buffer = info.get_buffer()
+        if buffer is None or buffer.pts == Gst.CLOCK_TIME_NONE:
+            return Gst.PadProbeReturn.OK
+        now = time.perf_counter()
+        pending_pads = self._pending.get(name)
+        if pending_pads is not None:
+            for pending in pending_pads:
+                self._remember(pending, buffer.pts, now)
+        else:
+            # Sink element: the buffer leaves the pipeline here
+            started = self._forget(self._source_times[name], buffer.pts)
+            if started is not None:
+                self._add_sample(END_TO_END, now - started)
+        return Gst.PadProbeReturn.OK
+
+    def _src_probe(self, pad, info, data):
+        name, pending = data
+        buffer = info.get_buffer()
+        if buffer is None or buffer.pts == Gst.CLOCK_TIME_NONE:
+            return Gst.PadProbeReturn.OK
+        now = time.perf_counter()
+        if pending is None:
+            # Source element: the buffer enters the pipeline here
+            for source_times in self._source_times.values():
+                self._remember(source_times, buffer.pts, now)
+        else:
+            entered = self._forget(pending, buffer.pts)
+            if entered is not None:
+                self._add_sample(name, now - entered)
+        return Gst.PadProbeReturn.OK
+
+    def attach(self):
+        self._samples[END_TO_END] = LatencySamples(self._max_samples)
+        self._kinds[END_TO_END] = END_TO_END
+        for name, element, factory in self._elements:
+            sinkpads = list(element.sinkpads)
+            srcpads = list(element.srcpads)
+            pending_pads = [None] * len(srcpads)
+            if sinkpads and srcpads:
+                pending_pads = [OrderedDict() for _ in srcpads]
+                self._pending[name] = pending_pads
+                self._samples[name] = LatencySamples(self._max_samples)
+                self._kinds[name] = ("queue" if factory in QUEUE_ELEMENTS
+                                     else "element")
+            elif sinkpads:
+                self._source_times[name] = OrderedDict()
+            for pad in sinkpads:
+                probe_id = pad.add_probe(Gst.PadProbeType.BUFFER,
+                                         self._sink_probe, name)
+                self._probes.append((pad, probe_id))
+            for pad, pending in zip(srcpads, pending_pads):
+                probe_id = pad.add_probe(Gst.PadProbeType.BUFFER,
+                                         self._src_probe, (name, pending))
+                self._probes.append((pad, probe_id))
+
+    def detach(self):
+        for pad, probe_id in self._probes:
+            pad.remove_probe(probe_id)
+        self._probes = []
+
+    def get_stats(self):
+        """ {stage: {"kind", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}
+
+        kind is "element" for in-element time, "queue" for queue wait and
+        "end-to-end" for the whole pipeline.
+        """
+        stats = {}
+        for stage, samples in self._samples.items():
+            values = samples.values() * 1000.0
+            stage_stats = {"kind": self._kinds[stage], "count": samples.count}
+            if len(values):
+                p50, p95, p99 = np.percentile(values, (50, 95, 99))
+                stage_stats.update({
+                    "p50_ms": round(float(p50), 3),
+                    "p95_ms": round(float(p95), 3),
+                    "p99_ms": round(float(p99), 3),
+                    "max_ms": round(float(values.max()), 3),
+                })
+            stats[stage] = stage_stats
+        return stats
+
+    def get_histogram(self, stage, bin_edges_ms):
+        """ Counts of the latency samples of a stage in each bin (ms) """
+        counts, _ = np.histogram(self._samples[stage].values() * 1000.0,
+                                 bins=bin_edges_ms)
+        return counts
+
+    def print_stats(self):
+        for stage, stage_stats in self.get_stats().items():
+            print(stage, stage_stats)
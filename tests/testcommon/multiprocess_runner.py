@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Runs the streams of a list of URIs in several worker processes.
+
+One process runs the probes of all its streams under a single GIL. The
+runner splits the URIs into num_workers shards, round robin, and starts
+one process per shard building its own pipeline and GLib main loop:
+
+    def make_pipeline(uris, perf_data):
+        pipeline = MyPipeline(uris, is_integrated_gpu())
+        pipeline.set_probe(perf_probe(perf_data))
+        return pipeline
+
+    runner = MultiProcessRunner(uris, make_pipeline, num_workers=4)
+    runner.run()
+    print(runner.total_fps, runner.errors)
+
+pipeline_factory(uris, perf_data) is called in the worker, it must be a
+module level function so that it can be pickled. perf_data is a
+PERF_DATA with one "streamN" counter per URI of the shard, N being the
+position of the URI in the shard. The returned object must have a run()
+method returning at the end of the pipeline, a GenericPipeline.
+
+Every report_interval seconds the workers send the frame rate of their
+streams to the supervisor over a pipe per worker, keyed by the global
+"streamN" of the URI in the full list. Exceptions of the factory or of
+run(), and the errors posted on the bus of a GenericPipeline, are sent
+the same way and gathered in errors. A worker killed by a signal, a
+segfault of the pipeline, closes its pipe and is reported in errors with
+its exit code; having a pipe of its own, it cannot block the reports of
+the other workers as a shared queue would when killed while writing.
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import threading
+import time
+import traceback
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../apps'))
+from common.platform_info import PlatformInfo
+
+REPORT_FPS = "fps"
+REPORT_ERROR = "error"
+REPORT_EXIT = "exit"
+
+
+def default_num_workers(num_uris):
+    """ One worker per usable core, within the cgroup CPU and memory
+    quotas, never more than the number of URIs
+    """
+    return PlatformInfo().recommended_shards(num_uris)
+
+
+def shard_uris(uris, num_workers):
+    """ Splits uris round robin into num_workers lists of (stream index, uri).
+
+    Round robin keeps the shards within one URI of each other whatever the
+    order of the list. Workers left without URI get an empty list.
+    """
+    if num_workers < 1:
+        raise ValueError("num_workers must be at least 1, got %d" % num_workers)
+    shards = [[] for _ in range(num_workers)]
+    for i, uri in enumerate(uris):
+        shards[i % num_workers].append((i, uri))
+    return shards
+
+
+def perf_probe(perf_data):
+    """ Pad probe counting the frames of every batch in perf_data """
+    from gi.repository import Gst
+    import pyds
+
+    def probe(pad, info, u_data):
+        gst_buffer = info.get_buffer()
+        if gst_buffer:
+            perf_data.update_batch(
+                pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer)))
+        return Gst.PadProbeReturn.OK
+
+    return probe
+
+
+def _stream_fps(perf_data, stream_names):
+    return {stream_names.get(name, name): stream.get_fps()
+            for name, stream in perf_data.all_stream_fps.items()}
+
+
+def _worker_main(index, shard, pipeline_factory, connection, report_interval):
+    from common.FPS import PERF_DATA
+
+    stream_names = {"stream{0}".format(i): "stream{0}".format(stream_index)
+                    for i, (stream_index, _) in enumerate(shard)}
+    perf_data = PERF_DATA(len(shard))
+    stopped = threading.Event()
+    send_lock = threading.Lock()
+
+    def send(kind, payload):
+        # The reporter thread and the main thread share the connection
+        with send_lock:
+            connection.send((kind, index, payload))
+
+    def report():
+        while not stopped.wait(report_interval):
+            send(REPORT_FPS, _stream_fps(perf_data, stream_names))
+
+    pipeline = None
+    reporter = threading.Thread(target=report, name="fps-report-%d" % index,
+                                daemon=True)
+    try:
+        pipeline = pipeline_factory([uri for _, uri in shard], perf_data)
+        reporter.start()
+        pipeline.run()
+    except Exception:
+        send(REPORT_ERROR, traceback.format_exc())
+    finally:
+        stopped.set()
+        if reporter.is_alive():
+            reporter.join()
+        for source, error in getattr(pipeline, "bus_errors", ()):
+            send(REPORT_ERROR, "%s: %s" % (source, error))
+        totals = {stream_names.get(name, name): stream.total_frames
+                  for name, stream in perf_data.all_stream_fps.items()}
+        send(REPORT_EXIT, totals)
+        connection.close()
+
+
+class MultiProcessRunner:
+    """ Supervisor of the worker processes, see the module documentation.
+
+    After run(), or while it runs from on_report:
+        worker_fps    {worker: {"streamN": fps}} of the latest reports
+        errors        [(worker, message)] in the order received
+        total_frames  {"streamN": frames} sent by the workers on exit
+        exitcodes     {worker: exit code of the process}
+    """
+
+    def __init__(self, uris, pipeline_factory, num_workers=None,
+                 report_interval=1.0, start_method="spawn"):
+        if num_workers is None:
+            num_workers = default_num_workers(len(uris))
+        self.shards = [shard for shard in shard_uris(uris, num_workers) if shard]
+        self.worker_fps = {}
+        self.errors = []
+        self.total_frames = {}
+        self.exitcodes = {}
+        self._pipeline_factory = pipeline_factory
+        self._report_interval = report_interval
+        # GLib and the GStreamer plugins do not survive a fork once
+        # initialized, spawned workers start from a clean interpreter.
+        self._context = multiprocessing.get_context(start_method)
+        self._processes = []
+
+    @property
+    def num_workers(self):
+        return len(self.shards)
+
+    @property
+    def stream_fps(self):
+        """ {"streamN": fps} of all the workers """
+        fps = {}
+        for worker_fps in self.worker_fps.values():
+            fps.update(worker_fps)
+        return fps
+
+    @property
+    def total_fps(self):
+        return round(sum(self.stream_fps.values()), 2)
+
+    def _handle(self, message, running, on_report):
+        kind, index, payload = message
+        if kind == REPORT_FPS:
+            self.worker_fps[index] = payload
+            if on_report is not None:
+                on_report(self)
+        elif kind == REPORT_ERROR:
+            self.errors.append((index, payload))
+            sys.stderr.write("Worker %d: %s\n" % (index, payload))
+        elif kind == REPORT_EXIT:
+            self.total_frames.update(payload)
+            running.discard(index)
+
+    def start(self):
+        """ Starts the workers, returns {connection: worker} of the pipes
+        their reports come from
+        """
+        connections = {}
+        self._processes = []
+        for index, shard in enumerate(self.shards):
+            reader, writer = self._context.Pipe(duplex=False)
+            process = self._context.Process(
+                target=_worker_main, name="pipeline-worker-%d" % index,
+                args=(index, shard, self._pipeline_factory, writer,
+                      self._report_interval))
+            process.start()
+            # Only the worker keeps the write end: its pipe reads EOF as
+            # soon as it exits
+            writer.close()
+            self._processes.append(process)
+            connections[reader] = index
+        return connections
+
+    def run(self, timeout=None, on_report=None):
+        """ Starts the workers and returns once they all exited, or after
+        timeout seconds, terminating those still running. on_report(runner)
+        is called on every FPS report. Returns True when every worker
+        exited without error.
+        """
+        connections = self.start()
+        running = set(range(len(self._processes)))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while running:
+                wait = 0.5
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        break
+                for connection in multiprocessing.connection.wait(
+                        list(connections), wait):
+                    try:
+                        message = connection.recv()
+                    except (EOFError, OSError):
+                        index = connections.pop(connection)
+                        connection.close()
+                        if index in running:
+                            # Gone without its exit report: killed by a
+                            # signal
+                            process = self._processes[index]
+                            process.join(1.0)
+                            self.errors.append(
+                                (index, "worker exited with code %s"
+                                 % process.exitcode))
+                            running.discard(index)
+                        continue
+                    self._handle(message, running, on_report)
+        finally:
+            for connection in connections:
+                connection.close()
+            # Workers done with their pipeline still exit on their own, the
+            # others are terminated right away.
+            self.stop(grace=0.0 if running else 5.0)
+        return not self.errors and all(code == 0 for code in
+                                       self.exitcodes.values())
+
+    def stop(self, grace=0.0):
+        """ Terminates the workers still running after grace seconds and
+        reaps them all.
+        """
+        deadline = time.monotonic() + grace
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        for index, process in enumerate(self._processes):
+            process.join()
+            self.exitcodes[index] = process.exitcode
@@ -50,7 +50,7 @@ class PipelineFakesink(GenericPipeline):
         if not osdsinkpad:
             sys.stderr.write("Unable to get sink pad of nvosd \n")
 
-        osdsinkpad.add_probe(Gst.PadProbeType.BUFFER, probe_function, 0)
+        self._add_probe(osdsinkpad, probe_function)
 
     def set_fix_elem_probe(self, elem_name, direction, probe_function):
         assert elem_name in [item[1] for item in self.pipeline_base]
@@ -60,7 +60,7 @@ class PipelineFakesink(GenericPipeline):
         if not pad:
             sys.stderr.write("Unable to get sink pad of {elem_name} \n")
 
-        pad.add_probe(Gst.PadProbeType.BUFFER, probe_function, 0)
+        self._add_probe(pad, probe_function)
 
     def _link_elements(self):
         gebn = lambda n: self._get_elm_by_name(n)
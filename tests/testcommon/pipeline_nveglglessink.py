@@ -50,7 +50,7 @@ class PipelineNveglgleSink(GenericPipeline):
         if not osdsinkpad:
             sys.stderr.write("Unable to get sink pad of nvosd \n")
 
-        osdsinkpad.add_probe(Gst.PadProbeType.BUFFER, probe_function, 0)
+        self._add_probe(osdsinkpad, probe_function)
 
     def _link_elements(self):
         gebn = lambda n: self._get_elm_by_name(n)
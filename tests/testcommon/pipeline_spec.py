@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Pipelines described by a spec instead of a GenericPipeline subclass.
+
+A spec is a dict, or a YAML / JSON file loaded with load_spec():
+
+    elements:
+      - {factory: videotestsrc, name: video-source,
+         properties: {num-buffers: 300}}
+      - {factory: tee, name: tee}
+      - {factory: fakesink, name: sink-a}
+      - {factory: fakesink, name: sink-b, properties: {sync: false}}
+    arm64:                       # only created on integrated GPUs
+      - {factory: nvegltransform, name: nvegl-transform}
+    queue_defaults:              # applied to every queue of the spec
+      max-size-buffers: 4
+    links:
+      - [video-source, tee]
+      - {src: tee, dst: sink-a, queue: {leaky: 2}}
+      - {src: tee, src_pad: src_%u, dst: sink-b, queue: {}}
+      - {src: decoder, dst: Stream-muxer, sink_pad: sink_0}
+    probe: {element: tee, pad: sink}
+
+A link is [src, dst] or a dict. src_pad / sink_pad name a static pad, a
+request pad ("sink_0") or a request pad template ("src_%u"), by default
+the elements are linked with Gst.Element.link(), which requests tee pads
+on its own. A "queue" entry inserts a queue named "<src>-<dst>-queue" in
+the link with these properties on top of queue_defaults, e.g. to give
+each tee branch its own streaming thread.
+
+Links may name "arm64" elements. Without an integrated GPU those elements
+are not created and are bypassed: an element linked from a single element
+and to a single one, such as [tee, nvegl-transform], [nvegl-transform,
+sink-a], leaves the link [tee, sink-a]; the other links naming it are
+dropped.
+"""
+
+import json
+import os
+import sys
+import time
+
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+from tests.testcommon.generic_pipeline import GenericPipeline
+
+QUEUE_FACTORIES = ("queue", "queue2", "multiqueue")
+ELEMENT_KEYS = {"factory", "name", "properties"}
+LINK_KEYS = {"src", "dst", "src_pad", "sink_pad", "queue"}
+SPEC_KEYS = {"elements", "arm64", "links", "queue_defaults", "probe"}
+
+
+class PipelineSpecError(Exception):
+    """ Invalid pipeline spec, errors lists every problem found """
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("Invalid pipeline spec:\n  " + "\n  ".join(self.errors))
+
+
+def load_spec(path):
+    """ Loads a spec from a .json, .yaml or .yml file """
+    with open(path) as spec_file:
+        if os.path.splitext(path)[1] == ".json":
+            return json.load(spec_file)
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is required to load %s, use a .json "
+                              "spec or pass the spec as a dict" % path)
+        return yaml.safe_load(spec_file)
+
+
+def _normalize_link(link):
+    if isinstance(link, (list, tuple)):
+        if len(link) != 2:
+            return None
+        return {"src": link[0], "dst": link[1]}
+    if isinstance(link, dict):
+        return dict(link)
+    return None
+
+
+def _bypass_elements(links, skipped):
+    """ links without the skipped elements, see the module documentation """
+    for name in skipped:
+        upstream = [link for link in links if link["dst"] == name]
+        downstream = [link for link in links if link["src"] == name]
+        links = [link for link in links
+                 if link["src"] != name and link["dst"] != name]
+        if len(upstream) == 1 and len(downstream) == 1:
+            up, down = upstream[0], downstream[0]
+            link = {"src": up["src"], "dst": down["dst"]}
+            if up.get("src_pad"):
+                link["src_pad"] = up["src_pad"]
+            if down.get("sink_pad"):
+                link["sink_pad"] = down["sink_pad"]
+            if "queue" in up or "queue" in down:
+                link["queue"] = up.get("queue", down.get("queue"))
+            links.append(link)
+    return links
+
+
+def validate_spec(spec):
+    """ Returns the list of problems of spec, empty when it is valid.
+
+    Only the structure is checked, whether the factories exist is checked
+    by SpecPipeline before creating any element.
+    """
+    errors = []
+    if not isinstance(spec, dict):
+        return ["spec must be a dict, got %s" % type(spec).__name__]
+    for key in set(spec) - SPEC_KEYS:
+        errors.append("unknown key \"%s\"" % key)
+    elements = spec.get("elements")
+    if not isinstance(elements, list) or not elements:
+        errors.append("\"elements\" must be a non empty list")
+        elements = []
+    arm64 = spec.get("arm64", [])
+    if not isinstance(arm64, list):
+        errors.append("\"arm64\" must be a list")
+        arm64 = []
+
+    names = set()
+    for section, section_elements in (("elements", elements), ("arm64", arm64)):
+        for i, element in enumerate(section_elements):
+            where = "%s[%d]" % (section, i)
+            if not isinstance(element, dict):
+                errors.append("%s must be a dict" % where)
+                continue
+            for key in set(element) - ELEMENT_KEYS:
+                errors.append("%s: unknown key \"%s\"" % (where, key))
+            if not element.get("factory"):
+                errors.append("%s: missing \"factory\"" % where)
+            name = element.get("name")
+            if not name:
+                errors.append("%s: missing \"name\"" % where)
+            elif name in names:
+                errors.append("%s: duplicate element name \"%s\"" % (where, name))
+            else:
+                names.add(name)
+            if not isinstance(element.get("properties", {}), dict):
+                errors.append("%s: \"properties\" must be a dict" % where)
+
+    if not isinstance(spec.get("queue_defaults", {}), dict):
+        errors.append("\"queue_defaults\" must be a dict")
+
+    links = spec.get("links", [])
+    if not isinstance(links, list):
+        errors.append("\"links\" must be a list")
+        links = []
+    for i, raw_link in enumerate(links):
+        where = "links[%d]" % i
+        link = _normalize_link(raw_link)
+        if link is None:
+            errors.append("%s must be [src, dst] or a dict" % where)
+            continue
+        for key in set(link) - LINK_KEYS:
+            errors.append("%s: unknown key \"%s\"" % (where, key))
+        for end in ("src", "dst"):
+            if end not in link:
+                errors.append("%s: missing \"%s\"" % (where, end))
+            elif link[end] not in names:
+                errors.append("%s: unknown element \"%s\"" % (where, link[end]))
+        if not isinstance(link.get("queue", {}), dict):
+            errors.append("%s: \"queue\" must be a dict of queue properties" % where)
+        elif "queue" in link:
+            queue_name = "{0}-{1}-queue".format(link.get("src"), link.get("dst"))
+            if queue_name in names:
+                errors.append("%s: queue name \"%s\" already used" % (where, queue_name))
+            names.add(queue_name)
+
+    probe = spec.get("probe")
+    if probe is not None:
+        if not isinstance(probe, dict) or probe.get("element") not in names:
+            errors.append("\"probe\" must be {element: <name>, pad: <pad name>}"
+                          " naming an element of the spec")
+    return errors
+
+
+class SpecPipeline(GenericPipeline):
+    """ GenericPipeline built from a spec, see the module documentation.
+
+    The spec is validated, then every factory is looked up before the
+    first element is created, so that all the missing plugins are reported
+    at once. build_times holds the construction time in seconds of each
+    step: validate, create (Gst init, element creation and properties),
+    add, link and total.
+    """
+
+    def __init__(self, spec, is_integrated_gpu=False):
+        start = time.perf_counter()
+        errors = validate_spec(spec)
+        if errors:
+            raise PipelineSpecError(errors)
+        self._spec = spec
+        self._links = []
+        self.build_times = {"validate": time.perf_counter() - start}
+        self._build_start = time.perf_counter()
+
+        queue_defaults = spec.get("queue_defaults", {})
+        pipeline_base = []
+        pipeline_arm64 = []
+        properties = {}
+        for section, data_pipeline in (("elements", pipeline_base),
+                                       ("arm64", pipeline_arm64)):
+            for element in spec.get(section, []):
+                data_pipeline.append([element["factory"], element["name"]])
+                element_properties = {}
+                if element["factory"] in QUEUE_FACTORIES:
+                    element_properties.update(queue_defaults)
+                element_properties.update(element.get("properties", {}))
+                if element_properties and (section == "elements"
+                                           or is_integrated_gpu):
+                    properties[element["name"]] = element_properties
+
+        links = [_normalize_link(raw_link) for raw_link in spec.get("links", [])]
+        if not is_integrated_gpu:
+            links = _bypass_elements(links, [element["name"] for element
+                                             in spec.get("arm64", [])])
+        for link in links:
+            if "queue" in link:
+                queue_name = "{0}-{1}-queue".format(link["src"], link["dst"])
+                pipeline_base.append(["queue", queue_name])
+                queue_properties = dict(queue_defaults)
+                queue_properties.update(link["queue"])
+                if queue_properties:
+                    properties[queue_name] = queue_properties
+                self._links.append({"src": link["src"], "dst": queue_name,
+                                    "src_pad": link.get("src_pad")})
+                self._links.append({"src": queue_name, "dst": link["dst"],
+                                    "sink_pad": link.get("sink_pad")})
+            else:
+                self._links.append(link)
+
+        Gst.init(None)
+        factories = [elm[0] for elm in pipeline_base]
+        if is_integrated_gpu:
+            factories += [elm[0] for elm in pipeline_arm64]
+        missing = sorted({factory for factory in factories
+                          if not Gst.ElementFactory.find(factory)})
+        if missing:
+            raise PipelineSpecError(["no GStreamer element factory \"%s\""
+                                     % factory for factory in missing])
+
+        self.pipeline_base = pipeline_base
+        super().__init__(properties, is_integrated_gpu, pipeline_base,
+                         pipeline_arm64)
+        self.build_times["total"] = time.perf_counter() - start
+
+    def _add_all_elements_to_pipeline(self):
+        add_start = time.perf_counter()
+        self.build_times["create"] = add_start - self._build_start
+        super()._add_all_elements_to_pipeline()
+        self.build_times["add"] = time.perf_counter() - add_start
+
+    @staticmethod
+    def _get_pad(element, pad_name):
+        pad = element.get_static_pad(pad_name)
+        if pad is None:
+            # request_pad_simple() replaces get_request_pad() since
+            # GStreamer 1.20
+            request_pad = getattr(element, "request_pad_simple", None)
+            if request_pad is None:
+                request_pad = element.get_request_pad
+            pad = request_pad(pad_name)
+        return pad
+
+    def _link(self, link):
+        src = self._get_elm_by_name(link["src"])
+        dst = self._get_elm_by_name(link["dst"])
+        src_pad_name = link.get("src_pad")
+        sink_pad_name = link.get("sink_pad")
+        if not src_pad_name and not sink_pad_name:
+            return src.link(dst)
+
+        src_pad = (self._get_pad(src, src_pad_name) if src_pad_name
+                   else src.get_static_pad("src"))
+        sink_pad = (self._get_pad(dst, sink_pad_name) if sink_pad_name
+                    else dst.get_static_pad("sink"))
+        if not src_pad or not sink_pad:
+            return False
+        return src_pad.link(sink_pad) == Gst.PadLinkReturn.OK
+
+    def _link_elements(self):
+        link_start = time.perf_counter()
+        try:
+            for link in self._links:
+                if not self._link(link):
+                    sys.stderr.write(" Unable to link %s to %s \n"
+                                     % (link["src"], link["dst"]))
+                    return False
+            return True
+        finally:
+            self.build_times["link"] = time.perf_counter() - link_start
+
+    def set_probe(self, probe_function, element=None, pad="sink"):
+        """ Adds a buffer probe on pad of element, by default the "probe"
+        entry of the spec.
+        """
+        if element is None:
+            probe = self._spec.get("probe")
+            if not probe:
+                raise Exception("No probe element given nor in the spec")
+            element = probe["element"]
+            pad = probe.get("pad", "sink")
+        probe_pad = self._get_elm_by_name(element).get_static_pad(pad)
+        if not probe_pad:
+            sys.stderr.write("Unable to get %s pad of %s \n" % (pad, element))
+            return
+        self._add_probe(probe_pad, probe_function)
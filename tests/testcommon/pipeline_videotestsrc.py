@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+from tests.testcommon.generic_pipeline import GenericPipeline
+
+
+class PipelineVideotestsrc(GenericPipeline):
+    """ CPU only pipeline: videotestsrc -> identity -> fakesink
+
+    Needs neither DeepStream nor a GPU, the number of buffers is set with
+    the "num-buffers" property of "video-source".
+    """
+
+    def __init__(self, properties, is_integrated_gpu=False):
+        pipeline_base = [
+            ["videotestsrc", "video-source"],  # source
+            ["identity", "identity"],  # probed element
+            ["fakesink", "fakesink"],  # sink
+        ]
+        pipeline_arm64 = [
+        ]
+        self.pipeline_base = pipeline_base
+        super().__init__(properties, is_integrated_gpu, pipeline_base,
+                         pipeline_arm64)
+
+    def set_probe(self, probe_function):
+        identity = self._get_elm_by_name("identity")
+        sinkpad = identity.get_static_pad("sink")
+        if not sinkpad:
+            sys.stderr.write("Unable to get sink pad of identity \n")
+
+        self._add_probe(sinkpad, probe_function)
+
+    def _link_elements(self):
+        gebn = lambda n: self._get_elm_by_name(n)
+        source = gebn("video-source")
+        identity = gebn("identity")
+        sink = gebn("fakesink")
+
+        if not source.link(identity):
+            sys.stderr.write(" Unable to link source to identity \n")
+            return False
+        if not identity.link(sink):
+            sys.stderr.write(" Unable to link identity to sink \n")
+            return False
+        return True
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Pure Python stand-in for the metadata part of pyds.
+
+Builds synthetic NvDsBatchMeta -> NvDsFrameMeta -> NvDsObjectMeta GList
+chains so that probe code can run without DeepStream or a GPU. Only the
+attributes and functions used by the probes of this repository are
+provided. install() registers the module as "pyds" so that probe code
+importing pyds runs unchanged.
+
+make_batch() can also attach user metas to frames and objects, the
+tracker past frame batch meta (NvDsTargetMiscDataBatch) and re-id object
+metas (NvDsObjReid). get_nvds_buf_surface() returns a NumPy RGBA image per
+frame for the probes reading pixels.
+"""
+
+import sys
+
+import numpy as np
+
+MAX_ELEMENTS_IN_DISPLAY_META = 16
+
+
+class GList:
+    """ Node of a GLib doubly linked list """
+
+    __slots__ = ("data", "next", "prev")
+
+    def __init__(self, data, prev=None):
+        self.data = data
+        self.next = None
+        self.prev = prev
+
+
+def make_glist(items):
+    """ Returns the head GList node of items, None when empty """
+    head = None
+    prev = None
+    for item in items:
+        node = GList(item, prev)
+        if prev is None:
+            head = node
+        else:
+            prev.next = node
+        prev = node
+    return head
+
+
+def glist_append(head, item):
+    """ Appends item, returns the (possibly new) head """
+    if head is None:
+        return GList(item)
+    node = head
+    while node.next is not None:
+        node = node.next
+    node.next = GList(item, node)
+    return head
+
+
+class _Castable:
+    @classmethod
+    def cast(cls, data):
+        return data
+
+
+class NvDsMetaType:
+    """ Subset of the NvDsMetaType enum values used by the probes """
+    NVDS_INVALID_META = -1
+    NVDS_BATCH_META = 1
+    NVDS_FRAME_META = 2
+    NVDS_OBJ_META = 3
+    NVDS_DISPLAY_META = 4
+    NVDS_CLASSIFIER_META = 5
+    NVDS_LABEL_INFO_META = 6
+    NVDS_USER_META = 7
+    NVDS_TRACKER_PAST_FRAME_META = 19
+    NVDS_CROP_IMAGE_META = 21
+    NVDS_TRACKER_OBJ_REID_META = 23
+
+
+class NvDsBaseMeta(_Castable):
+    def __init__(self, meta_type=NvDsMetaType.NVDS_USER_META):
+        self.meta_type = meta_type
+        self.batch_meta = None
+
+
+class NvDsUserMeta(_Castable):
+    def __init__(self, meta_type=NvDsMetaType.NVDS_USER_META, user_meta_data=None):
+        self.base_meta = NvDsBaseMeta(meta_type)
+        self.user_meta_data = user_meta_data
+
+
+class NvDsTargetMiscDataFrame(_Castable):
+    def __init__(self, frame_num=0, bbox=None, confidence=0.0, age=0):
+        self.frameNum = frame_num
+        self.tBbox = bbox or NvOSD_RectParams()
+        self.confidence = confidence
+        self.age = age
+
+
+class NvDsTargetMiscDataObject(_Castable):
+    def __init__(self, unique_id=0, class_id=0, obj_label="", frames=()):
+        self.uniqueId = unique_id
+        self.classId = class_id
+        self.objLabel = obj_label
+        self.numObj = len(frames)
+        self._frames = list(frames)
+
+    @staticmethod
+    def list(misc_data_object):
+        return iter(misc_data_object._frames)
+
+
+class NvDsTargetMiscDataStream(_Castable):
+    def __init__(self, stream_id=0, objects=()):
+        self.streamID = stream_id
+        self.surfaceStreamID = stream_id
+        self.numFilled = len(objects)
+        self._objects = list(objects)
+
+    @staticmethod
+    def list(misc_data_stream):
+        return iter(misc_data_stream._objects)
+
+
+class NvDsTargetMiscDataBatch(_Castable):
+    def __init__(self, streams=()):
+        self.numFilled = len(streams)
+        self._streams = list(streams)
+
+    @staticmethod
+    def list(misc_data_batch):
+        return iter(misc_data_batch._streams)
+
+
+class NvDsObjReid(_Castable):
+    def __init__(self, feature_size=256, seed=0):
+        self.featureSize = feature_size
+        self.numFeatures = 1
+        self._vector = np.random.default_rng(seed).random(
+            feature_size, dtype=np.float32)
+
+    def get_host_reid_vector(self):
+        return self._vector
+
+
+class NvOSD_ColorParams(_Castable):
+    def __init__(self, red=0.0, green=0.0, blue=0.0, alpha=0.0):
+        self.red = red
+        self.green = green
+        self.blue = blue
+        self.alpha = alpha
+
+    def set(self, red, green, blue, alpha):
+        self.red = red
+        self.green = green
+        self.blue = blue
+        self.alpha = alpha
+
+
+class NvOSD_RectParams(_Castable):
+    def __init__(self, left=0.0, top=0.0, width=0.0, height=0.0):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.border_width = 0
+        self.border_color = NvOSD_ColorParams()
+        self.has_bg_color = 0
+        self.bg_color = NvOSD_ColorParams()
+
+
+class NvOSD_FontParams(_Castable):
+    def __init__(self):
+        self.font_name = ""
+        self.font_size = 0
+        self.font_color = NvOSD_ColorParams()
+
+
+class NvOSD_TextParams(_Castable):
+    def __init__(self):
+        self.display_text = ""
+        self.x_offset = 0
+        self.y_offset = 0
+        self.font_params = NvOSD_FontParams()
+        self.set_bg_clr = 0
+        self.text_bg_clr = NvOSD_ColorParams()
+
+
+class NvDsDisplayMeta(_Castable):
+    def __init__(self):
+        self.num_rects = 0
+        self.num_labels = 0
+        self.num_lines = 0
+        self.rect_params = [NvOSD_RectParams()
+                            for _ in range(MAX_ELEMENTS_IN_DISPLAY_META)]
+        self.text_params = [NvOSD_TextParams()
+                            for _ in range(MAX_ELEMENTS_IN_DISPLAY_META)]
+
+
+class NvDsLabelInfo(_Castable):
+    def __init__(self, result_class_id=0, result_label="", result_prob=0.0,
+                 label_id=0):
+        self.result_class_id = result_class_id
+        self.result_label = result_label
+        self.result_prob = result_prob
+        self.label_id = label_id
+
+
+class NvDsClassifierMeta(_Castable):
+    def __init__(self, unique_component_id=2, labels=()):
+        self.unique_component_id = unique_component_id
+        self.num_labels = len(labels)
+        self.label_info_list = make_glist(labels)
+
+
+class NvDsObjectMeta(_Castable):
+    def __init__(self, class_id=0, object_id=0, confidence=0.0,
+                 rect_params=None, unique_component_id=1):
+        self.class_id = class_id
+        self.object_id = object_id
+        self.confidence = confidence
+        self.tracker_confidence = 0.0
+        self.unique_component_id = unique_component_id
+        self.rect_params = rect_params or NvOSD_RectParams()
+        self.text_params = NvOSD_TextParams()
+        self.obj_label = ""
+        self.parent = None
+        self.obj_user_meta_list = None
+        self.classifier_meta_list = None
+        # (head, tail) of the user metas held when the batch was first
+        # attached, the ones added by probes are dropped by
+        # attach_batch_meta()
+        self.synthetic_user_meta_list = None
+
+
+class NvDsFrameMeta(_Castable):
+    def __init__(self, batch_id=0, source_id=0, frame_num=0, buf_pts=0,
+                 objects=()):
+        self.batch_id = batch_id
+        self.source_id = source_id
+        self.pad_index = source_id
+        self.frame_num = frame_num
+        self.buf_pts = buf_pts
+        self.ntp_timestamp = 0
+        self.source_frame_width = 1920
+        self.source_frame_height = 1080
+        self.num_obj_meta = len(objects)
+        self.obj_meta_list = make_glist(objects)
+        self.display_meta_list = None
+        self.num_display_meta = 0
+        self.frame_user_meta_list = None
+        # (head, tail) of the user metas held when the batch was first
+        # attached, the ones added by probes are dropped by
+        # attach_batch_meta()
+        self.synthetic_user_meta_list = None
+
+
+class NvDsBatchMeta(_Castable):
+    def __init__(self, frames=(), max_frames_in_batch=None):
+        self.num_frames_in_batch = len(frames)
+        self.max_frames_in_batch = (max_frames_in_batch
+                                    if max_frames_in_batch is not None
+                                    else len(frames))
+        self.frame_meta_list = make_glist(frames)
+        self.batch_user_meta_list = None
+        self.attached_once = False
+        # (head, tail) of the user metas held when the batch was first
+        # attached, the ones added by probes are dropped by
+        # attach_batch_meta()
+        self.synthetic_user_meta_list = None
+
+
+_batch_metas = {}
+
+
+def _synthetic_user_meta_list(owner, head, first_attach):
+    """ Head of the synthetic user metas of owner: head, the list it holds
+    at the first attach, or else what probes appended after them cut
+    """
+    if first_attach:
+        owner.synthetic_user_meta_list = None
+        if head is not None:
+            tail = head
+            while tail.next is not None:
+                tail = tail.next
+            owner.synthetic_user_meta_list = (head, tail)
+        return head
+    synthetic = owner.synthetic_user_meta_list
+    if synthetic is None:
+        return None
+    synthetic[1].next = None
+    return synthetic[0]
+
+
+def attach_batch_meta(buffer_address, batch_meta):
+    """ Makes gst_buffer_get_nvds_batch_meta(buffer_address) return
+    batch_meta. Display metas and user metas added by a previous run are
+    dropped so that synthetic batches can be attached again and again.
+    """
+    first_attach = not batch_meta.attached_once
+    batch_meta.attached_once = True
+    batch_meta.batch_user_meta_list = _synthetic_user_meta_list(
+        batch_meta, batch_meta.batch_user_meta_list, first_attach)
+    l_frame = batch_meta.frame_meta_list
+    while l_frame is not None:
+        frame_meta = l_frame.data
+        frame_meta.display_meta_list = None
+        frame_meta.num_display_meta = 0
+        frame_meta.frame_user_meta_list = _synthetic_user_meta_list(
+            frame_meta, frame_meta.frame_user_meta_list, first_attach)
+        l_obj = frame_meta.obj_meta_list
+        while l_obj is not None:
+            obj_meta = l_obj.data
+            obj_meta.obj_user_meta_list = _synthetic_user_meta_list(
+                obj_meta, obj_meta.obj_user_meta_list, first_attach)
+            l_obj = l_obj.next
+        l_frame = l_frame.next
+    _batch_metas[buffer_address] = batch_meta
+
+
+def release_batch_meta(buffer_address):
+    return _batch_metas.pop(buffer_address, None)
+
+
+def gst_buffer_get_nvds_batch_meta(buffer_address):
+    return _batch_metas.get(buffer_address)
+
+
+def nvds_acquire_display_meta_from_pool(batch_meta):
+    return NvDsDisplayMeta()
+
+
+def nvds_add_display_meta_to_frame(frame_meta, display_meta):
+    frame_meta.display_meta_list = glist_append(frame_meta.display_meta_list,
+                                                display_meta)
+    frame_meta.num_display_meta += 1
+
+
+def nvds_acquire_user_meta_from_pool(batch_meta):
+    return NvDsUserMeta()
+
+
+def nvds_add_user_meta_to_frame(frame_meta, user_meta):
+    frame_meta.frame_user_meta_list = glist_append(
+        frame_meta.frame_user_meta_list, user_meta)
+
+
+def nvds_add_user_meta_to_obj(obj_meta, user_meta):
+    obj_meta.obj_user_meta_list = glist_append(obj_meta.obj_user_meta_list,
+                                               user_meta)
+
+
+def nvds_add_user_meta_to_batch(batch_meta, user_meta):
+    batch_meta.batch_user_meta_list = glist_append(
+        batch_meta.batch_user_meta_list, user_meta)
+
+
+def nvds_acquire_meta_lock(batch_meta):
+    pass
+
+
+def nvds_release_meta_lock(batch_meta):
+    pass
+
+
+_surfaces = {}
+
+
+def get_nvds_buf_surface(buffer_address, batch_id, width=1920, height=1080):
+    """ RGBA image of frame batch_id, one zeroed array per frame slot
+    reused across buffers, as the mapped NvBufSurface would be.
+    """
+    surface = _surfaces.get((batch_id, width, height))
+    if surface is None:
+        surface = np.zeros((height, width, 4), dtype=np.uint8)
+        _surfaces[(batch_id, width, height)] = surface
+    return surface
+
+
+def unmap_nvds_buf_surface(buffer_address, batch_id):
+    pass
+
+
+def get_string(value):
+    return value
+
+
+def make_tracker_meta(batch_size, objects_per_frame, past_frames=3,
+                      num_classes=4):
+    """ NVDS_TRACKER_PAST_FRAME_META user meta holding past_frames frames
+    of history for every object of every stream.
+    """
+    streams = []
+    for stream_id in range(batch_size):
+        objects = []
+        for i in range(objects_per_frame):
+            frames = [NvDsTargetMiscDataFrame(
+                frame_num=f, bbox=NvOSD_RectParams((i * 37) % 1920,
+                                                   (i * 23) % 1080, 64, 128),
+                confidence=0.9, age=f) for f in range(past_frames)]
+            objects.append(NvDsTargetMiscDataObject(
+                unique_id=i, class_id=i % num_classes, frames=frames))
+        streams.append(NvDsTargetMiscDataStream(stream_id, objects))
+    return NvDsUserMeta(NvDsMetaType.NVDS_TRACKER_PAST_FRAME_META,
+                        NvDsTargetMiscDataBatch(streams))
+
+
+def make_batch(batch_size, objects_per_frame, num_classes=4, frame_num=0,
+               width=1920, height=1080, frame_user_meta=0,
+               obj_user_meta=0, reid_meta=False, tracker_meta=False,
+               tracker_past_frames=3):
+    """ Builds an NvDsBatchMeta of batch_size frames, one per source, each
+    holding objects_per_frame objects spread over num_classes classes.
+
+    frame_user_meta and obj_user_meta generic NVDS_USER_META metas are
+    attached to every frame and object. reid_meta attaches an
+    NVDS_TRACKER_OBJ_REID_META NvDsObjReid to every object and
+    tracker_meta an NVDS_TRACKER_PAST_FRAME_META to the batch.
+    """
+    frames = []
+    for source_id in range(batch_size):
+        objects = []
+        for i in range(objects_per_frame):
+            rect = NvOSD_RectParams(left=(i * 37) % width,
+                                    top=(i * 23) % height,
+                                    width=64, height=128)
+            obj_meta = NvDsObjectMeta(class_id=i % num_classes,
+                                      object_id=i,
+                                      confidence=0.5 + (i % 50) / 100.0,
+                                      rect_params=rect)
+            user_metas = [NvDsUserMeta() for _ in range(obj_user_meta)]
+            if reid_meta:
+                user_metas.append(NvDsUserMeta(
+                    NvDsMetaType.NVDS_TRACKER_OBJ_REID_META, NvDsObjReid(seed=i)))
+            obj_meta.obj_user_meta_list = make_glist(user_metas)
+            objects.append(obj_meta)
+        frame_meta = NvDsFrameMeta(batch_id=source_id, source_id=source_id,
+                                   frame_num=frame_num, objects=objects)
+        frame_meta.source_frame_width = width
+        frame_meta.source_frame_height = height
+        frame_meta.frame_user_meta_list = make_glist(
+            [NvDsUserMeta() for _ in range(frame_user_meta)])
+        frames.append(frame_meta)
+    batch_meta = NvDsBatchMeta(frames)
+    if tracker_meta:
+        batch_meta.batch_user_meta_list = make_glist([make_tracker_meta(
+            batch_size, objects_per_frame, tracker_past_frames, num_classes)])
+    return batch_meta
+
+
+def install():
+    """ Registers this module as "pyds", returns it """
+    module = sys.modules[__name__]
+    sys.modules["pyds"] = module
+    return module
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+from threading import Event
+
+import pytest
+
+pytest.importorskip("gi")
+
+from common.async_probe import AsyncProbe, DROP_NEWEST, snapshot_batch
+from tests.testcommon import pyds_sim
+
+
+def test_snapshot_batch_copies_metadata(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyds", pyds_sim)
+    batch_meta = pyds_sim.make_batch(2, objects_per_frame=3)
+    record = snapshot_batch(batch_meta)
+
+    batch_meta.frame_meta_list.data.obj_meta_list.data.class_id = 3
+    assert record["frames"]["source_id"].tolist() == [0, 1]
+    assert record["objects"]["class_id"].tolist() == [0, 1, 2, 0, 1, 2]
+    assert record["objects"]["bbox"][1].tolist() == [37.0, 23.0, 64.0, 128.0]
+
+
+@pytest.mark.parametrize("drop_policy,expected", [
+    ("drop-oldest", [0, 3, 4]),
+    (DROP_NEWEST, [0, 1, 2]),
+])
+def test_drop_policy(drop_policy, expected):
+    started = Event()
+    release = Event()
+    consumed = []
+
+    def consumer(record):
+        started.set()
+        release.wait(5)
+        consumed.append(record)
+
+    async_probe = AsyncProbe(consumer, max_queue=2, drop_policy=drop_policy)
+    async_probe.start()
+    async_probe.submit(0)
+    # The worker blocks in the consumer with record 0, the queue is empty
+    assert started.wait(5)
+    for record in range(1, 5):
+        async_probe.submit(record)
+    release.set()
+    async_probe.stop()
+
+    assert consumed == expected
+    assert async_probe.stats["dropped"] == 2
+    assert async_probe.stats["processed"] == 3
+    # Stopped: dropped until the next start()
+    assert not async_probe.submit(5)
+
+
+def test_consumer_errors_are_counted():
+    def consumer(record):
+        raise ValueError(record)
+
+    async_probe = AsyncProbe(consumer)
+    async_probe.start()
+    async_probe.submit(1)
+    async_probe.stop()
+    assert async_probe.stats["errors"] == 1
+
+
+def test_unknown_drop_policy():
+    with pytest.raises(ValueError):
+        AsyncProbe(print, drop_policy="drop-random")
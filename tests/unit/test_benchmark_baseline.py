@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from tests.benchmarks.baseline import find_regressions, load_baseline, save_baseline
+
+
+def test_regressions_beyond_tolerance(tmp_path):
+    baseline = {
+        "osd_probe/batch4/objects10": {"buffers_per_sec": 1000.0,
+                                       "probe_us_mean": 50.0},
+    }
+    path = str(tmp_path / "baselines" / "probe_overhead.json")
+    save_baseline(path, baseline)
+    assert load_baseline(path) == baseline
+    assert load_baseline(str(tmp_path / "missing.json")) is None
+
+    within = {"osd_probe/batch4/objects10": {"buffers_per_sec": 950.0,
+                                             "probe_us_mean": 54.0}}
+    assert find_regressions(within, baseline, 0.1) == []
+
+    slower = {"osd_probe/batch4/objects10": {"buffers_per_sec": 800.0,
+                                             "probe_us_mean": 60.0},
+              "osd_probe/batch64/objects10": {"buffers_per_sec": 1.0}}
+    regressions = find_regressions(slower, baseline, 0.1)
+    assert [(case, metric) for case, metric, *_ in regressions] == [
+        ("osd_probe/batch4/objects10", "buffers_per_sec"),
+        ("osd_probe/batch4/objects10", "probe_us_mean"),
+    ]
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gc
+import weakref
+
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.repository import GLib, Gst
+
+from common.bus_call import STREAM_EOS, BusDispatcher, bus_call
+
+
+class Loop:
+    quits = 0
+
+    def quit(self):
+        self.quits += 1
+
+
+def _stream_eos(src, field, source_id):
+    structure = Gst.Structure.new_empty(STREAM_EOS)
+    structure.set_value(field, source_id)
+    return Gst.Message.new_element(src, structure)
+
+
+def _error(src, text):
+    error = GLib.Error.new_literal(Gst.core_error_quark(), text, 0)
+    return Gst.Message.new_error(src, error, "debug")
+
+
+def _warning(src, text):
+    error = GLib.Error.new_literal(Gst.core_error_quark(), text, 0)
+    return Gst.Message.new_warning(src, error, "debug")
+
+
+def test_stream_eos_of_both_field_names_and_handlers():
+    Gst.init(None)
+    src = Gst.ElementFactory.make("identity", "mux")
+    dispatcher = BusDispatcher(Loop())
+    seen = []
+    dispatcher.add_element_handler(STREAM_EOS,
+                                   lambda d, message, structure: seen.append(1))
+    dispatcher(None, _stream_eos(src, "stream-id", 2))
+    dispatcher(None, _stream_eos(src, "source-id", 5))
+    assert dispatcher.is_stream_eos(2) and dispatcher.is_stream_eos(5)
+    assert not dispatcher.is_stream_eos(0)
+    assert dispatcher.eos_count() == 2
+    assert len(seen) == 2
+    dispatcher.clear_source(2)
+    assert not dispatcher.is_stream_eos(2)
+
+
+def test_errors_are_recorded_on_their_source_and_quit():
+    Gst.init(None)
+    source_bin = Gst.Bin.new("source-bin-01")
+    decoder = Gst.ElementFactory.make("identity", "decoder")
+    source_bin.add(decoder)
+    loop = Loop()
+    dispatcher = BusDispatcher(loop)
+    dispatcher.register_source(1, "source-bin-01")
+    dispatcher(None, _error(decoder, "cannot decode"))
+    assert dispatcher.sources[1].errors == ["cannot decode"]
+    assert dispatcher.errors[0][0] == "decoder"
+    assert loop.quits == 1
+    dispatcher(None, Gst.Message.new_eos(source_bin))
+    assert loop.quits == 2
+
+
+def test_warnings_are_rate_limited_per_element(capsys):
+    Gst.init(None)
+    sink = Gst.ElementFactory.make("fakesink", "sink")
+    other = Gst.ElementFactory.make("fakesink", "other")
+    dispatcher = BusDispatcher(warning_interval=60.0)
+    for _ in range(5):
+        dispatcher(None, _warning(sink, "late buffers"))
+    dispatcher(None, _warning(other, "late buffers"))
+    assert capsys.readouterr().err.count("Warning") == 2
+
+
+def test_ignored_warnings_are_not_printed(capsys):
+    Gst.init(None)
+    sink = Gst.ElementFactory.make("fakesink", "sink")
+    dispatcher = BusDispatcher(ignored_warnings=("QoS",))
+    dispatcher(None, _warning(sink, "QoS message"))
+    dispatcher(None, _warning(sink, "late buffers"))
+    assert capsys.readouterr().err.count("Warning") == 1
+
+
+def test_bus_call_dispatcher_is_collected_with_its_loop():
+    Gst.init(None)
+    sink = Gst.ElementFactory.make("fakesink", "sink")
+    loop = Loop()
+    bus_call(None, Gst.Message.new_eos(sink), loop)
+    bus_call(None, Gst.Message.new_eos(sink), loop)
+    assert loop.quits == 2
+    dispatcher = weakref.ref(loop._bus_dispatcher)
+    del loop
+    gc.collect()
+    assert dispatcher() is None
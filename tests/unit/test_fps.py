@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+from threading import Thread, get_ident
+
+import numpy as np
+import pytest
+
+from common.FPS import FrameIntervalRing, GETFPS, PERF_DATA, frame_interval_stats
+
+
+def test_shards_are_merged_on_read():
+    fps = GETFPS(0)
+    fps.update_fps()  # first call only starts the clock
+
+    def worker():
+        for _ in range(1000):
+            fps.update_fps()
+
+    threads = [Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fps.frame_count == 4000
+    assert fps.get_fps() > 0
+    assert fps.frame_count == 0
+
+
+def test_perf_data_reports_every_stream():
+    perf_data = PERF_DATA(3)
+    for _ in range(3):
+        perf_data.update_fps("stream1")
+    assert perf_data.perf_print_callback()
+    assert set(perf_data.perf_dict) == {"stream0", "stream1", "stream2"}
+    assert perf_data.perf_dict["stream0"] == 0
+    assert perf_data.perf_dict["stream1"] > 0
+
+
+def test_ring_keeps_last_timestamps_in_order():
+    ring = FrameIntervalRing(4)
+    for t in range(6):
+        ring.push(float(t))
+    assert ring.timestamps().tolist() == [2.0, 3.0, 4.0, 5.0]
+
+
+def test_ring_weights_entries_by_frames():
+    ring = FrameIntervalRing(4)
+    for t in range(6):
+        ring.push(float(t), count=t + 1)
+    timestamps, counts = ring.entries()
+    assert timestamps.tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert counts.tolist() == [3, 4, 5, 6]
+    # frames pushed after the oldest of the last 3 entries
+    assert ring.span(3) == (11, 3.0, 5.0)
+
+
+def test_interval_stats_expose_stalls():
+    # 30 fps with a single 500 ms stall
+    timestamps = np.arange(100) / 30.0
+    timestamps[50:] += 0.5
+    stats = frame_interval_stats(timestamps)
+    assert abs(stats["p50_ms"] - 33.33) < 0.01
+    assert stats["max_stall_ms"] > 500
+    assert stats["jitter_ms"] > 0
+    assert frame_interval_stats(timestamps[:1]) is None
+
+
+def test_interval_histogram():
+    fps = GETFPS(0, ring_size=16)
+    for _ in range(10):
+        fps.update_fps()
+    counts = fps.get_interval_histogram([0, 1000, 2000])
+    assert counts.tolist() == [8, 0]
+
+
+def test_streams_added_and_removed_at_runtime():
+    perf_data = PERF_DATA(1)
+    perf_data.update_fps("stream5")  # unknown stream is registered
+    assert "stream5" in perf_data.all_stream_fps
+    stream5 = perf_data.all_stream_fps["stream5"]
+
+    assert perf_data.remove_stream("stream5")
+    assert not perf_data.remove_stream("stream5")
+    assert "stream5" not in perf_data.all_stream_fps
+
+    # released counter is reused, starting from scratch
+    assert perf_data.add_stream("stream7") is stream5
+    assert stream5.stream_id == "stream7"
+    assert stream5.total_frames == 0
+    perf_data.perf_print_callback()
+    assert set(perf_data.perf_dict) == {"stream0", "stream7"}
+
+
+def test_removed_stream_is_not_brought_back_by_late_batches():
+    perf_data = PERF_DATA(2)
+    assert perf_data.remove_stream("stream1")
+    # Frames of the removed source still in flight
+    perf_data.update_fps("stream1")
+    perf_data.update_counts({"stream0": 1, "stream1": 1}, now=1.0)
+    assert set(perf_data.all_stream_fps) == {"stream0"}
+
+    # Added again, the source is counted again
+    stream1 = perf_data.add_stream("stream1")
+    perf_data.update_counts({"stream1": 1}, now=2.0)
+    perf_data.update_counts({"stream1": 1}, now=3.0)
+    assert perf_data.all_stream_fps["stream1"] is stream1
+    assert stream1.total_frames == 1
+
+
+def test_reused_counter_is_owned_again_by_its_thread():
+    fps = GETFPS(0)
+    for _ in range(3):
+        fps.update_fps()
+    fps.reset(1)
+    assert fps._owner == (None, None)
+    for _ in range(3):
+        fps.update_fps()
+    assert fps._owner[0] == get_ident()
+    assert fps.total_frames == 2
+
+
+def test_batch_counts_update_all_streams_at_once():
+    perf_data = PERF_DATA(0)
+    now = 100.0
+    for i in range(11):
+        perf_data.update_counts({"stream0": 1, "stream1": 2}, now + i / 10.0)
+    stream0 = perf_data.all_stream_fps["stream0"]
+    stream1 = perf_data.all_stream_fps["stream1"]
+    # first batch only starts the clock of each stream
+    assert stream0.total_frames == 10
+    assert stream1.total_frames == 21
+    assert stream0.get_rolling_fps(window=5) == pytest.approx(10.0)
+    # two frames per batch, ten batches per second
+    assert stream1.get_rolling_fps(window=5) == pytest.approx(20.0)
+    assert stream1.get_interval_stats()["p50_ms"] == pytest.approx(50.0)
+    assert stream1.get_interval_stats()["max_stall_ms"] == pytest.approx(100.0)
+    assert perf_data.total_frames == 31
+
+
+def test_update_batch_counts_frames_and_objects(monkeypatch):
+    from tests.testcommon import pyds_sim
+    monkeypatch.setitem(sys.modules, "pyds", pyds_sim)
+
+    perf_data = PERF_DATA(0)
+    for _ in range(3):
+        perf_data.update_batch(pyds_sim.make_batch(2, objects_per_frame=5))
+    assert set(perf_data.all_stream_fps) == {"stream0", "stream1"}
+    # first batch only starts the clock of each stream
+    assert perf_data.all_stream_fps["stream1"].total_frames == 2
+    assert perf_data.all_stream_fps["stream1"].total_objects == 10
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("gi")
+
+from tests.testcommon import pyds_sim
+
+
+class ProbeInfo:
+    """ Minimal Gst.PadProbeInfo carrying a synthetic batch """
+
+    def __init__(self, batch_meta):
+        self._buffer = object()
+        pyds_sim.attach_batch_meta(hash(self._buffer), batch_meta)
+
+    def get_buffer(self):
+        return self._buffer
+
+
+@pytest.fixture
+def frame_iterator(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyds", pyds_sim)
+    monkeypatch.delitem(sys.modules, "tests.testcommon.frame_iterator",
+                        raising=False)
+    from tests.testcommon import frame_iterator
+    return frame_iterator
+
+
+def test_batch_mode_gathers_objects(frame_iterator):
+    batch_meta = pyds_sim.make_batch(3, objects_per_frame=10)
+    calls = []
+
+    def batch_function(batch_meta, frames, objects, dict_data, gst_buffer):
+        calls.append(1)
+        dict_data["per_class"] = np.bincount(objects["class_id"])
+        dict_data["frames"] = frames
+
+    data = {}
+    probe = frame_iterator.BatchFrameIterator(batch_function, data)
+    probe(None, ProbeInfo(batch_meta), 0)
+
+    assert len(calls) == 1
+    assert data["per_class"].tolist() == [9, 9, 6, 6]
+    assert data["frames"]["source_id"].tolist() == [0, 1, 2]
+    assert data["frames"]["num_obj_meta"].tolist() == [10, 10, 10]
+
+
+def test_dispatch_by_class_component_and_meta_type(frame_iterator):
+    batch_meta = pyds_sim.make_batch(2, objects_per_frame=8)
+    batch_meta.frame_meta_list.data.obj_meta_list.data.unique_component_id = 2
+    for meta_type in (pyds_sim.NvDsMetaType.NVDS_TRACKER_PAST_FRAME_META,
+                      pyds_sim.NvDsMetaType.NVDS_USER_META,
+                      pyds_sim.NvDsMetaType.NVDS_TRACKER_PAST_FRAME_META):
+        batch_meta.batch_user_meta_list = pyds_sim.glist_append(
+            batch_meta.batch_user_meta_list, pyds_sim.NvDsUserMeta(meta_type))
+    calls = {"class2": 0, "component2": 0, "past_frame": 0}
+
+    def class2_function(batch_meta, frame_meta, obj_meta, dict_data, gst_buffer):
+        assert obj_meta.class_id == 2
+        dict_data["class2"] += 1
+
+    def component2_function(batch_meta, frame_meta, obj_meta, dict_data,
+                            gst_buffer):
+        dict_data["component2"] += 1
+
+    def past_frame_function(batch_meta, user_meta, dict_data, gst_buffer):
+        dict_data["past_frame"] += 1
+
+    probe = frame_iterator.FrameIterator(None, None, calls)
+    probe.add_class_handler(2, class2_function)
+    probe.add_component_handler(2, component2_function)
+    probe.add_meta_type_handler(
+        pyds_sim.NvDsMetaType.NVDS_TRACKER_PAST_FRAME_META, past_frame_function)
+    probe(None, ProbeInfo(batch_meta), 0)
+
+    assert calls == {"class2": 4, "component2": 1, "past_frame": 2}
+
+
+def test_unsubscribed_metas_cost_no_python_call(frame_iterator):
+    def count_calls(probe, objects_per_frame, user_metas):
+        batch_meta = pyds_sim.make_batch(2, objects_per_frame=objects_per_frame)
+        for _ in range(user_metas):
+            batch_meta.batch_user_meta_list = pyds_sim.glist_append(
+                batch_meta.batch_user_meta_list,
+                pyds_sim.NvDsUserMeta(pyds_sim.NvDsMetaType.NVDS_USER_META))
+        info = ProbeInfo(batch_meta)
+        # The handler tables are filled by the first batch
+        probe(None, info, 0)
+        calls = []
+
+        def profile(frame, event, arg):
+            if (event == "call"
+                    and frame.f_code.co_filename == frame_iterator.__file__):
+                calls.append(frame.f_code.co_name)
+
+        sys.setprofile(profile)
+        try:
+            probe(None, info, 0)
+        finally:
+            sys.setprofile(None)
+        return calls
+
+    def class9_function(batch_meta, frame_meta, obj_meta, dict_data, gst_buffer):
+        pass
+
+    def past_frame_function(batch_meta, user_meta, dict_data, gst_buffer):
+        pass
+
+    probe = frame_iterator.FrameIterator(None, None, None)
+    probe.add_class_handler(9, class9_function)
+    probe.add_meta_type_handler(
+        pyds_sim.NvDsMetaType.NVDS_TRACKER_PAST_FRAME_META, past_frame_function)
+    assert count_calls(probe, 20, 5) == count_calls(probe, 0, 0)
+
+
+def test_decimation_and_time_budget(frame_iterator):
+    batch_meta = pyds_sim.make_batch(4, objects_per_frame=0)
+    seen = []
+
+    def frame_function(batch_meta, frame_meta, dict_data, gst_buffer):
+        seen.append(frame_meta.source_id)
+
+    probe = frame_iterator.FrameIterator(frame_function, None, None,
+                                         decimation=3)
+    for _ in range(6):
+        probe(None, ProbeInfo(batch_meta), 0)
+    # Every stream is processed at its 1st and 4th batch
+    assert sorted(seen) == [0, 0, 1, 1, 2, 2, 3, 3]
+    assert probe.stats["processed_batches"] == 2
+    assert probe.stats["skipped_batches"] == 4
+    assert probe.stats["skipped_frames"] == 16
+
+    def slow_frame_function(batch_meta, frame_meta, dict_data, gst_buffer):
+        time.sleep(0.02)
+
+    probe = frame_iterator.FrameIterator(slow_frame_function, None, None,
+                                         time_budget=0.01)
+    probe(None, ProbeInfo(batch_meta), 0)
+    assert probe.stats["processed_frames"] == 1
+    assert probe.stats["skipped_frames"] == 3
+    assert probe.stats["over_budget_batches"] == 1
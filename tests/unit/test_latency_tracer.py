@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict
+from threading import Thread
+
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.repository import Gst
+
+from tests.testcommon.latency_tracer import LatencySamples, LatencyTracer
+from tests.testcommon.pipeline_videotestsrc import PipelineVideotestsrc
+
+
+def test_latency_tracer_on_cpu_pipeline():
+    properties = {
+        "video-source": {"num-buffers": 50},
+        "identity": {"sleep-time": 1000},  # 1 ms per buffer
+    }
+    sp = PipelineVideotestsrc(properties)
+    tracer = sp.set_latency_tracer()
+    sp.run()
+
+    stats = tracer.get_stats()
+    assert stats["identity"]["kind"] == "element"
+    assert stats["identity"]["count"] == 50
+    assert stats["identity"]["p50_ms"] >= 1.0
+    assert stats["end-to-end"]["count"] == 50
+    assert stats["end-to-end"]["p50_ms"] >= stats["identity"]["p50_ms"]
+    assert tracer.get_histogram("identity", [0, 1, 1000]).sum() == 50
+
+
+def test_pending_buffers_shared_by_two_threads():
+    # Sink pad and src pad of a queue, each on its own streaming thread
+    tracer = LatencyTracer([], max_pending=16)
+    pending = OrderedDict()
+    found = []
+
+    def sink_pad():
+        for pts in range(20000):
+            tracer._remember(pending, pts, float(pts))
+
+    def src_pad():
+        for pts in range(20000):
+            found.append(tracer._forget(pending, pts))
+
+    threads = [Thread(target=sink_pad), Thread(target=src_pad)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(pending) <= 16
+    assert len(found) == 20000
+
+
+def test_every_tee_branch_is_measured():
+    Gst.init(None)
+    pipeline = Gst.parse_launch(
+        "videotestsrc num-buffers=20 name=src ! tee name=tee "
+        "tee. ! queue name=queue-a ! fakesink name=sink-a "
+        "tee. ! queue name=queue-b ! fakesink name=sink-b")
+    elements = [(name, pipeline.get_by_name(name), factory)
+                for name, factory in (("src", "videotestsrc"), ("tee", "tee"),
+                                      ("queue-a", "queue"),
+                                      ("sink-a", "fakesink"),
+                                      ("queue-b", "queue"),
+                                      ("sink-b", "fakesink"))]
+    tracer = LatencyTracer(elements)
+    tracer.attach()
+    pipeline.set_state(Gst.State.PLAYING)
+    message = pipeline.get_bus().timed_pop_filtered(
+        10 * Gst.SECOND, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    pipeline.set_state(Gst.State.NULL)
+    assert message is not None and message.type == Gst.MessageType.EOS
+
+    stats = tracer.get_stats()
+    # One sample per branch
+    assert stats["tee"]["count"] == 40
+    assert stats["queue-a"]["count"] == 20
+    assert stats["end-to-end"]["count"] == 40
+
+
+def test_samples_pushed_by_several_sinks():
+    samples = LatencySamples(64)
+
+    def sink_pad():
+        for i in range(10000):
+            samples.push(float(i))
+
+    threads = [Thread(target=sink_pad) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert samples.count == 40000
+    assert len(samples.values()) == 64
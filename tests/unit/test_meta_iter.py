@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+
+import pytest
+
+from tests.testcommon import pyds_sim
+
+
+@pytest.fixture
+def meta_iter(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyds", pyds_sim)
+    monkeypatch.delitem(sys.modules, "common.meta_iter", raising=False)
+    from common import meta_iter
+    return meta_iter
+
+
+def test_iter_frames_and_objects(meta_iter):
+    batch_meta = pyds_sim.make_batch(3, objects_per_frame=5)
+    assert [frame_meta.source_id
+            for frame_meta in meta_iter.iter_frames(batch_meta)] == [0, 1, 2]
+    frame_meta = batch_meta.frame_meta_list.data
+    assert [obj_meta.class_id
+            for obj_meta in meta_iter.iter_objects(frame_meta)] == [0, 1, 2, 3, 0]
+    assert [obj_meta.object_id
+            for obj_meta in meta_iter.iter_objects(frame_meta, class_ids=(0, 3))] == [0, 3, 4]
+    assert len(list(meta_iter.iter_batch_objects(batch_meta, class_ids=[1]))) == 3
+    assert list(meta_iter.iter_objects(frame_meta, unique_component_id=2)) == []
+    assert list(meta_iter.iter_frames(pyds_sim.make_batch(0, 0))) == []
+
+
+def test_iter_user_meta_by_type(meta_iter):
+    frame_meta = pyds_sim.make_batch(1, objects_per_frame=0).frame_meta_list.data
+    for meta_type in (pyds_sim.NvDsMetaType.NVDS_USER_META,
+                      pyds_sim.NvDsMetaType.NVDS_CROP_IMAGE_META,
+                      pyds_sim.NvDsMetaType.NVDS_USER_META):
+        frame_meta.frame_user_meta_list = pyds_sim.glist_append(
+            frame_meta.frame_user_meta_list, pyds_sim.NvDsUserMeta(meta_type))
+
+    assert len(list(meta_iter.iter_frame_user_meta(frame_meta))) == 3
+    assert len(list(meta_iter.iter_frame_user_meta(
+        frame_meta, pyds_sim.NvDsMetaType.NVDS_USER_META))) == 2
+    assert len(list(meta_iter.iter_frame_user_meta(
+        frame_meta, pyds_sim.NvDsMetaType.NVDS_TRACKER_OBJ_REID_META))) == 0
+
+
+def test_iter_classifier_meta(meta_iter):
+    obj_meta = pyds_sim.NvDsObjectMeta()
+    obj_meta.classifier_meta_list = pyds_sim.make_glist([
+        pyds_sim.NvDsClassifierMeta(2, [pyds_sim.NvDsLabelInfo(result_label="red")]),
+        pyds_sim.NvDsClassifierMeta(3, [pyds_sim.NvDsLabelInfo(result_label="sedan"),
+                                        pyds_sim.NvDsLabelInfo(result_label="suv")]),
+    ])
+    labels = [label_info.result_label
+              for classifier_meta in meta_iter.iter_classifier_meta(obj_meta, 3)
+              for label_info in meta_iter.iter_label_info(classifier_meta)]
+    assert labels == ["sedan", "suv"]
+
+
+def test_stop_iteration_ends_the_walk(meta_iter, monkeypatch):
+    batch_meta = pyds_sim.make_batch(3, objects_per_frame=0)
+    casts = []
+
+    def cast(data):
+        casts.append(data)
+        if len(casts) == 2:
+            raise StopIteration
+        return data
+
+    monkeypatch.setattr(pyds_sim.NvDsFrameMeta, "cast", cast)
+    assert len(list(meta_iter.iter_frames(batch_meta))) == 1
+    assert len(casts) == 2
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from common.FPS import PERF_DATA
+from common.metrics_server import MetricsServer, OPENMETRICS_CONTENT_TYPE
+
+
+def scrape(url):
+    """ Stand-in for a Prometheus scraper: returns {sample_name{labels}: value} """
+    with urllib.request.urlopen(url, timeout=5) as response:
+        assert response.headers["Content-Type"] == OPENMETRICS_CONTENT_TYPE
+        text = response.read().decode("utf-8")
+    assert text.endswith("# EOF\n")
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        name, value = line.rsplit(" ", 1)
+        samples[name] = float(value)
+    return samples
+
+
+def test_scrape_perf_data():
+    perf_data = PERF_DATA(2)
+    for _ in range(5):
+        perf_data.update_fps("stream0")
+    perf_data.update_probe_time("osd_sink_pad_buffer_probe", 0.002)
+    perf_data.update_probe_time("osd_sink_pad_buffer_probe", 0.004)
+    perf_data.perf_print_callback()
+
+    server = MetricsServer(perf_data, port=0)
+    server.start()
+    try:
+        url = "http://127.0.0.1:%d/metrics" % server.port
+        samples = scrape(url)
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/other", timeout=5)
+    finally:
+        server.stop()
+
+    assert samples['deepstream_stream_frames_total{stream="stream0"}'] == 4
+    assert samples['deepstream_stream_frames_total{stream="stream1"}'] == 0
+    assert 'deepstream_stream_fps{stream="stream1"}' in samples
+    assert 'deepstream_stream_frame_interval_seconds{stream="stream0",quantile="0.99"}' in samples
+    probe = '{probe="osd_sink_pad_buffer_probe"}'
+    assert samples['deepstream_probe_duration_seconds_count' + probe] == 2
+    assert samples['deepstream_probe_duration_seconds_sum' + probe] == pytest.approx(0.006)
+    assert samples['deepstream_probe_max_duration_seconds' + probe] == 0.004
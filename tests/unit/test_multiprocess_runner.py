@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import signal
+import time
+
+import pytest
+
+from tests.testcommon.multiprocess_runner import (MultiProcessRunner,
+                                                  default_num_workers,
+                                                  shard_uris)
+
+
+class CountingPipeline:
+    """ Stands for a pipeline: counts 10 frames per stream and per run """
+
+    def __init__(self, uris, perf_data):
+        if "bad://" in uris:
+            raise RuntimeError("cannot open bad://")
+        self._uris = uris
+        self._perf_data = perf_data
+
+    def run(self):
+        for _ in range(10):
+            for stream in self._perf_data.all_stream_fps.values():
+                stream.update_fps()
+            time.sleep(0.02)
+
+
+class CrashingPipeline(CountingPipeline):
+    """ Killed by a signal after 0.2 s on crash://, counts for 3 s otherwise,
+    as a pipeline dying of a segfault next to a healthy one
+    """
+
+    def run(self):
+        for _ in range(150):
+            if "crash://" in self._uris and _ == 10:
+                os.kill(os.getpid(), signal.SIGKILL)
+            for stream in self._perf_data.all_stream_fps.values():
+                stream.update_fps()
+            time.sleep(0.02)
+
+
+def make_counting_pipeline(uris, perf_data):
+    return CountingPipeline(uris, perf_data)
+
+
+def make_crashing_pipeline(uris, perf_data):
+    return CrashingPipeline(uris, perf_data)
+
+
+def test_shards_are_balanced_round_robin():
+    shards = shard_uris(["a", "b", "c", "d", "e"], 2)
+    assert shards == [[(0, "a"), (2, "c"), (4, "e")], [(1, "b"), (3, "d")]]
+    assert shard_uris(["a"], 3) == [[(0, "a")], [], []]
+    with pytest.raises(ValueError):
+        shard_uris(["a"], 0)
+
+
+def test_default_workers_never_exceed_uris():
+    assert default_num_workers(1) == 1
+    assert 1 <= default_num_workers(1000) <= 1000
+
+
+def test_supervisor_collects_reports_and_errors():
+    uris = ["file:///a.mp4", "file:///b.mp4", "bad://", "file:///c.mp4"]
+    runner = MultiProcessRunner(uris, make_counting_pipeline, num_workers=3,
+                                report_interval=0.05)
+    assert runner.num_workers == 3
+    assert not runner.run(timeout=60)
+
+    # stream2 is the bad:// URI, its worker also owns nothing else
+    assert [index for index, _ in runner.errors] == [2]
+    assert "cannot open bad://" in runner.errors[0][1]
+    assert runner.total_frames == {"stream0": 9, "stream1": 9, "stream2": 0,
+                                   "stream3": 9}
+    assert set(runner.stream_fps) <= {"stream0", "stream1", "stream3"}
+    assert runner.exitcodes == {0: 0, 1: 0, 2: 0}
+
+
+def test_worker_killed_while_others_report():
+    runner = MultiProcessRunner(["file:///a.mp4", "crash://"],
+                                make_crashing_pipeline, num_workers=2,
+                                report_interval=0.05)
+    errors_on_report = []
+    assert not runner.run(
+        on_report=lambda runner: errors_on_report.append(list(runner.errors)))
+
+    assert runner.errors == [(1, "worker exited with code %d" % -signal.SIGKILL)]
+    assert runner.exitcodes == {0: 0, 1: -signal.SIGKILL}
+    # Found while the healthy worker kept the queue busy
+    assert errors_on_report[-1] == runner.errors
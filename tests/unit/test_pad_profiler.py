@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+pytest.importorskip("gi")
+
+from common.pad_profiler import PadTraffic
+from tests.testcommon.pipeline_videotestsrc import PipelineVideotestsrc
+
+
+def test_traffic_gaps():
+    traffic = PadTraffic()
+    for now in (1.0, 1.1, 1.4):
+        traffic.update(1, 100, now)
+    assert traffic.buffers == 3
+    assert traffic.bytes == 300
+    assert traffic.gap_total == pytest.approx(0.4)
+    assert traffic.gap_max == pytest.approx(0.3)
+
+
+def test_profiler_counts_every_edge(tmp_path):
+    properties = {
+        "video-source": {"num-buffers": 20},
+        "fakesink": {"sync": False},
+    }
+    sp = PipelineVideotestsrc(properties)
+    profiler = sp.set_pad_profiler(target_fps=1e9)
+    sp.run()
+
+    edges = {(edge["src"], edge["dst"]): edge for edge in profiler.edges()}
+    assert set(edges) == {("video-source", "identity"), ("identity", "fakesink")}
+    for edge in edges.values():
+        assert edge["buffers"] == 20
+        assert edge["bytes"] > 0
+        assert edge["starving"]
+
+    dot_path, json_path = profiler.dump(str(tmp_path / "pipeline"))
+    with open(dot_path) as dot_file:
+        dot = dot_file.read()
+    assert '"video-source" -> "identity"' in dot
+    assert "color=red" in dot
+    with open(json_path) as json_file:
+        assert len(json.load(json_file)["edges"]) == 2
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+
+import numpy as np
+
+from common.FPS import PERF_DATA
+from common.perf_recorder import PerfRecorder
+
+
+def test_perf_data_recorded_to_csv(tmp_path):
+    output = tmp_path / "perf.csv"
+    recorder = PerfRecorder(str(output), flush_interval=0.01)
+    recorder.start()
+    perf_data = PERF_DATA(0)
+    perf_data.recorder = recorder
+    for i in range(3):
+        perf_data.update_counts({"stream0": 1}, now=float(i),
+                                objects={"stream0": 4})
+    perf_data.update_probe_time("tiler_probe", 0.002)
+    perf_data.perf_print_callback()
+    recorder.stop()
+
+    with open(output) as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert [row["name"] for row in rows] == ["stream0", "tiler_probe"]
+    assert float(rows[0]["frames"]) == 2
+    assert float(rows[0]["objects"]) == 8
+    assert float(rows[1]["probe_calls"]) == 1
+    assert float(rows[1]["probe_time_ms"]) == 2.0
+
+
+def test_full_buffer_drops_rows(tmp_path):
+    recorder = PerfRecorder(str(tmp_path / "perf.npz"), fmt="npz", max_rows=2)
+    assert recorder.record("stream0", fps=30.0)
+    assert recorder.record("stream1", fps=25.0)
+    assert not recorder.record("stream2", fps=20.0)
+    assert recorder.dropped_rows == 1
+    assert recorder.flush() == 2
+
+    chunk = np.load(tmp_path / "perf-00000.npz")
+    assert chunk["name"].tolist() == ["stream0", "stream1"]
+    assert chunk["fps"].tolist() == [30.0, 25.0]
+    assert np.isnan(chunk["objects"]).all()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.repository import Gst
+
+from tests.testcommon.pipeline_videotestsrc import PipelineVideotestsrc
+
+
+def _counting_probe(counts, key):
+    def probe(pad, info, u_data):
+        counts[key] = counts.get(key, 0) + 1
+        return Gst.PadProbeReturn.OK
+    return probe
+
+
+def test_pipeline_runs_again_after_reset():
+    properties = {
+        "video-source": {"num-buffers": 5},
+        "fakesink": {"sync": False},
+    }
+    sp = PipelineVideotestsrc(properties)
+    counts = {}
+    sp.set_probe(_counting_probe(counts, "first"))
+    sp.run()
+    assert counts == {"first": 5}
+
+    # The first probe is removed, the override only lasts one run
+    sp.reset({"video-source": {"num-buffers": 3}})
+    sp.set_probe(_counting_probe(counts, "second"))
+    sp.run()
+    assert counts == {"first": 5, "second": 3}
+
+    sp.reset()
+    sp.set_probe(_counting_probe(counts, "third"))
+    sp.run()
+    assert counts == {"first": 5, "second": 3, "third": 5}
+    assert sp.run_count == 3
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("gi")
+
+from tests.testcommon.pipeline_videotestsrc import PipelineVideotestsrc
+
+# Without num-buffers videotestsrc never ends on its own
+ENDLESS_PROPERTIES = {
+    "fakesink": {"sync": False},
+}
+
+
+def test_max_buffers_drains_exactly():
+    sp = PipelineVideotestsrc(ENDLESS_PROPERTIES)
+    result = asyncio.run(sp.run_async(max_buffers=10, timeout=30))
+    assert result["stopped"] == "max-buffers"
+    assert result["drained"]
+    assert result["buffers"] == 10
+
+
+def test_timeout_and_other_tasks_run_alongside():
+    sp = PipelineVideotestsrc({"fakesink": {"sync": True}})
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        task = asyncio.ensure_future(ticker())
+        result = await sp.run_async(timeout=0.3)
+        task.cancel()
+        return result
+
+    result = asyncio.run(main())
+    assert result["stopped"] == "timeout"
+    assert result["drained"]
+    assert result["elapsed"] < 5.0
+    assert len(ticks) > 5
+
+
+def test_cancel_sends_eos_and_propagates():
+    sp = PipelineVideotestsrc(ENDLESS_PROPERTIES)
+
+    async def main():
+        task = asyncio.ensure_future(sp.run_async())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    # The pipeline can run again afterwards
+    sp.reset()
+    assert asyncio.run(sp.run_async(max_buffers=3))["buffers"] == 3
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+
+pytest.importorskip("gi")
+
+from tests.testcommon.pipeline_spec import (_bypass_elements, load_spec,
+                                            validate_spec)
+
+SPECS_PATH = os.path.join(os.path.dirname(__file__), "../testcommon/specs")
+
+
+def test_example_spec_is_valid():
+    pytest.importorskip("yaml")
+    spec = load_spec(os.path.join(SPECS_PATH, "videotestsrc_tee.yaml"))
+    assert validate_spec(spec) == []
+
+
+def test_validate_reports_every_problem():
+    spec = {
+        "elements": [
+            {"factory": "videotestsrc", "name": "src"},
+            {"factory": "fakesink", "name": "src"},
+            {"name": "sink", "properties": []},
+        ],
+        "links": [["src", "missing"], {"src": "src", "dst": "sink", "queue": 4}],
+        "probes": {},
+    }
+    errors = validate_spec(spec)
+    assert errors == [
+        'unknown key "probes"',
+        'elements[1]: duplicate element name "src"',
+        'elements[2]: missing "factory"',
+        'elements[2]: "properties" must be a dict',
+        'links[0]: unknown element "missing"',
+        'links[1]: "queue" must be a dict of queue properties',
+    ]
+
+
+def test_queue_links_must_not_clash():
+    spec = {
+        "elements": [{"factory": "tee", "name": "tee"},
+                     {"factory": "fakesink", "name": "sink"}],
+        "links": [{"src": "tee", "dst": "sink", "queue": {}},
+                  {"src": "tee", "dst": "sink", "queue": {}}],
+    }
+    assert validate_spec(spec) == ['links[1]: queue name "tee-sink-queue" already used']
+
+
+def test_arm64_elements_are_bypassed():
+    links = [{"src": "src", "dst": "tee"},
+             {"src": "tee", "dst": "transform", "src_pad": "src_%u",
+              "queue": {"leaky": 2}},
+             {"src": "transform", "dst": "sink"},
+             {"src": "tee", "dst": "overlay"},
+             {"src": "overlay", "dst": "sink-b"},
+             {"src": "overlay", "dst": "sink-c"}]
+    assert _bypass_elements(links, ["transform", "overlay"]) == [
+        {"src": "src", "dst": "tee"},
+        {"src": "tee", "dst": "sink", "src_pad": "src_%u",
+         "queue": {"leaky": 2}},
+    ]
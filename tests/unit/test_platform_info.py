@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import sys
+
+import pytest
+
+from common import platform_info
+from common.platform_info import PlatformInfo
+
+
+@pytest.fixture(autouse=True)
+def no_cuda(monkeypatch):
+    """ Fresh probing, with cuda-python missing """
+    monkeypatch.setattr(platform_info, "_probed", {})
+    monkeypatch.delenv(platform_info.CACHE_PATH_ENV, raising=False)
+    monkeypatch.setitem(sys.modules, "cuda", None)
+    monkeypatch.setattr(platform_info, "_is_tegra", lambda: False)
+
+
+def test_cpu_only_fallback_is_probed_once(tmp_path, monkeypatch, capsys):
+    probe_cuda = platform_info._probe_cuda
+    probes = []
+
+    def counting_probe_cuda():
+        probes.append(1)
+        return probe_cuda()
+
+    monkeypatch.setattr(platform_info, "_probe_cuda", counting_probe_cuda)
+    cache_path = tmp_path / "platform_info.json"
+    assert not PlatformInfo(str(cache_path)).is_integrated_gpu()
+    assert not PlatformInfo().has_cuda()
+    assert not PlatformInfo().is_integrated_gpu()
+    assert len(probes) == 1
+    assert capsys.readouterr().out.count("cuda-python not found") == 1
+    # cuda-python may be installed before the next reboot
+    assert not cache_path.exists()
+
+
+def test_failed_cuda_call_is_retried(monkeypatch):
+    probes = []
+
+    def probe_cuda():
+        probes.append(1)
+        return {"cuda": False, "device_count": 0, "integrated": False}, False
+
+    monkeypatch.setattr(platform_info, "_probe_cuda", probe_cuda)
+    assert not PlatformInfo().has_cuda()
+    assert not PlatformInfo().has_cuda()
+    assert len(probes) == 2
+
+
+def test_successful_probe_is_cached_for_the_process(monkeypatch):
+    probes = []
+
+    def probe_cuda():
+        probes.append(1)
+        return {"cuda": True, "device_count": 1, "integrated": False}, True
+
+    monkeypatch.setattr(platform_info, "_probe_cuda", probe_cuda)
+    assert PlatformInfo().has_cuda()
+    assert not PlatformInfo().is_integrated_gpu()
+    assert len(probes) == 1
+
+
+def test_disk_cache_is_keyed_by_boot_id(tmp_path, monkeypatch):
+    boot_id_path = tmp_path / "boot_id"
+    boot_id_path.write_text("boot-1\n")
+    monkeypatch.setattr(platform_info, "BOOT_ID_PATH", str(boot_id_path))
+    cache_path = tmp_path / "platform_info.json"
+    cache_path.write_text(json.dumps({
+        "boot_id": "boot-1",
+        "gpu": {"cuda": True, "device_count": 1, "integrated": True}}))
+
+    assert PlatformInfo(str(cache_path)).is_integrated_gpu()
+
+    # After a reboot the cache is probed again and rewritten
+    boot_id_path.write_text("boot-2\n")
+    monkeypatch.setattr(platform_info, "_probed", {})
+    monkeypatch.setattr(platform_info, "_probe_cuda", lambda: (
+        {"cuda": True, "device_count": 1, "integrated": False}, True))
+    assert not PlatformInfo(str(cache_path)).is_integrated_gpu()
+    assert json.loads(cache_path.read_text())["boot_id"] == "boot-2"
+
+
+def _write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def test_host_limits_come_from_cgroup_v2(tmp_path, monkeypatch):
+    cgroup = tmp_path / "cgroup"
+    _write(cgroup / "cpu.max", "150000 100000\n")
+    _write(cgroup / "memory.max", "%d\n" % (3 << 30))
+    _write(tmp_path / "meminfo", "MemTotal:       16000000 kB\n"
+                                 "MemAvailable:    8000000 kB\n")
+    (tmp_path / "node" / "node0").mkdir(parents=True)
+    (tmp_path / "node" / "node1").mkdir()
+    monkeypatch.setattr(platform_info, "CGROUP_ROOT", str(cgroup))
+    monkeypatch.setattr(platform_info, "PROC_CGROUP_PATH", str(tmp_path / "missing"))
+    monkeypatch.setattr(platform_info, "MEMINFO_PATH", str(tmp_path / "meminfo"))
+    monkeypatch.setattr(platform_info, "NUMA_NODES_PATH", str(tmp_path / "node"))
+    monkeypatch.setattr(platform_info.os, "sched_getaffinity",
+                        lambda pid: set(range(8)), raising=False)
+
+    info = PlatformInfo()
+    host = info.host()
+    assert host["cpus"] == 8
+    assert host["cpu_quota"] == 1.5
+    assert host["memory_available"] == 8000000 * 1024
+    assert host["numa_nodes"] == 2
+    assert info.usable_cpus() == 1
+    assert info.usable_memory() == 3 << 30
+    assert info.recommended_shards(16) == 1
+    assert info.recommended_worker_threads() == 1
+    assert 2 <= info.recommended_queue_depth(16) <= 8
+    assert info.recommended_batch_timeout_usec(1) == 33333
+    assert info.recommended_batch_timeout_usec(2, fps=25) == 80000
+    assert info.recommended_batch_timeout_usec(16) == 133333
+
+
+def test_unlimited_cgroup_v1(tmp_path, monkeypatch):
+    cgroup = tmp_path / "cgroup"
+    _write(cgroup / "cpu" / "cpu.cfs_quota_us", "-1\n")
+    _write(cgroup / "cpu" / "cpu.cfs_period_us", "100000\n")
+    _write(cgroup / "memory" / "memory.limit_in_bytes", "9223372036854771712\n")
+    monkeypatch.setattr(platform_info, "CGROUP_ROOT", str(cgroup))
+    monkeypatch.setattr(platform_info, "PROC_CGROUP_PATH", str(tmp_path / "missing"))
+    monkeypatch.setattr(platform_info, "MEMINFO_PATH", str(tmp_path / "missing"))
+    monkeypatch.setattr(platform_info.os, "sched_getaffinity",
+                        lambda pid: set(range(4)), raising=False)
+
+    info = PlatformInfo()
+    assert info.host()["cpu_quota"] is None
+    assert info.usable_memory() is None
+    assert info.recommended_shards(2) == 2
+    assert info.recommended_shards(16) == 4
+    assert info.recommended_worker_threads() == 3
+    assert info.recommended_queue_depth(16) == 8
+    assert info.recommended_batch_timeout_usec(4) == 33333
+
+
+def test_limits_of_the_cgroup_of_the_process_v2(tmp_path, monkeypatch):
+    cgroup = tmp_path / "cgroup"
+    _write(tmp_path / "proc_cgroup", "0::/user.slice/app.scope\n")
+    _write(cgroup / "cpu.max", "max 100000\n")
+    _write(cgroup / "user.slice" / "cpu.max", "200000 100000\n")
+    _write(cgroup / "user.slice" / "memory.max", "%d\n" % (4 << 30))
+    _write(cgroup / "user.slice" / "app.scope" / "cpu.max", "max 100000\n")
+    _write(cgroup / "user.slice" / "app.scope" / "memory.max", "%d\n" % (2 << 30))
+    monkeypatch.setattr(platform_info, "CGROUP_ROOT", str(cgroup))
+    monkeypatch.setattr(platform_info, "PROC_CGROUP_PATH",
+                        str(tmp_path / "proc_cgroup"))
+
+    # The quota of the parent applies, the lowest memory limit wins
+    assert platform_info._read_cgroup_cpu_quota() == 2.0
+    assert platform_info._read_cgroup_memory_limit() == 2 << 30
+
+
+def test_limits_of_the_cgroup_of_the_process_v1(tmp_path, monkeypatch):
+    cgroup = tmp_path / "cgroup"
+    _write(tmp_path / "proc_cgroup", "5:memory:/docker/abc\n"
+                                     "4:cpu,cpuacct:/docker/abc\n"
+                                     "1:name=systemd:/docker/abc\n")
+    _write(cgroup / "cpu,cpuacct" / "docker" / "abc" / "cpu.cfs_quota_us", "50000\n")
+    _write(cgroup / "cpu,cpuacct" / "docker" / "abc" / "cpu.cfs_period_us", "100000\n")
+    # Without a cgroup namespace: the mount is the cgroup of the container
+    _write(cgroup / "memory" / "memory.limit_in_bytes", "%d\n" % (1 << 30))
+    monkeypatch.setattr(platform_info, "CGROUP_ROOT", str(cgroup))
+    monkeypatch.setattr(platform_info, "PROC_CGROUP_PATH",
+                        str(tmp_path / "proc_cgroup"))
+
+    assert platform_info._read_cgroup_cpu_quota() == 0.5
+    assert platform_info._read_cgroup_memory_limit() == 1 << 30
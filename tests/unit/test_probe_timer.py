@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from common.FPS import PERF_DATA
+from common.metrics_server import format_openmetrics
+from common.probe_timer import ProbeHistogram, ProbeTimer
+
+
+def test_histogram_buckets():
+    histogram = ProbeHistogram(bounds=(0.001, 0.010))
+    for duration in (0.0005, 0.002, 0.003, 0.5):
+        histogram.record(duration)
+    assert histogram.counts == [1, 2, 1]
+    assert histogram.percentile(50) == 0.010
+    assert histogram.percentile(100) == float("inf")
+    assert ProbeHistogram().percentile(50) is None
+
+
+def test_overruns_against_fixed_interval(capsys):
+    probe_timer = ProbeTimer("tiler_sink_pad_buffer_probe",
+                             frame_interval=0.033, warn_interval=10.0)
+    for now, duration in ((1.0, 0.010), (2.0, 0.050), (3.0, 0.040),
+                          (20.0, 0.060)):
+        probe_timer.record(duration, now)
+
+    assert probe_timer.overruns == 3
+    assert probe_timer.histogram.count == 4
+    warnings = capsys.readouterr().err.splitlines()
+    # The overrun at 3.0 falls in the warn interval of the one at 2.0
+    assert len(warnings) == 2
+    assert "2 overruns since last warning" in warnings[1]
+
+
+def test_wrapped_probe_feeds_perf_data():
+    perf_data = PERF_DATA(2)
+    perf_data.perf_dict = {"stream0": 30.0, "stream1": 1000000.0}
+
+    @ProbeTimer("osd_sink_pad_buffer_probe", perf_data, warn_interval=1e9)
+    def osd_sink_pad_buffer_probe(pad, info, u_data):
+        return "OK"
+
+    assert osd_sink_pad_buffer_probe(None, None, None) == "OK"
+    assert osd_sink_pad_buffer_probe.__name__ == "osd_sink_pad_buffer_probe"
+    probe_timer = osd_sink_pad_buffer_probe.probe_timer
+    assert probe_timer.frame_interval == 1e-6
+
+    probe_time = perf_data.probe_times["osd_sink_pad_buffer_probe"]
+    assert probe_time.count == 1
+    probe_time.update(0.5, overrun=True)
+    metrics = format_openmetrics(perf_data.snapshot())
+    assert 'deepstream_probe_overruns_total{probe="osd_sink_pad_buffer_probe"}' in metrics
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from tests.testcommon import pyds_sim
+
+
+def glist_items(l_item):
+    items = []
+    while l_item is not None:
+        items.append(l_item.data)
+        l_item = l_item.next
+    return items
+
+
+def test_tracker_past_frame_meta():
+    batch_meta = pyds_sim.make_batch(2, objects_per_frame=3, tracker_meta=True,
+                                     tracker_past_frames=4)
+    user_meta, = glist_items(batch_meta.batch_user_meta_list)
+    assert user_meta.base_meta.meta_type == pyds_sim.NvDsMetaType.NVDS_TRACKER_PAST_FRAME_META
+
+    # Walked the way the tracker test of tests/integration/test.py does
+    misc_data_batch = pyds_sim.NvDsTargetMiscDataBatch.cast(user_meta.user_meta_data)
+    frames = [misc_data_frame.frameNum
+              for misc_data_stream in pyds_sim.NvDsTargetMiscDataBatch.list(misc_data_batch)
+              for misc_data_obj in pyds_sim.NvDsTargetMiscDataStream.list(misc_data_stream)
+              for misc_data_frame in pyds_sim.NvDsTargetMiscDataObject.list(misc_data_obj)]
+    assert len(frames) == 2 * 3 * 4
+
+
+def test_user_and_reid_meta():
+    batch_meta = pyds_sim.make_batch(1, objects_per_frame=2, frame_user_meta=2,
+                                     obj_user_meta=1, reid_meta=True)
+    frame_meta = batch_meta.frame_meta_list.data
+    assert len(glist_items(frame_meta.frame_user_meta_list)) == 2
+
+    obj_meta = frame_meta.obj_meta_list.data
+    user_metas = glist_items(obj_meta.obj_user_meta_list)
+    assert [user_meta.base_meta.meta_type for user_meta in user_metas] == [
+        pyds_sim.NvDsMetaType.NVDS_USER_META,
+        pyds_sim.NvDsMetaType.NVDS_TRACKER_OBJ_REID_META]
+    reid = pyds_sim.NvDsObjReid.cast(user_metas[1].user_meta_data)
+    assert reid.get_host_reid_vector().size == reid.featureSize
+
+
+def test_attach_drops_metas_added_by_probes():
+    batch_meta = pyds_sim.make_batch(1, objects_per_frame=0, frame_user_meta=1)
+    frame_meta = batch_meta.frame_meta_list.data
+    pyds_sim.attach_batch_meta(1, batch_meta)
+    pyds_sim.nvds_add_user_meta_to_frame(
+        frame_meta, pyds_sim.nvds_acquire_user_meta_from_pool(batch_meta))
+    pyds_sim.nvds_add_display_meta_to_frame(
+        frame_meta, pyds_sim.nvds_acquire_display_meta_from_pool(batch_meta))
+    assert len(glist_items(frame_meta.frame_user_meta_list)) == 2
+
+    pyds_sim.attach_batch_meta(1, batch_meta)
+    assert len(glist_items(frame_meta.frame_user_meta_list)) == 1
+    assert frame_meta.num_display_meta == 0
+    pyds_sim.release_batch_meta(1)
+
+
+def test_attach_drops_object_and_batch_metas_added_by_probes():
+    batch_meta = pyds_sim.make_batch(1, objects_per_frame=2, obj_user_meta=1,
+                                     tracker_meta=True)
+    frame_meta = batch_meta.frame_meta_list.data
+    bare_obj_meta, obj_meta = glist_items(frame_meta.obj_meta_list)
+    # The user metas held at the first attach are the synthetic ones
+    bare_obj_meta.obj_user_meta_list = None
+    for _ in range(3):
+        pyds_sim.attach_batch_meta(1, batch_meta)
+        for target in (bare_obj_meta, obj_meta):
+            pyds_sim.nvds_add_user_meta_to_obj(
+                target, pyds_sim.nvds_acquire_user_meta_from_pool(batch_meta))
+        pyds_sim.nvds_add_user_meta_to_batch(
+            batch_meta, pyds_sim.nvds_acquire_user_meta_from_pool(batch_meta))
+        assert len(glist_items(obj_meta.obj_user_meta_list)) == 2
+        assert len(glist_items(bare_obj_meta.obj_user_meta_list)) == 1
+        assert len(glist_items(batch_meta.batch_user_meta_list)) == 2
+    pyds_sim.release_batch_meta(1)
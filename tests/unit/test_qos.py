@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.repository import Gst
+
+from common.bus_call import BusDispatcher
+from common.FPS import PERF_DATA
+from common.metrics_server import format_openmetrics
+from common.qos import QOS_UNKNOWN, QosAggregator
+
+
+def _qos_message(element, processed, dropped, jitter_ms):
+    message = Gst.Message.new_qos(element, False, 0, 0, 0, 0)
+    message.set_qos_stats(Gst.Format.BUFFERS, processed, dropped)
+    message.set_qos_values(int(jitter_ms * Gst.MSECOND), 1.0, 1000000)
+    return message
+
+
+def test_totals_per_element_and_source():
+    Gst.init(None)
+    source_bin = Gst.Bin.new("source-bin-00")
+    decoder = Gst.ElementFactory.make("identity", "decoder")
+    source_bin.add(decoder)
+    sink = Gst.ElementFactory.make("fakesink", "sink")
+
+    dispatcher = BusDispatcher()
+    dispatcher.register_source(0, "source-bin-00")
+    qos = QosAggregator(window=10.0)
+    qos.attach(dispatcher)
+
+    dispatcher(None, _qos_message(decoder, 90, 10, 2.0))
+    dispatcher(None, _qos_message(sink, 50, 0, 1.0))
+    qos.handle_message(_qos_message(sink, 80, 20, 5.0))
+
+    snapshot = qos.snapshot()
+    assert snapshot["decoder"]["source_id"] == 0
+    assert snapshot["decoder"]["drop_ratio"] == 0.1
+    assert snapshot["sink"]["source_id"] is None
+    assert snapshot["sink"]["messages"] == 2
+    assert snapshot["sink"]["dropped"] == 20
+    assert snapshot["sink"]["recent_drop_ratio"] == 0.4
+    assert snapshot["sink"]["jitter_ms_mean"] == 3.0
+    # Early buffer, the element does not count the dropped buffers
+    qos.handle_message(_qos_message(sink, 100, QOS_UNKNOWN, -6.0))
+    snapshot = qos.snapshot()
+    assert snapshot["sink"]["processed"] == 100
+    assert snapshot["sink"]["dropped"] == 20
+    assert snapshot["sink"]["jitter_ms_mean"] == 4.0
+    assert snapshot["sink"]["jitter_ms_max"] == 5.0
+    assert qos.totals() == {"processed": 190, "dropped": 30}
+
+    perf_data = PERF_DATA(1)
+    perf_data.qos = qos
+    metrics = format_openmetrics(perf_data.snapshot())
+    assert ('deepstream_qos_dropped_total{element="decoder",source="0"} 10.0'
+            in metrics)
+    assert 'deepstream_qos_jitter_seconds{element="sink"} 0.005' in metrics
+
+    qos.forget_source(0)
+    assert set(qos.snapshot()) == {"sink"}
+    qos.forget("sink")
+    assert qos.snapshot() == {}
+
+
+def test_recent_drop_ratio_forgets_old_messages():
+    Gst.init(None)
+    sink = Gst.ElementFactory.make("fakesink", "sink")
+    qos = QosAggregator(window=1.0)
+    qos.handle_message(_qos_message(sink, 0, 100, 0), now=0.0)
+    qos.handle_message(_qos_message(sink, 100, 100, 0), now=5.0)
+    qos.handle_message(_qos_message(sink, 200, 100, 0), now=5.5)
+    sink_stats = qos.snapshot()["sink"]
+    assert sink_stats["drop_ratio"] == pytest.approx(0.3333, abs=1e-4)
+    assert sink_stats["recent_drop_ratio"] == 0.0
+
+
+def test_counters_of_other_formats_are_ignored():
+    Gst.init(None)
+    sink = Gst.ElementFactory.make("fakesink", "sink")
+    qos = QosAggregator()
+    message = Gst.Message.new_qos(sink, False, 0, 0, 0, 0)
+    message.set_qos_stats(Gst.Format.DEFAULT, 48000, 960)
+    message.set_qos_values(int(2 * Gst.MSECOND), 1.0, 1000000)
+    qos.handle_message(message)
+    assert qos.totals() == {"processed": 0, "dropped": 0}
+    assert qos.snapshot()["sink"]["jitter_ms_mean"] == 2.0
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.repository import Gst
+
+from common.queue_planner import (AFTER_PROBED, BEFORE_PROBED, REQUESTED,
+                                  TEE_BRANCH, insert_queues, plan_queues)
+
+GRAPH = ("videotestsrc name=src num-buffers=10 ! tee name=t "
+         "t. ! queue name=q ! fakesink name=sink-a "
+         "t. ! identity name=probed ! videoconvert name=convert "
+         "! fakesink name=sink-b sync=false")
+
+
+def _build():
+    Gst.init(None)
+    return Gst.parse_launch(GRAPH)
+
+
+def test_plan_splits_probed_elements_and_tee_branches():
+    pipeline = _build()
+    plan = {(boundary.src, boundary.dst): boundary.reasons
+            for boundary in plan_queues(pipeline, probed=["probed"],
+                                        boundaries=[("convert", "sink-b")])}
+    # t -> q already starts with a queue
+    assert plan == {
+        ("t", "probed"): (BEFORE_PROBED, TEE_BRANCH),
+        ("probed", "convert"): (AFTER_PROBED,),
+        ("convert", "sink-b"): (REQUESTED,),
+    }
+
+
+def test_inserted_queues_are_linked_and_run():
+    pipeline = _build()
+    plan = plan_queues(pipeline, probed=["probed"])
+    queues = insert_queues(pipeline, plan, {"max-size-buffers": 2},
+                           {"probed-convert-queue": {"leaky": 2}})
+    assert [queue.get_name() for queue in queues] == ["t-probed-queue",
+                                                      "probed-convert-queue"]
+    assert queues[0].get_property("max-size-buffers") == 2
+    assert int(queues[1].get_property("leaky")) == 2
+    probed = pipeline.get_by_name("probed")
+    assert probed.get_static_pad("sink").get_peer().get_parent_element() == queues[0]
+    assert plan_queues(pipeline, probed=["probed"], tee_branches=False) == []
+
+    pipeline.set_state(Gst.State.PLAYING)
+    message = pipeline.get_bus().timed_pop_filtered(
+        10 * Gst.SECOND, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    pipeline.set_state(Gst.State.NULL)
+    assert message is not None and message.type == Gst.MessageType.EOS